@@ -0,0 +1,203 @@
+"""
+Atraso frente al plan ideal (plan_ideal.json).
+
+El plan ideal pone cada curso en un semestre de la carrera: (anio - 1) * 2 +
+semestre. Para un estudiante que está en el semestre `semestre_actual` de la
+carrera, con sus aprobados y un plan generado (simular_avance o el CSP), se
+mide por curso:
+  - retraso: semestre planificado menos semestre ideal (los aprobados se
+    consideran al día);
+  - holgura: último semestre en que se puede llevar el curso sin que la
+    cadena de prerrequisitos que depende de él termine después del último
+    semestre del plan ideal (respetando los ciclos en que se ofrece cada
+    curso), menos el semestre planificado. Holgura negativa quiere decir que
+    ese curso ya empuja la graduación.
+y en total: semestres extra frente al plan ideal, retraso total, retraso
+ponderado por descendientes (atrasar un curso con muchos dependientes pesa
+más) y la holgura mínima. Los cursos pendientes que el plan no ubica cuentan
+como llevados un semestre después del plan. `puntaje` (semestres extra
+positivos más el retraso ponderado) ordena a los estudiantes en riesgo.
+
+Los semestres ideales, los pesos y los límites de cada ciclo de ingreso se
+calculan una sola vez por currículo y plan ideal, en arreglos por posición, y
+cada estudiante es un recorrido de sus cursos pendientes (los del bitset del
+currículo que no están en sus aprobados):
+
+    ideal = para(cursos, cargar_plan_ideal())
+    filas = ideal.evaluar_cohorte(registros, max_cursos=5, start_year=2025)
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from curriculo import indexar
+from simulador import simular_avance
+
+# PlanIdeal por (versión del currículo, plan ideal); en un catálogo hay uno por programa
+MAX_PLANES = 32
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def cargar_plan_ideal(path="plan_ideal.json"):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def para(cursos, plan_ideal):
+    """
+    PlanIdeal de `cursos` y `plan_ideal`, cacheado por versión del currículo
+    (los MAX_PLANES usados más recientemente).
+    """
+    cursos = indexar(cursos)
+    clave = (cursos.version, json.dumps(plan_ideal, sort_keys=True))
+    with _lock:
+        ideal = _cache.get(clave)
+        if ideal is not None:
+            _cache.move_to_end(clave)
+            return ideal
+    ideal = PlanIdeal(cursos, plan_ideal)
+    with _lock:
+        ideal = _cache.setdefault(clave, ideal)
+        _cache.move_to_end(clave)
+        while len(_cache) > MAX_PLANES:
+            _cache.popitem(last=False)
+    return ideal
+
+
+class PlanIdeal:
+    """
+    Plan ideal indexado por posición del currículo: `ideal[i]` es el semestre
+    ideal del curso i (None si el plan no lo trae) y `final` el último
+    semestre del plan.
+    """
+
+    def __init__(self, cursos, plan_ideal):
+        self.cursos = cursos = indexar(cursos)
+        self.ideal = [None] * len(cursos)
+        for etapa in plan_ideal:
+            semestre = (etapa["anio"] - 1) * 2 + etapa["semestre"]
+            for cod in etapa["cursos"]:
+                i = cursos.indice.get(cod)
+                if i is not None:
+                    self.ideal[i] = semestre
+        self.final = max((s for s in self.ideal if s is not None), default=0)
+        self.pesos = [1 + d for d in cursos.descendientes]
+        # Los aprobados solo aportan su peso al total, que es el de todos los
+        # cursos del plan ideal: así cada estudiante recorre sus pendientes
+        self.peso_total = sum(p for p, s in zip(self.pesos, self.ideal) if s is not None)
+        self._limites = {}
+
+    def limites(self, ciclo_ingreso):
+        """
+        Último semestre de la carrera (con el semestre 1 en `ciclo_ingreso`)
+        en que se puede llevar cada curso y aun así terminar en `final`; None
+        si el curso no se ofrece o está en un ciclo de prerrequisitos.
+        """
+        limites = self._limites.get(ciclo_ingreso)
+        if limites is not None:
+            return limites
+        limites = self.cursos.semestres_tardios(self.final, ciclo_ingreso)
+        self._limites[ciclo_ingreso] = limites
+        return limites
+
+    def evaluar(self, aprobados, plan, semestre_actual, ciclo_actual, start_year, detalle=True):
+        """
+        Compara aprobados (nombres o códigos) y `plan` (etapas con "año",
+        "ciclo" y "cursos"; su primer semestre posible es `ciclo_actual` de
+        `start_year`) contra el plan ideal, para un estudiante que cursa el
+        semestre `semestre_actual` de la carrera. Con `detalle`, agrega
+        "cursos": {codigo: {ideal, planificado, retraso, holgura}}.
+        """
+        cursos = self.cursos
+        a_codigo = cursos.nombre_a_codigo
+        historial = cursos.mascara(a_codigo.get(x, x) for x in aprobados)
+        # Ciclo del semestre 1 de la carrera para este estudiante
+        ciclo_ingreso = ciclo_actual if semestre_actual % 2 == 1 else 3 - ciclo_actual
+        limites = self.limites(ciclo_ingreso)
+
+        planificado = {}
+        for etapa in plan:
+            t = semestre_actual + (etapa["año"] - start_year) * 2 + (etapa["ciclo"] != ciclo_actual)
+            for x in etapa["cursos"]:
+                i = cursos.indice.get(a_codigo.get(x, x))
+                if i is not None:
+                    planificado[i] = t
+        final = max(planificado.values(), default=semestre_actual - 1)
+
+        retraso_total = ponderado = 0
+        holgura_minima = None
+        criticos, sin_plan = [], []
+        por_curso = {}
+        if detalle:
+            for i in cursos.posiciones(historial & cursos.mascara_total):
+                por_curso[cursos.codigos[i]] = {"ideal": self.ideal[i], "planificado": None,
+                                               "retraso": 0, "holgura": None}
+        for i in cursos.posiciones(cursos.mascara_total & ~historial):
+            ideal = self.ideal[i]
+            t = planificado.get(i)
+            retraso = holgura = None
+            if t is None:
+                sin_plan.append(cursos.codigos[i])
+            else:
+                if ideal is not None:
+                    retraso = t - ideal
+                if limites[i] is not None:
+                    holgura = limites[i] - t
+                    if holgura_minima is None or holgura < holgura_minima:
+                        holgura_minima = holgura
+                    if holgura < 0:
+                        criticos.append(cursos.codigos[i])
+            if ideal is not None:
+                # Un curso que el plan no ubica cuenta como llevado después del plan
+                efectivo = retraso if retraso is not None else final + 1 - ideal
+                if efectivo > 0:
+                    retraso_total += efectivo
+                    ponderado += efectivo * self.pesos[i]
+            if detalle:
+                por_curso[cursos.codigos[i]] = {"ideal": ideal, "planificado": t,
+                                               "retraso": retraso, "holgura": holgura}
+
+        if sin_plan:
+            final += 1
+        resultado = {
+            "semestre_actual": semestre_actual,
+            "semestre_final": final,
+            "semestre_final_ideal": self.final,
+            "semestres_extra": final - self.final,
+            "retraso_total": retraso_total,
+            "retraso_ponderado": ponderado / self.peso_total if self.peso_total else 0.0,
+            "holgura_minima": holgura_minima,
+            "criticos": criticos,
+            "sin_plan": sin_plan,
+        }
+        resultado["puntaje"] = max(0, resultado["semestres_extra"]) + resultado["retraso_ponderado"]
+        if detalle:
+            resultado["cursos"] = {cod: por_curso[cod] for cod in cursos.codigos if cod in por_curso}
+        return resultado
+
+    def evaluar_cohorte(self, registros, ciclo=1, max_cursos=5, start_year=0, max_creditos=None):
+        """
+        Evalúa cada registro {"id", "aprobados", "semestre_actual", y
+        opcionalmente "ciclo", "max_cursos", "max_creditos", "plan"} y
+        devuelve las filas (sin detalle por curso) de mayor a menor puntaje.
+        Los registros sin "plan" se planifican con simular_avance, cuyo memo
+        comparten los estudiantes que llegan al mismo estado.
+        """
+        filas = []
+        for registro in registros:
+            ciclo_r = int(registro.get("ciclo", ciclo))
+            plan = registro.get("plan")
+            if plan is None:
+                a_nombre = self.cursos.codigo_a_nombre
+                plan, _, _ = simular_avance(
+                    self.cursos, [a_nombre.get(x, x) for x in registro.get("aprobados") or []], ciclo_r,
+                    int(registro.get("max_cursos", max_cursos)), start_year,
+                    max_creditos=registro.get("max_creditos", max_creditos),
+                )
+            fila = self.evaluar(registro.get("aprobados") or [], plan, int(registro["semestre_actual"]),
+                                ciclo_r, start_year, detalle=False)
+            fila["id"] = registro.get("id")
+            filas.append(fila)
+        filas.sort(key=lambda f: -f["puntaje"])
+        return filas
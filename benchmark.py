@@ -0,0 +1,264 @@
+"""
+Benchmark de los planificadores sobre currículos sintéticos.
+
+Genera currículos con la forma de cursos.json (cantidad de cursos,
+prerrequisitos por curso, niveles de profundidad y fracción de cursos que se
+ofrecen en ambos ciclos), elige conjuntos de aprobados al azar (cerrados por
+prerrequisitos) y mide simular_avance (sin memo y, como "simular_avance_memo",
+con el memo de sufijos por defecto, vacío al empezar), simular_avance_csp,
+cursos_validos y predecir_graduacion: tiempo (perf_counter), pico de memoria (tracemalloc, en
+una segunda corrida para no inflar el tiempo), nodos, backtracks y calidad
+del plan (semestres frente a la cota inferior de optimizador.cota_inferior).
+
+    python benchmark.py --cursos 100 1000 10000 --salida bench.json
+    python benchmark.py --comparar base.json bench.json
+
+La salida es JSON para comparar corridas entre versiones.
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from contexto import BusquedaCancelada, ContextoBusqueda
+from curriculo import indexar
+from optimizador import INF, cota_inferior
+from simulador import limpiar_memo_sufijos, simular_avance, simular_avance_csp
+from utils import cursos_validos, predecir_graduacion
+
+FUNCIONES = ("simular_avance", "simular_avance_memo", "simular_avance_csp", "cursos_validos",
+             "predecir_graduacion")
+
+
+def generar_curriculo(n_cursos, densidad=1.5, profundidad=10, paridad=0.3, creditos=False, semilla=0):
+    """
+    Currículo sintético de `n_cursos` repartidos en `profundidad` niveles
+    (semestres del plan de estudios). Cada curso tiene en promedio `densidad`
+    prerrequisitos de niveles anteriores, la mayoría del nivel inmediato; una
+    fracción `paridad` se ofrece en ambos ciclos y el resto solo en el ciclo
+    de su nivel. Con `creditos`, cada curso trae entre 2 y 5 créditos.
+    """
+    rng = random.Random(semilla)
+    por_nivel = [[] for _ in range(profundidad)]
+    cursos = []
+    for i in range(n_cursos):
+        nivel = i * profundidad // n_cursos
+        ciclo = nivel % 2 + 1
+        requisitos = []
+        if nivel:
+            # Cantidad de prerrequisitos: geométrica con media `densidad`
+            k = 0
+            while rng.random() < densidad / (densidad + 1):
+                k += 1
+            for _ in range(k):
+                origen = nivel - 1 if rng.random() < 0.7 else rng.randrange(nivel)
+                requisitos.append(rng.choice(por_nivel[origen]))
+        curso = {
+            "codigo": f"S{i:05d}",
+            "nombre": f"Curso {i}",
+            "ciclo": ciclo,
+            "anio": nivel // 2 + 1,
+            "semestre": [1, 2] if rng.random() < paridad else [ciclo],
+            "requisitos": sorted(set(requisitos)),
+        }
+        if creditos:
+            curso["creditos"] = rng.randint(2, 5)
+        cursos.append(curso)
+        por_nivel[nivel].append(curso["codigo"])
+    return cursos
+
+
+def aprobados_aleatorios(cursos, fraccion, rng):
+    """
+    Nombres de cursos aprobados: cada curso con sus prerrequisitos aprobados
+    se aprueba con probabilidad `fraccion`.
+    """
+    cursos = indexar(cursos)
+    historial = 0
+    for i in cursos.orden_topologico:
+        if cursos.cumple_requisitos(i, historial) and rng.random() < fraccion:
+            historial |= 1 << i
+    return [c["nombre"] for c in cursos.cursos_de(historial)]
+
+
+def medir(funcion, memoria=True):
+    """
+    Corre `funcion()` (que devuelve un dict de métricas) y le agrega
+    "segundos" y, con `memoria`, "pico_kb" de una segunda corrida.
+    Un corte por presupuesto se informa como "cortado"; cualquier otro error
+    se propaga.
+    """
+    t0 = time.perf_counter()
+    try:
+        metricas = funcion()
+    except BusquedaCancelada:
+        metricas = {"cortado": True}
+    metricas["segundos"] = time.perf_counter() - t0
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+        except BusquedaCancelada:
+            pass
+        finally:
+            metricas["pico_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+    return metricas
+
+
+def _semestres(plan, ciclo):
+    # Semestres usados por un plan con años relativos a 0
+    if not plan:
+        return 0
+    return 2 * plan[-1]["año"] + (plan[-1]["ciclo"] != ciclo) + 1
+
+
+def casos(cursos, aprobados, ciclo, max_cursos, max_segundos_csp=10.0, limite_csp=2000):
+    """
+    {funcion: callable sin argumentos que devuelve sus métricas}.
+    """
+    pendientes = len(cursos) - len(aprobados)
+
+    def greedy(memo=False):
+        plan, iteraciones, nodos = simular_avance(cursos, aprobados, ciclo, max_cursos, 0, memo=memo,
+                                                  ctx=ContextoBusqueda())
+        return {"semestres": _semestres(plan, ciclo), "iteraciones": iteraciones, "nodos": nodos,
+                "completo": sum(len(e["cursos"]) for e in plan) == pendientes}
+
+    def greedy_memo():
+        # Con el memo vacío antes y después: mide lo que cuesta llenarlo sin
+        # aprovechar ni dejar estados a las demás funciones
+        limpiar_memo_sufijos()
+        try:
+            return greedy(memo=True)
+        finally:
+            limpiar_memo_sufijos()
+
+    def csp():
+        if len(cursos) > limite_csp:
+            return {"omitido": True}
+        ctx = ContextoBusqueda(max_segundos=max_segundos_csp)
+        plan, backtracks, nodos = simular_avance_csp(cursos, aprobados, ciclo, max_cursos, 0, ctx=ctx)
+        return {"semestres": _semestres(plan, ciclo), "backtracks": backtracks, "nodos": nodos,
+                "completo": bool(plan) and sum(len(e["cursos"]) for e in plan) == pendientes}
+
+    def validos():
+        return {"recomendados": len(cursos_validos(cursos, aprobados, ciclo, max_cursos))}
+
+    def prediccion():
+        return {"fecha": predecir_graduacion(cursos, aprobados, ciclo, max_cursos, start_year=0)}
+
+    return dict(zip(FUNCIONES, (greedy, greedy_memo, csp, validos, prediccion)))
+
+
+def correr(tamanios, densidad=1.5, profundidad=10, paridad=0.3, escenarios=3, max_cursos=(3, 6),
+           semilla=0, max_segundos_csp=10.0, limite_csp=2000, memoria=True, progreso=None):
+    """
+    Devuelve {"meta": ..., "resultados": [...]} con una fila por currículo,
+    escenario (aprobados al azar), max_cursos y función.
+    """
+    rng = random.Random(semilla)
+    resultados = []
+    for n in tamanios:
+        crudos = generar_curriculo(n, densidad, profundidad, paridad, semilla=semilla)
+        t0 = time.perf_counter()
+        cursos = indexar(crudos)
+        indexado = time.perf_counter() - t0
+        for e in range(escenarios):
+            aprobados = aprobados_aleatorios(cursos, rng.random() * 0.8, rng)
+            ciclo = rng.choice([1, 2])
+            historial = cursos.mascara(cursos.nombre_a_codigo[a] for a in aprobados)
+            for mc in max_cursos:
+                cota = cota_inferior(cursos, cursos.mascara_total & ~historial, ciclo, mc)[0]
+                for funcion, caso in casos(cursos, aprobados, ciclo, mc, max_segundos_csp, limite_csp).items():
+                    fila = {"cursos": n, "escenario": e, "aprobados": len(aprobados), "ciclo": ciclo,
+                            "max_cursos": mc, "funcion": funcion, "indexado": indexado,
+                            "cota_inferior": None if cota == INF else cota}
+                    fila.update(medir(caso, memoria))
+                    # Un plan incompleto (o cortado) usa menos semestres de los que harían falta
+                    if fila.get("completo") and fila["cota_inferior"] is not None:
+                        fila["brecha"] = fila["semestres"] - fila["cota_inferior"]
+                    resultados.append(fila)
+                    if progreso is not None:
+                        progreso(fila)
+    meta = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "parametros": {"tamanios": list(tamanios), "densidad": densidad, "profundidad": profundidad,
+                       "paridad": paridad, "escenarios": escenarios, "max_cursos": list(max_cursos),
+                       "semilla": semilla, "max_segundos_csp": max_segundos_csp, "limite_csp": limite_csp},
+    }
+    return {"meta": meta, "resultados": resultados}
+
+
+def comparar(base, nuevo, tolerancia=0.2):
+    """
+    Filas de `nuevo` que empeoran frente a `base` (misma clave de caso): más
+    de `tolerancia` de tiempo o de memoria extra, o más semestres.
+    """
+    def clave(fila):
+        return fila["cursos"], fila["escenario"], fila["max_cursos"], fila["funcion"]
+
+    anteriores = {clave(f): f for f in base["resultados"]}
+    regresiones = []
+    for fila in nuevo["resultados"]:
+        previa = anteriores.get(clave(fila))
+        if previa is None:
+            continue
+        motivos = []
+        for campo in ("segundos", "pico_kb"):
+            if previa.get(campo) and fila.get(campo, 0) > previa[campo] * (1 + tolerancia):
+                motivos.append(f"{campo} {previa[campo]:.4g} → {fila[campo]:.4g}")
+        if (fila.get("semestres") or 0) > (previa.get("semestres") or INF):
+            motivos.append(f"semestres {previa['semestres']} → {fila['semestres']}")
+        if motivos:
+            regresiones.append({"caso": clave(fila), "motivos": motivos})
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los planificadores")
+    parser.add_argument("--cursos", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--densidad", type=float, default=1.5)
+    parser.add_argument("--profundidad", type=int, default=10)
+    parser.add_argument("--paridad", type=float, default=0.3)
+    parser.add_argument("--escenarios", type=int, default=3)
+    parser.add_argument("--max-cursos", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--max-segundos-csp", type=float, default=10.0)
+    parser.add_argument("--limite-csp", type=int, default=2000,
+                        help="Cursos a partir de los cuales se omite el CSP")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico con tracemalloc")
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"),
+                        help="Compara dos JSON de resultados y lista las regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.comparar:
+        with open(args.comparar[0], encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.comparar[1], encoding="utf-8") as f:
+            nuevo = json.load(f)
+        regresiones = comparar(base, nuevo, args.tolerancia)
+        print(json.dumps(regresiones, ensure_ascii=False, indent=2))
+        sys.exit(1 if regresiones else 0)
+
+    def progreso(fila):
+        print(f"{fila['cursos']:>6} esc {fila['escenario']} mc {fila['max_cursos']} "
+              f"{fila['funcion']:<20} {fila['segundos']:.4f}s", file=sys.stderr, flush=True)
+
+    informe = correr(args.cursos, args.densidad, args.profundidad, args.paridad, args.escenarios,
+                     args.max_cursos, args.semilla, args.max_segundos_csp, args.limite_csp,
+                     not args.sin_memoria, progreso)
+    texto = json.dumps(informe, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from curriculo import indexar
+from simulador import simular_avance
+from utils import cursos_validos, predecir_graduacion
+
+
+class CachePlanes:
+    """
+    Caché LRU con vencimiento (ttl en segundos, None = no vence) para
+    resultados de los planificadores. Los valores se guardan como JSON, así
+    cada lectura devuelve objetos nuevos. Con `path` se persisten además en
+    SQLite, para que sesiones web y corridas por lotes compartan resultados;
+    cada PODAR_CADA escrituras se borran de la tabla las filas vencidas y las
+    más viejas que pasen de max_filas (por defecto, max_entradas).
+    """
+
+    PODAR_CADA = 32
+
+    def __init__(self, max_entradas=1024, ttl=3600, path=None, max_filas=None):
+        self.max_entradas = max_entradas
+        self.max_filas = max_entradas if max_filas is None else max_filas
+        self.ttl = ttl
+        self.path = path
+        self._escrituras = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._conexion = None
+        self._pid = None
+
+    def _db(self):
+        # Una conexión por proceso: no se comparte entre procesos hijos
+        if self.path is None:
+            return None
+        if self._conexion is None or self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS planes (clave TEXT PRIMARY KEY, valor TEXT, creado REAL)"
+            )
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS planes_creado ON planes (creado)")
+            self._pid = os.getpid()
+        return self._conexion
+
+    def _vigente(self, creado):
+        return self.ttl is None or time.time() - creado < self.ttl
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None and not self._vigente(entrada[1]):
+                del self._memoria[clave]
+                entrada = None
+            if entrada is None and self.path is not None:
+                fila = self._db().execute(
+                    "SELECT valor, creado FROM planes WHERE clave = ?", (clave,)
+                ).fetchone()
+                if fila is not None and self._vigente(fila[1]):
+                    entrada = fila
+                    self._guardar_en_memoria(clave, entrada)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._memoria.move_to_end(clave)
+            self.aciertos += 1
+            return json.loads(entrada[0])
+
+    def guardar(self, clave, valor):
+        entrada = (json.dumps(valor, ensure_ascii=False), time.time())
+        with self._lock:
+            self._guardar_en_memoria(clave, entrada)
+            if self.path is not None:
+                db = self._db()
+                db.execute("INSERT OR REPLACE INTO planes VALUES (?, ?, ?)", (clave,) + entrada)
+                self._escrituras += 1
+                if self._escrituras % self.PODAR_CADA == 0:
+                    self._podar(db)
+                db.commit()
+
+    def _podar(self, db):
+        # Otros procesos escriben en la misma tabla: se poda por antigüedad
+        if self.ttl is not None:
+            db.execute("DELETE FROM planes WHERE creado < ?", (time.time() - self.ttl,))
+        db.execute(
+            "DELETE FROM planes WHERE clave IN "
+            "(SELECT clave FROM planes ORDER BY creado DESC LIMIT -1 OFFSET ?)", (self.max_filas,)
+        )
+
+    def _guardar_en_memoria(self, clave, entrada):
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+            if self.path is not None:
+                self._db().execute("DELETE FROM planes")
+                self._db().commit()
+
+    def estadisticas(self):
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self._memoria)}
+
+
+_cache_por_defecto = None
+
+
+def cache_por_defecto():
+    """
+    Caché compartido del proceso. Si está definida la variable de entorno
+    PLANES_CACHE_DB, se persiste en ese archivo SQLite.
+    """
+    global _cache_por_defecto
+    if _cache_por_defecto is None:
+        _cache_por_defecto = CachePlanes(path=os.environ.get("PLANES_CACHE_DB"))
+    return _cache_por_defecto
+
+
+def clave_estado(cursos, funcion, aprobados_nombres, por_aprobar=None, **parametros):
+    """
+    Clave canónica: función + versión del currículo + bitset de aprobados +
+    parámetros. El orden o los duplicados en las listas de nombres no cambian
+    la clave.
+    """
+    cursos = indexar(cursos)
+    nombre_a_codigo = cursos.nombre_a_codigo
+    historial = cursos.mascara(nombre_a_codigo.get(n) for n in aprobados_nombres)
+    if por_aprobar:
+        historial |= cursos.mascara(nombre_a_codigo.get(n) for n in por_aprobar)
+    partes = [funcion, cursos.version, format(historial, "x")]
+    partes += [f"{k}={parametros[k]}" for k in sorted(parametros)]
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def _prioridad(prioridad):
+    # La prioridad por defecto no entra en la clave: así siguen valiendo las
+    # entradas guardadas antes de que existiera el parámetro
+    return {"prioridad": prioridad} if prioridad else {}
+
+
+def simular_avance_cacheado(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year,
+                            por_aprobar=None, cache=None, max_creditos=None, prioridad=None):
+    """
+    simular_avance con caché. El plan se guarda con años relativos, de modo
+    que el mismo resultado sirve para cualquier start_year. Iteraciones y
+    nodos son el trabajo de esta llamada: 0 si el plan salió del caché.
+    """
+    cache = cache or cache_por_defecto()
+    clave = clave_estado(cursos, "simular_avance", aprobados_nombres, por_aprobar,
+                         ciclo=ciclo_actual, max_cursos=max_cursos, max_creditos=max_creditos,
+                         **_prioridad(prioridad))
+    valor = cache.obtener(clave)
+    if valor is None:
+        plan, iteraciones, nodos = simular_avance(
+            cursos, aprobados_nombres, ciclo_actual, max_cursos, 0, por_aprobar, max_creditos=max_creditos,
+            prioridad=prioridad,
+        )
+        cache.guardar(clave, [plan, iteraciones, nodos])
+    else:
+        plan, iteraciones, nodos = valor[0], 0, 0
+    for etapa in plan:
+        etapa["año"] += start_year
+    return plan, iteraciones, nodos
+
+
+def cursos_validos_cacheado(cursos, aprobados_nombres, ciclo_actual, max_cursos,
+                            por_aprobar=None, cache=None, max_creditos=None, prioridad=None):
+    cache = cache or cache_por_defecto()
+    clave = clave_estado(cursos, "cursos_validos", aprobados_nombres, por_aprobar,
+                         ciclo=ciclo_actual, max_cursos=max_cursos, max_creditos=max_creditos,
+                         **_prioridad(prioridad))
+    valor = cache.obtener(clave)
+    if valor is None:
+        valor = cursos_validos(cursos, aprobados_nombres, ciclo_actual, max_cursos, por_aprobar, max_creditos,
+                               prioridad)
+        cache.guardar(clave, valor)
+    return valor
+
+
+def predecir_graduacion_cacheado(cursos, aprobados_nombres, ciclo_actual, max_cursos, cache=None,
+                                 max_creditos=None, start_year=2023):
+    cache = cache or cache_por_defecto()
+    clave = clave_estado(cursos, "predecir_graduacion", aprobados_nombres,
+                         ciclo=ciclo_actual, max_cursos=max_cursos, max_creditos=max_creditos,
+                         start_year=start_year)
+    valor = cache.obtener(clave)
+    if valor is None:
+        # None también es un resultado válido (no se gradúa en 12 ciclos)
+        valor = [predecir_graduacion(cursos, aprobados_nombres, ciclo_actual, max_cursos, max_creditos,
+                                     start_year)]
+        cache.guardar(clave, valor)
+    return valor[0]
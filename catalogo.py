@@ -0,0 +1,192 @@
+"""
+Catálogo de varias carreras que comparten cursos.
+
+Un catálogo es un JSON con la lista de programas; las rutas son relativas al
+archivo del catálogo y "plan_ideal" es opcional:
+
+    {"programas": {
+        "computacion": {"cursos": "cursos.json", "plan_ideal": "plan_ideal.json"},
+        "matematica":  {"cursos": "matematica/cursos.json"}
+    }}
+
+Los registros de cursos idénticos entre programas (los CU* de formación
+general, por ejemplo) se guardan una sola vez, igual que las listas de
+prerrequisitos repetidas; cada programa es una tupla de esos registros
+compartidos. El Curriculo de un programa o de una combinación (doble
+titulación) se arma recién cuando se pide y queda cacheado por combinación:
+
+    catalogo = cargar_catalogo("catalogo.json")
+    cursos = catalogo.curriculo("computacion", "matematica")
+    plan, _, _ = simular_avance(cursos, aprobados, 1, 5, 2025)
+
+Si un código aparece con datos distintos en dos programas de la combinación
+(otro año u otros prerrequisitos), manda el registro del primer programa.
+"""
+import json
+import os
+import threading
+
+from curriculo import Curriculo
+from utils import cargar_cursos, leer_cursos
+
+
+class Catalogo:
+    """
+    Programas {nombre: cursos} con registros compartidos y Curriculos
+    cacheados por combinación de programas.
+    """
+
+    def __init__(self, programas, planes_ideales=None):
+        self._registros = {}
+        self._requisitos = {}
+        self.programas = {
+            nombre: tuple(self._compartido(c) for c in cursos)
+            for nombre, cursos in programas.items()
+        }
+        self.planes_ideales = dict(planes_ideales or {})
+        self._curriculos = {}
+        self._lock = threading.Lock()
+
+    def _compartido(self, curso):
+        # Un solo dict por registro distinto (y una sola lista por conjunto
+        # de prerrequisitos): los programas que comparten cursos apuntan al mismo
+        clave = json.dumps(curso, sort_keys=True, ensure_ascii=False)
+        registro = self._registros.get(clave)
+        if registro is None:
+            registro = dict(curso)
+            reqs = tuple(registro["requisitos"])
+            registro["requisitos"] = self._requisitos.setdefault(reqs, list(reqs))
+            self._registros[clave] = registro
+        return registro
+
+    def __contains__(self, nombre):
+        return nombre in self.programas
+
+    def _combinacion(self, nombres):
+        nombres = tuple(dict.fromkeys(nombres))
+        if not nombres:
+            raise ValueError("Hay que indicar al menos un programa")
+        for nombre in nombres:
+            if nombre not in self.programas:
+                raise ValueError(f"Programa desconocido: {nombre}")
+        return nombres
+
+    def curriculo(self, *nombres):
+        """
+        Curriculo de un programa o de la unión de varios (en ese orden: los
+        cursos del primero y luego los que agrega cada uno de los demás).
+        """
+        nombres = self._combinacion(nombres)
+        cursos = self._curriculos.get(nombres)
+        if cursos is not None:
+            return cursos
+        with self._lock:
+            cursos = self._curriculos.get(nombres)
+            if cursos is None:
+                union = {}
+                for nombre in nombres:
+                    for c in self.programas[nombre]:
+                        union.setdefault(c["codigo"], c)
+                cursos = Curriculo(union.values())
+                self._curriculos[nombres] = cursos
+        return cursos
+
+    def plan_ideal(self, *nombres):
+        """
+        Plan ideal de la combinación: los semestres de cada programa unidos
+        por (anio, semestre), sin repetir cursos. None si ninguno lo trae.
+        """
+        nombres = self._combinacion(nombres)
+        planes = [self.planes_ideales[n] for n in nombres if self.planes_ideales.get(n)]
+        if not planes:
+            return None
+        if len(planes) == 1:
+            return planes[0]
+        etapas, vistos = {}, set()
+        for plan in planes:
+            for etapa in plan:
+                nuevos = [cod for cod in etapa["cursos"] if cod not in vistos]
+                vistos.update(nuevos)
+                clave = (etapa["anio"], etapa["semestre"])
+                etapas.setdefault(clave, {"anio": etapa["anio"], "semestre": etapa["semestre"], "cursos": []})
+                etapas[clave]["cursos"].extend(nuevos)
+        return [etapas[clave] for clave in sorted(etapas)]
+
+    def conflictos(self, *nombres):
+        """
+        Códigos con registros distintos entre los programas de la combinación
+        (todos los programas si no se indica ninguno): {codigo: [programas]}.
+        """
+        nombres = self._combinacion(nombres) if nombres else tuple(self.programas)
+        registros = {}
+        for nombre in nombres:
+            for c in self.programas[nombre]:
+                registros.setdefault(c["codigo"], {}).setdefault(id(c), []).append(nombre)
+        return {
+            cod: [n for progs in variantes.values() for n in progs]
+            for cod, variantes in registros.items() if len(variantes) > 1
+        }
+
+    def estadisticas(self):
+        return {
+            "programas": len(self.programas),
+            "registros": sum(len(cursos) for cursos in self.programas.values()),
+            "registros_unicos": len(self._registros),
+            "combinaciones_cacheadas": len(self._curriculos),
+        }
+
+
+def es_catalogo(path):
+    # Un catálogo es un objeto JSON con "programas"; un currículo es una lista
+    try:
+        with open(path, "rb") as f:
+            inicio = f.read(64).lstrip()
+    except OSError:
+        return False
+    if not inicio.startswith(b"{"):
+        return False
+    with open(path, encoding="utf-8") as f:
+        return "programas" in json.load(f)
+
+
+def cargar_catalogo(path):
+    with open(path, encoding="utf-8") as f:
+        definicion = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    programas, planes = {}, {}
+    for nombre, rutas in definicion["programas"].items():
+        programas[nombre] = leer_cursos(os.path.join(base, rutas["cursos"]))
+        if rutas.get("plan_ideal"):
+            with open(os.path.join(base, rutas["plan_ideal"]), encoding="utf-8") as f:
+                planes[nombre] = json.load(f)
+    return Catalogo(programas, planes)
+
+
+def cargar_planificable(path):
+    """
+    Catalogo si `path` es un catálogo, o el Curriculo de cargar_cursos.
+    """
+    return cargar_catalogo(path) if es_catalogo(path) else cargar_cursos(path)
+
+
+def curriculo_de(cursos, programa=None):
+    """
+    Curriculo que corresponde a `programa` (un nombre, una lista de nombres o
+    None) dentro de lo que devolvió cargar_planificable.
+    """
+    if isinstance(cursos, Catalogo):
+        if not programa:
+            raise ValueError("Falta el programa: se cargó un catálogo de carreras")
+        return cursos.curriculo(*([programa] if isinstance(programa, str) else programa))
+    if programa:
+        raise ValueError("No hay catálogo de carreras cargado: no se puede elegir programa")
+    return cursos
+
+
+def plan_ideal_de(cursos, programa=None):
+    """
+    Plan ideal de `programa` si `cursos` es un Catalogo; si no, None.
+    """
+    if isinstance(cursos, Catalogo) and programa:
+        return cursos.plan_ideal(*([programa] if isinstance(programa, str) else programa))
+    return None
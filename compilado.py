@@ -0,0 +1,330 @@
+"""
+Currículo compilado: validación y formato binario de carga rápida.
+
+compilar() revisa el currículo (códigos repetidos, prerrequisitos que no
+existen, ciclos de prerrequisitos, cursos que no se ofrecen en ningún ciclo y
+los que quedan bloqueados por ellos y, con un horizonte, cadenas de paridad
+que no caben en él) y escribe un archivo con arreglos de enteros de 32 bits:
+
+  - una tabla de textos (código y nombre de cada curso, separados por NUL);
+  - año, ciclo, semestres de apertura (como bits) y créditos por curso;
+  - prerrequisitos en formato CSR (inicio por curso + posiciones);
+  - el orden topológico, los descendientes y la versión ya calculados.
+
+cargar_compilado() lo abre con mmap y lee cada arreglo de una vez, sin
+parsear JSON por curso; el Curriculo resultante trae orden_topologico, descendientes y
+version precalculados, que son lo más caro de indexar un currículo grande.
+Es un formato de carga rápida, no de memoria compartida: el mapa se cierra al
+terminar de leer y cada proceso arma su propia copia del Curriculo.
+cargar_cursos() reconoce el archivo por su encabezado, así que main, lote y
+servicio lo aceptan en lugar de cursos.json.
+
+    python compilado.py cursos.json cursos.bin
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from curriculo import indexar
+
+MAGICO = b"CURB"
+FORMATO = 1
+# Mágico, formato, largo del directorio (JSON con las secciones), que queda
+# relleno para que los datos empiecen alineados a 8 bytes
+ENCABEZADO = struct.Struct("<4sII")
+AUSENTE = -1
+INT32 = (-2 ** 31, 2 ** 31 - 1)
+CAMPOS = ("codigo", "nombre", "ciclo", "requisitos", "anio", "semestre", "creditos")
+
+
+class ErrorCurriculo(ValueError):
+    """
+    El currículo tiene problemas que impiden planificar. `problemas` es la
+    lista de validar_curriculo.
+    """
+
+    def __init__(self, problemas):
+        self.problemas = problemas
+        detalle = "; ".join(f"{p['codigo']}: {p['detalle']}" for p in problemas[:5])
+        if len(problemas) > 5:
+            detalle += f" (y {len(problemas) - 5} más)"
+        super().__init__(f"Currículo inválido: {detalle}")
+
+
+def _problema(tipo, codigo, detalle):
+    return {"tipo": tipo, "codigo": codigo, "detalle": detalle}
+
+
+def validar_curriculo(cursos, max_semestres=None):
+    """
+    Lista de problemas del currículo, cada uno {"tipo", "codigo", "detalle"}:
+      - codigo_repetido: dos cursos con el mismo código;
+      - texto_invalido: código o nombre vacío o con caracteres NUL;
+      - requisito_inexistente: un prerrequisito que no está en el currículo;
+      - sin_apertura: el curso no se ofrece en el ciclo 1 ni en el 2;
+      - ciclo: el curso está en un ciclo de prerrequisitos o depende de uno;
+      - bloqueado: depende de un curso que nunca se puede aprobar;
+      - paridad: con `max_semestres`, la cadena de prerrequisitos del curso,
+        con cada eslabón en un ciclo en que se abre, no cabe en ese número de
+        semestres empezando en alguno de los dos ciclos.
+    Sin horizonte una cadena de paridad no puede ser imposible: los ciclos se
+    alternan, así que un curso que se abre en alguno termina por alcanzarse.
+    Una lista vacía quiere decir que el currículo se puede planificar.
+    """
+    problemas = []
+    vistos = set()
+    for c in cursos:
+        for campo in ("codigo", "nombre"):
+            valor = c.get(campo)
+            if not isinstance(valor, str) or not valor or "\0" in valor:
+                problemas.append(_problema("texto_invalido", c.get("codigo"), f"{campo} inválido: {valor!r}"))
+        if c.get("codigo") in vistos:
+            problemas.append(_problema("codigo_repetido", c["codigo"], "código repetido"))
+        vistos.add(c.get("codigo"))
+
+    cursos = indexar(cursos)
+    imposibles = 0
+    for i, c in enumerate(cursos):
+        for pr in c.get("requisitos", []):
+            if pr not in cursos.indice:
+                problemas.append(_problema("requisito_inexistente", c["codigo"], f"requisito {pr} no existe"))
+                imposibles |= 1 << i
+        if not set(c.get("semestre", [])) & {1, 2}:
+            problemas.append(_problema("sin_apertura", c["codigo"],
+                                       f"no se ofrece en ningún ciclo (semestre {c.get('semestre')})"))
+            imposibles |= 1 << i
+
+    en_orden = cursos.mascara_total
+    for i in cursos.orden_topologico:
+        en_orden &= ~(1 << i)
+    for i in cursos.posiciones(en_orden):
+        problemas.append(_problema("ciclo", cursos.codigos[i],
+                                   "está en un ciclo de prerrequisitos o depende de uno"))
+
+    # Bloqueados: cierre de `imposibles` hacia los dependientes
+    bloqueados = 0
+    for i in cursos.orden_topologico:
+        if (cursos.mascara_req[i] & (imposibles | bloqueados)) and not imposibles >> i & 1:
+            bloqueados |= 1 << i
+    for i in cursos.posiciones(bloqueados):
+        causas = [cursos.codigos[r] for r in cursos.requisitos[i] if (imposibles | bloqueados) >> r & 1]
+        problemas.append(_problema("bloqueado", cursos.codigos[i],
+                                   f"depende de cursos que no se pueden aprobar: {', '.join(causas)}"))
+
+    if max_semestres is not None:
+        tempranos = {ciclo: cursos.semestres_tempranos(ciclo) for ciclo in (1, 2)}
+        for i in range(len(cursos)):
+            for ciclo, t in tempranos.items():
+                if t[i] is not None and t[i] > max_semestres:
+                    problemas.append(_problema(
+                        "paridad", cursos.codigos[i],
+                        f"empezando en el ciclo {ciclo} no se puede llevar antes del semestre {t[i]}"
+                        f" (máximo {max_semestres})"))
+                    break
+    return problemas
+
+
+def _entero(valor):
+    # El valor entra en un int32 del formato (los bool quedan como extras)
+    return type(valor) is int and INT32[0] < valor <= INT32[1]
+
+
+def _semestres_en_bits(semestre):
+    # Bits de los semestres de apertura, o None si no caben en 31 bits
+    if not isinstance(semestre, list) or not all(_entero(s) and 0 <= s < 31 for s in semestre):
+        return None
+    if len(set(semestre)) < len(semestre) or semestre != sorted(semestre):
+        return None
+    bits = 0
+    for s in semestre:
+        bits |= 1 << s
+    return bits
+
+
+def compilar(cursos, destino, forzar=False, max_semestres=None):
+    """
+    Valida `cursos` (con `max_semestres` como en validar_curriculo) y escribe
+    el formato compilado en `destino`. Lanza ErrorCurriculo si hay problemas,
+    salvo con `forzar` (entonces se escriben igual y quedan registrados en el
+    archivo). Devuelve la lista de problemas.
+    """
+    problemas = validar_curriculo(cursos, max_semestres)
+    if problemas and not forzar:
+        raise ErrorCurriculo(problemas)
+    if any(p["tipo"] in ("codigo_repetido", "texto_invalido") for p in problemas):
+        # Sin códigos únicos ni textos sin NUL el formato no se puede leer
+        raise ErrorCurriculo([p for p in problemas if p["tipo"] in ("codigo_repetido", "texto_invalido")])
+    cursos = indexar(cursos)
+
+    anio, ciclo, semestre, creditos = (array("i") for _ in range(4))
+    req_inicio, req_pos = array("i", [0]), array("i")
+    extras = {}
+    for i, c in enumerate(cursos):
+        extra = {k: v for k, v in c.items() if k not in CAMPOS}
+        # Los valores que no entran en el arreglo (negativos, otros tipos,
+        # semestres vacíos) van a los extras y el arreglo queda en AUSENTE
+        for campo, arreglo in (("anio", anio), ("ciclo", ciclo), ("creditos", creditos)):
+            if campo in c and _entero(c[campo]) and c[campo] >= 0:
+                arreglo.append(c[campo])
+            else:
+                arreglo.append(AUSENTE)
+                if campo in c:
+                    extra[campo] = c[campo]
+        bits = _semestres_en_bits(c["semestre"]) if "semestre" in c else None
+        semestre.append(bits or AUSENTE)
+        if "semestre" in c and not bits:
+            extra["semestre"] = c["semestre"]
+        # Los prerrequisitos se guardan por posición; si la lista original no
+        # se puede reconstruir así (inexistentes o repetidos) va a los extras
+        reqs = cursos.requisitos[i]
+        if [cursos.codigos[r] for r in reqs] != c["requisitos"]:
+            extra["requisitos"] = c["requisitos"]
+        req_pos.extend(reqs)
+        req_inicio.append(len(req_pos))
+        if extra:
+            extras[i] = extra
+
+    textos = "\0".join(t for c in cursos for t in (c["codigo"], c["nombre"])).encode("utf-8")
+    secciones = {
+        "textos": textos,
+        "anio": anio,
+        "ciclo": ciclo,
+        "semestre": semestre,
+        "creditos": creditos,
+        "req_inicio": req_inicio,
+        "req_pos": req_pos,
+        "orden_topologico": array("i", cursos.orden_topologico),
+        "descendientes": array("i", cursos.descendientes),
+        "extras": json.dumps({str(i): e for i, e in extras.items()}, ensure_ascii=False).encode("utf-8"),
+    }
+    directorio = {
+        "n": len(cursos),
+        "version": cursos.version,
+        "problemas": problemas,
+        "secciones": {},
+    }
+    # Desplazamientos relativos al fin del directorio; las secciones van
+    # alineadas a 8 bytes para leerlas como int32 directamente desde el mmap
+    datos = []
+    desplazamiento = 0
+    for nombre, contenido in secciones.items():
+        if isinstance(contenido, array):
+            if sys.byteorder != "little":
+                contenido = array("i", contenido)
+                contenido.byteswap()
+            contenido = contenido.tobytes()
+        relleno = -desplazamiento % 8
+        datos.append(b"\0" * relleno + contenido)
+        desplazamiento += relleno
+        directorio["secciones"][nombre] = [desplazamiento, len(contenido)]
+        desplazamiento += len(contenido)
+
+    cabecera = json.dumps(directorio, ensure_ascii=False).encode("utf-8")
+    cabecera += b" " * (-(ENCABEZADO.size + len(cabecera)) % 8)
+    with open(destino, "wb") as f:
+        f.write(ENCABEZADO.pack(MAGICO, FORMATO, len(cabecera)))
+        f.write(cabecera)
+        for bloque in datos:
+            f.write(bloque)
+    return problemas
+
+
+def es_compilado(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGICO)) == MAGICO
+    except OSError:
+        return False
+
+
+def cargar_compilado(path):
+    """
+    Curriculo desde un archivo escrito por compilar(), con orden_topologico,
+    descendientes y version ya calculados.
+    """
+    with open(path, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magico, formato, largo = ENCABEZADO.unpack_from(mapa, 0)
+        if magico != MAGICO:
+            raise ValueError(f"{path} no es un currículo compilado")
+        if formato != FORMATO:
+            raise ValueError(f"Formato compilado {formato} no soportado (se esperaba {FORMATO})")
+        directorio = json.loads(mapa[ENCABEZADO.size:ENCABEZADO.size + largo])
+        n = directorio["n"]
+        base = ENCABEZADO.size + largo
+        secciones = {nombre: (base + d, t) for nombre, (d, t) in directorio["secciones"].items()}
+
+        def enteros(nombre):
+            inicio, tamanio = secciones[nombre]
+            if sys.byteorder != "little":
+                arreglo = array("i", mapa[inicio:inicio + tamanio])
+                arreglo.byteswap()
+                return arreglo.tolist()
+            with memoryview(mapa) as vista, vista[inicio:inicio + tamanio] as trozo, trozo.cast("i") as valores:
+                return valores.tolist()
+
+        def bytes_de(nombre):
+            inicio, tamanio = secciones[nombre]
+            return mapa[inicio:inicio + tamanio]
+
+        textos = bytes_de("textos").decode("utf-8").split("\0") if n else []
+        anio, ciclo, semestre, creditos = (enteros(s) for s in ("anio", "ciclo", "semestre", "creditos"))
+        req_inicio, req_pos = enteros("req_inicio"), enteros("req_pos")
+        orden, descendientes = enteros("orden_topologico"), enteros("descendientes")
+        extras = {int(i): e for i, e in json.loads(bytes_de("extras")).items()}
+    finally:
+        mapa.close()
+
+    codigos = textos[0::2]
+    cursos = []
+    for i in range(n):
+        curso = {
+            "codigo": codigos[i],
+            "nombre": textos[2 * i + 1],
+            "ciclo": ciclo[i],
+            "requisitos": [codigos[r] for r in req_pos[req_inicio[i]:req_inicio[i + 1]]],
+            "anio": anio[i],
+            "semestre": semestre[i],
+            "creditos": creditos[i],
+        }
+        if curso["semestre"] != AUSENTE:
+            bits = curso["semestre"]
+            curso["semestre"] = [s for s in range(bits.bit_length()) if bits >> s & 1]
+        for campo in ("ciclo", "anio", "semestre", "creditos"):
+            if curso[campo] == AUSENTE:
+                del curso[campo]
+        extra = extras.get(i)
+        if extra:
+            curso.update(extra)
+        cursos.append(curso)
+
+    curriculo = indexar(cursos)
+    # Índices derivados guardados al compilar (cached_property lee __dict__)
+    curriculo.__dict__.update(orden_topologico=orden, descendientes=descendientes,
+                              version=directorio["version"])
+    return curriculo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida y compila un currículo")
+    parser.add_argument("origen", help="JSON del currículo (como cursos.json)")
+    parser.add_argument("destino", nargs="?", help="Archivo compilado; sin él solo se valida")
+    parser.add_argument("--forzar", action="store_true", help="Compilar aunque haya problemas")
+    parser.add_argument("--max-semestres", type=int,
+                        help="Horizonte para revisar las cadenas de paridad")
+    args = parser.parse_args()
+
+    from utils import cargar_cursos
+
+    cursos = cargar_cursos(args.origen)
+    problemas = validar_curriculo(cursos, args.max_semestres)
+    for p in problemas:
+        print(f"{p['tipo']:<22} {p['codigo']}: {p['detalle']}", file=sys.stderr)
+    if args.destino and (args.forzar or not problemas):
+        compilar(cursos, args.destino, forzar=args.forzar, max_semestres=args.max_semestres)
+        print(f"{len(cursos)} cursos → {args.destino}", file=sys.stderr)
+    sys.exit(1 if problemas and not args.forzar else 0)
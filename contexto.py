@@ -0,0 +1,97 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class BusquedaCancelada(Exception):
+    """
+    La búsqueda se cortó antes de terminar (detener() devolvió True).
+    """
+
+
+class PresupuestoAgotado(BusquedaCancelada):
+    """
+    Se agotó el presupuesto de nodos o de tiempo del contexto.
+    """
+
+
+class LimiteIntento(BusquedaCancelada):
+    """
+    Se alcanzó el límite de nodos de un intento (reinicios aleatorios).
+    """
+
+
+class ContextoBusqueda:
+    """
+    Estado de una corrida de los planificadores: contadores, tiempos por fase,
+    histograma de profundidad, podas por motivo y un presupuesto opcional.
+    Cada llamada usa su propio contexto, así que sesiones o hilos distintos no
+    se pisan las métricas.
+
+      - max_nodos / max_segundos: al superarlos, nodo() lanza PresupuestoAgotado.
+      - detener: función sin argumentos; si devuelve True, nodo() lanza
+        BusquedaCancelada (se consulta cada `cada` nodos).
+    """
+
+    def __init__(self, max_nodos=None, max_segundos=None, detener=None, cada=256):
+        self.max_nodos = max_nodos
+        self.max_segundos = max_segundos
+        self.detener = detener
+        self.cada = cada
+        self.tope_intento = None
+        self.motor = None
+        self.nodos = 0
+        self.backtracks = 0
+        self.iteraciones = 0
+        self.profundidades = Counter()
+        self.podas = Counter()
+        self.tiempos = Counter()
+        self.inicio = time.perf_counter()
+
+    def nodo(self, profundidad=0):
+        """
+        Registra un nodo expandido y verifica el presupuesto.
+        """
+        self.nodos += 1
+        self.profundidades[profundidad] += 1
+        if self.max_nodos is not None and self.nodos > self.max_nodos:
+            raise PresupuestoAgotado()
+        if self.tope_intento is not None and self.nodos >= self.tope_intento:
+            raise LimiteIntento()
+        if self.nodos % self.cada == 0:
+            if self.max_segundos is not None and self.transcurrido() > self.max_segundos:
+                raise PresupuestoAgotado()
+            if self.detener is not None and self.detener():
+                raise BusquedaCancelada()
+
+    def podar(self, motivo, cantidad=1):
+        self.podas[motivo] += cantidad
+
+    @contextmanager
+    def cronometro(self, fase):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[fase] += time.perf_counter() - t0
+
+    def transcurrido(self):
+        return time.perf_counter() - self.inicio
+
+    def restante(self):
+        # Segundos que quedan del presupuesto, o None si no hay límite
+        if self.max_segundos is None:
+            return None
+        return max(0.0, self.max_segundos - self.transcurrido())
+
+    def resumen(self):
+        return {
+            "nodos": self.nodos,
+            "backtracks": self.backtracks,
+            "iteraciones": self.iteraciones,
+            "motor": self.motor,
+            "segundos": self.transcurrido(),
+            "tiempos": dict(self.tiempos),
+            "profundidades": dict(sorted(self.profundidades.items())),
+            "podas": dict(self.podas),
+        }
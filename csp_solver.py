@@ -1,108 +1,1017 @@
 
-from collections import defaultdict
-
-contador_backtracks = 0
-contador_nodos = 0
+import multiprocessing
+import queue
+import random
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contexto import BusquedaCancelada, ContextoBusqueda, LimiteIntento
+from curriculo import indexar
 
 def heuristica_completa(codigo, cursos, historial):
-    curso = next(c for c in cursos if c["codigo"] == codigo)
-    dependencias = sum(1 for c in cursos if codigo in c["requisitos"])
     # Penalizar cursos de años mayores si hay pendientes de años menores
-    años_pendientes = [c["anio"] for c in cursos if c["codigo"] not in historial]
-    min_anio_pendiente = min(años_pendientes) if años_pendientes else curso["anio"]
-    penalizacion = (curso["anio"] - min_anio_pendiente) * 10
-    sem_val = curso["semestre"][0] if isinstance(curso.get("semestre"), list) else curso.get("semestre")
-    return (penalizacion, sem_val, -dependencias)
+    return indexar(cursos).heuristica.prioridad(codigo, historial)
 
 def ordenar_por_prioridad(codigos, cursos, historial):
-    return sorted(codigos, key=lambda x: heuristica_completa(x, cursos, historial))
+    return indexar(cursos).heuristica.ordenar(codigos, historial)
 
 def requisitos_cumplidos(curso, asignaciones, ciclo):
     return all(pr in asignaciones and asignaciones[pr] < ciclo for pr in curso["requisitos"])
 
-def forward_checking(curso_codigo, cursos, asignaciones, ciclo_actual, max_cursos, total_ciclos):
-    for c in cursos:
-        if c["codigo"] not in asignaciones:
-            if not requisitos_cumplidos(c, {**asignaciones, curso_codigo: ciclo_actual}, ciclo_actual):
+def paridad(semestre, ciclo_inicial):
+    """
+    Ciclo (1 o 2) en que cae el semestre absoluto `semestre`; el semestre 1
+    corresponde a `ciclo_inicial` y a partir de ahí se alternan.
+    """
+    return ciclo_inicial if semestre % 2 == 1 else 3 - ciclo_inicial
+
+def construir_dominios(cursos, pendientes, ciclo_inicial, max_cursos, total_ciclos, max_creditos=None):
+    """
+    Dominio de cada curso pendiente: los semestres absolutos 1..total_ciclos en
+    que se ofrece. Se acota por abajo con la cadena de prerrequisitos pendientes
+    (camino más largo) y con los semestres que necesitan sus ancestros a
+    max_cursos (y max_creditos) por ciclo; por arriba, igual con sus dependientes.
+    Un curso dentro de un ciclo de prerrequisitos, o con más créditos que
+    max_creditos, queda con dominio vacío.
+    """
+    cursos = indexar(cursos)
+    pend_mask = cursos.mascara(pendientes)
+    orden = [i for i in cursos.orden_topologico if pend_mask >> i & 1]
+
+    def ofrece(i, t):
+        return paridad(t, ciclo_inicial) in cursos[i]["semestre"]
+
+    def semestres_para(mascara):
+        # Semestres que hacen falta para llevar los cursos de `mascara`
+        n = -(-bin(mascara).count("1") // max_cursos)
+        if max_creditos:
+            n = max(n, -(-cursos.creditos_de(mascara) // max_creditos))
+        return n
+
+    temprano, ancestros = {}, {}
+    for i in orden:
+        lo, anc = 1, 0
+        for r in cursos.requisitos[i]:
+            if r in temprano:
+                lo = max(lo, temprano[r] + 1)
+                anc |= ancestros[r] | (1 << r)
+        lo = max(lo, semestres_para(anc) + 1)
+        while lo <= total_ciclos and not ofrece(i, lo):
+            lo += 1
+        temprano[i], ancestros[i] = lo, anc
+
+    tardio, descendientes = {}, {}
+    for i in reversed(orden):
+        hi, desc = total_ciclos, 0
+        for d in cursos.dependientes[i]:
+            if d in tardio:
+                hi = min(hi, tardio[d] - 1)
+                desc |= descendientes[d] | (1 << d)
+        hi = min(hi, total_ciclos - semestres_para(desc))
+        while hi >= 1 and not ofrece(i, hi):
+            hi -= 1
+        tardio[i], descendientes[i] = hi, desc
+
+    dominio = {cod: [] for cod in pendientes}
+    for i in orden:
+        # Prerrequisito inexistente en el currículo: nunca se puede llevar
+        if cursos.mascara_req[i] >> len(cursos):
+            continue
+        if max_creditos is not None and cursos.creditos[i] > max_creditos:
+            continue
+        dominio[cursos.codigos[i]] = [
+            t for t in range(temprano[i], tardio[i] + 1) if ofrece(i, t)
+        ]
+    return dominio
+
+def asignacion_por_listas(cursos, aprobados_codigos, ciclo_inicial, max_cursos, objetivo=None,
+                          max_creditos=None, prioridad=None):
+    """
+    Planificación por listas: cada semestre toma hasta max_cursos cursos
+    disponibles (los de más descendientes primero, o en el orden de
+    rango_critico con prioridad="critica", sin pasar de max_creditos),
+    aunque alguno quede vacío. `objetivo` (bitset) limita los cursos a
+    planificar; por defecto, todos.
+    Devuelve {codigo: semestre absoluto} o None si hay cursos que nunca se
+    pueden llevar.
+    """
+    cursos = indexar(cursos)
+    rangos = cursos.rangos(prioridad)
+    historial = cursos.mascara(aprobados_codigos)
+    if objetivo is None:
+        objetivo = cursos.mascara_total
+    asignacion = {}
+    semestres, vacios = 0, 0
+    while objetivo & ~historial:
+        semestres += 1
+        elegibles = cursos.posiciones(
+            cursos.elegibles(historial, paridad(semestres, ciclo_inicial)) & objetivo)
+        if rangos is None:
+            elegibles.sort(key=lambda i: -cursos.descendientes[i])
+        else:
+            elegibles.sort(key=rangos[paridad(semestres, ciclo_inicial)].__getitem__)
+        seleccion = cursos.seleccionar(elegibles, max_cursos, max_creditos)
+        if not seleccion:
+            vacios += 1
+            if vacios == 2:
+                return None
+            continue
+        vacios = 0
+        for i in seleccion:
+            historial |= 1 << i
+            asignacion[cursos.codigos[i]] = semestres
+    return asignacion
+
+def horizonte_factible(cursos, aprobados_codigos, ciclo_inicial, max_cursos, max_creditos=None,
+                       prioridad=None):
+    """
+    Cota superior de semestres: los que usa asignacion_por_listas (con esa
+    prioridad).
+    """
+    asignacion = asignacion_por_listas(cursos, aprobados_codigos, ciclo_inicial, max_cursos,
+                                       max_creditos=max_creditos, prioridad=prioridad)
+    if asignacion is None:
+        return None
+    return max(asignacion.values(), default=0)
+
+def alcanzables(cursos, aprobados_codigos, max_creditos=None):
+    """
+    Bitset de los cursos pendientes que se pueden llegar a llevar: se ofrecen
+    en algún ciclo, caben en max_creditos, no están en un ciclo de
+    prerrequisitos ni dependen de un código inexistente, y lo mismo vale para
+    sus prerrequisitos pendientes.
+    """
+    cursos = indexar(cursos)
+    historial = cursos.mascara(aprobados_codigos)
+    posibles = historial
+    for i in cursos.orden_topologico:
+        if max_creditos is not None and cursos.creditos[i] > max_creditos and not historial >> i & 1:
+            continue
+        if cursos[i]["semestre"] and cursos.mascara_req[i] & ~posibles == 0:
+            posibles |= 1 << i
+    return posibles & ~historial
+
+class Carga:
+    """
+    Carga de cada semestre absoluto 1..total_ciclos: cursos y créditos
+    asignados, en listas indexadas por semestre (consultar o actualizar un
+    semestre es O(1)). Los topes son max_cursos y max_creditos (None = sin
+    tope de créditos); min_creditos se exige a todo semestre con cursos salvo
+    al último del plan.
+    """
+
+    def __init__(self, cursos, total_ciclos, max_cursos, max_creditos=None, min_creditos=None,
+                 asignaciones=None):
+        self.creditos_curso = cursos.creditos
+        self.credito_maximo = max(cursos.creditos, default=0)
+        self.max_cursos = max_cursos
+        self.max_creditos = max_creditos
+        self.min_creditos = min_creditos
+        self.cursos = [0] * (total_ciclos + 1)
+        self.creditos = [0] * (total_ciclos + 1)
+        for cod, t in (asignaciones or {}).items():
+            self.agregar(t, cursos.indice[cod])
+
+    def cabe(self, t, i):
+        if self.cursos[t] >= self.max_cursos:
+            return False
+        return self.max_creditos is None or self.creditos[t] + self.creditos_curso[i] <= self.max_creditos
+
+    def agregar(self, t, i):
+        self.cursos[t] += 1
+        self.creditos[t] += self.creditos_curso[i]
+
+    def quitar(self, t, i):
+        self.cursos[t] -= 1
+        self.creditos[t] -= self.creditos_curso[i]
+
+    def holgura(self, t):
+        """
+        Créditos que todavía caben en t: -1 si ya no cabe ningún curso y None
+        si cabe cualquiera.
+        """
+        if self.cursos[t] >= self.max_cursos:
+            return -1
+        if self.max_creditos is None:
+            return None
+        holgura = self.max_creditos - self.creditos[t]
+        return holgura if holgura < self.credito_maximo else None
+
+    def minimo_alcanzable(self, cursos, dominio, asignaciones):
+        """
+        False si algún semestre con cursos, anterior al último usado, ya no
+        puede llegar a min_creditos ni con todos los cursos sin asignar que
+        aún pueden ir en él.
+        """
+        if not self.min_creditos or not asignaciones:
+            return True
+        ultimo = max(asignaciones.values())
+        faltan = {
+            t: self.min_creditos - self.creditos[t]
+            for t in range(1, ultimo)
+            if self.cursos[t] and self.creditos[t] < self.min_creditos
+        }
+        if not faltan:
+            return True
+        for cod, dom in dominio.items():
+            if cod not in asignaciones:
+                for t in dom:
+                    if t in faltan:
+                        faltan[t] -= self.creditos_curso[cursos.indice[cod]]
+        return all(f <= 0 for f in faltan.values())
+
+    def exceso_creditos(self, cursos, dominio, asignaciones):
+        """
+        Ventana de semestres (lo, hi), de la forma t..final o 1..t, donde los
+        créditos sin asignar que solo pueden ir en ella no caben en lo que le
+        queda libre; None si no hay ninguna. Con max_creditos ajustado, el CSP
+        cronológico deja huecos en los primeros semestres que el forward
+        checking no ve.
+        """
+        if not self.max_creditos:
+            return None
+        total = len(self.cursos) - 1
+        desde = [0] * (total + 1)
+        hasta = [0] * (total + 1)
+        for cod, dom in dominio.items():
+            if cod not in asignaciones:
+                credito = self.creditos_curso[cursos.indice[cod]]
+                desde[dom[0]] += credito
+                hasta[dom[-1]] += credito
+        libre = [
+            self.max_creditos - self.creditos[t] if self.cursos[t] < self.max_cursos else 0
+            for t in range(total + 1)
+        ]
+        necesario = disponible = 0
+        for t in range(total, 0, -1):
+            necesario += desde[t]
+            disponible += libre[t]
+            if necesario > disponible:
+                return t, total
+        necesario = disponible = 0
+        for t in range(1, total + 1):
+            necesario += hasta[t]
+            disponible += libre[t]
+            if necesario > disponible:
+                return 1, t
+        return None
+
+def podar(dominio, codigo, nuevo, rastro):
+    rastro.append((codigo, dominio[codigo]))
+    dominio[codigo] = nuevo
+
+def deshacer(dominio, rastro):
+    while rastro:
+        codigo, anterior = rastro.pop()
+        dominio[codigo] = anterior
+
+class AlmacenNogoods:
+    """
+    Nogoods aprendidos: conjuntos de asignaciones que no pueden darse juntas en
+    ninguna solución, como bitsets de literales (ver Conflictos.literal). Se
+    guardan como mucho `max_nogoods` (se descartan los más viejos) de a lo sumo
+    `max_largo` asignaciones cada uno, indexados por cada uno de sus literales.
+    """
+
+    def __init__(self, max_nogoods=2000, max_largo=3):
+        self.max_nogoods = max_nogoods
+        self.max_largo = max_largo
+        self._nogoods = OrderedDict()
+        self._por_literal = defaultdict(list)
+
+    def __len__(self):
+        return len(self._nogoods)
+
+    def aprender(self, literales):
+        nogood = 0
+        for literal in literales:
+            nogood |= 1 << literal
+        if nogood in self._nogoods:
+            return
+        self._nogoods[nogood] = literales
+        for literal in literales:
+            self._por_literal[literal].append(nogood)
+        if len(self._nogoods) > self.max_nogoods:
+            viejo, literales = self._nogoods.popitem(last=False)
+            for literal in literales:
+                self._por_literal[literal].remove(viejo)
+
+    def violado(self, literal, activos):
+        """
+        Primer nogood con `literal` cuyos literales están todos en `activos`
+        (bitset de las asignaciones vigentes, incluida la nueva), o None.
+        """
+        inactivos = ~activos
+        for nogood in self._por_literal.get(literal, ()):
+            if not nogood & inactivos:
+                return nogood
+        return None
+
+
+class Conflictos:
+    """
+    Conjuntos de conflicto para el backjumping, como bitsets por índice de curso:
+      - conf[codigo]: cursos asignados cuyas asignaciones podaron su dominio
+        (directamente o en cadena);
+      - en_semestre[t]: cursos asignados al semestre t (causa de las podas
+        por capacidad);
+      - fallo: causa del último dominio vacío en forward_checking;
+      - activos: bitset de literales de las asignaciones vigentes, donde la
+        asignación curso i → semestre t es el literal i * ancho + t.
+    Los cambios de conf se deshacen con marca()/deshacer(), como el dominio.
+    """
+
+    def __init__(self, cursos, asignaciones, total_ciclos, nogoods=None):
+        self.conf = {}
+        self.ancho = total_ciclos + 1
+        self.en_semestre = [0] * self.ancho
+        self.activos = 0
+        for cod, t in asignaciones.items():
+            self.en_semestre[t] |= 1 << cursos.indice[cod]
+            self.activos |= 1 << self.literal(cursos.indice[cod], t)
+        self.fallo = 0
+        self.nogoods = AlmacenNogoods() if nogoods is None else nogoods
+        self._rastro = []
+
+    def literal(self, i, t):
+        return i * self.ancho + t
+
+    def causas(self, nogood, i):
+        # Cursos de un nogood, sin el curso i
+        mascara = 0
+        while nogood:
+            bajo = nogood & -nogood
+            mascara |= 1 << (bajo.bit_length() - 1) // self.ancho
+            nogood ^= bajo
+        return mascara & ~(1 << i)
+
+    def agregar(self, codigo, causa):
+        anterior = self.conf.get(codigo, 0)
+        if causa & ~anterior:
+            self._rastro.append((codigo, anterior))
+            self.conf[codigo] = anterior | causa
+
+    def marca(self):
+        return len(self._rastro)
+
+    def deshacer(self, marca):
+        while len(self._rastro) > marca:
+            codigo, anterior = self._rastro.pop()
+            self.conf[codigo] = anterior
+
+def forward_checking(curso_codigo, cursos, asignaciones, ciclo_actual, max_cursos, total_ciclos,
+                     dominio, carga, rastro, ctx=None, conflictos=None):
+    """
+    Propaga la asignación curso_codigo → ciclo_actual sobre `dominio` (en sitio,
+    guardando en `rastro` lo necesario para deshacer). `carga` (Carga) ya
+    incluye la asignación:
+      - si el semestre quedó lleno, se quita de los dominios sin asignar, y si
+        solo le quedan pocos créditos, de los cursos que ya no caben;
+      - los dependientes quedan después del mínimo de sus prerrequisitos y los
+        prerrequisitos antes del máximo de sus dependientes, en cadena.
+    Devuelve False si algún dominio queda vacío. Si se da `ctx`, las podas se
+    cuentan por motivo ("capacidad", "precedencia" y "vacio_*" para los fallos);
+    si se dan `conflictos`, se anota qué asignaciones causaron cada poda y,
+    al fallar, conflictos.fallo.
+    """
+    cursos = indexar(cursos)
+    podar(dominio, curso_codigo, [ciclo_actual], rastro)
+    cola = [curso_codigo]
+    propio = 1 << cursos.indice[curso_codigo]
+
+    holgura = carga.holgura(ciclo_actual)
+    if holgura is not None:
+        causa = conflictos.en_semestre[ciclo_actual] if conflictos is not None else 0
+        for cod, dom in dominio.items():
+            if (cod not in asignaciones and ciclo_actual in dom
+                    and carga.creditos_curso[cursos.indice[cod]] > holgura):
+                nuevo = [t for t in dom if t != ciclo_actual]
+                if not nuevo:
+                    if ctx is not None:
+                        ctx.podar("vacio_capacidad")
+                    if conflictos is not None:
+                        conflictos.fallo = causa | conflictos.conf.get(cod, 0)
+                    return False
+                podar(dominio, cod, nuevo, rastro)
+                cola.append(cod)
+                if ctx is not None:
+                    ctx.podar("capacidad")
+                if conflictos is not None:
+                    conflictos.agregar(cod, causa)
+
+    while cola:
+        cod = cola.pop()
+        i = cursos.indice[cod]
+        lo, hi = dominio[cod][0], dominio[cod][-1]
+        if conflictos is not None:
+            # Las cotas de cod vienen de esta asignación y de lo que ya lo había podado
+            causa = propio if cod == curso_codigo else propio | conflictos.conf.get(cod, 0)
+        for d in cursos.dependientes[i]:
+            dom = dominio.get(cursos.codigos[d])
+            if dom is None or dom[0] > lo:
+                continue
+            nuevo = [t for t in dom if t > lo]
+            if not _recortar(cursos, d, dom, nuevo, asignaciones, dominio, rastro, cola, ctx,
+                             conflictos, causa if conflictos is not None else 0):
+                return False
+        for r in cursos.requisitos[i]:
+            dom = dominio.get(cursos.codigos[r])
+            if dom is None or dom[-1] < hi:
+                continue
+            nuevo = [t for t in dom if t < hi]
+            if not _recortar(cursos, r, dom, nuevo, asignaciones, dominio, rastro, cola, ctx,
+                             conflictos, causa if conflictos is not None else 0):
                 return False
     return True
 
-def backtracking(asignaciones, cursos, pendientes, dominio, ciclo_actual, max_cursos, total_ciclos):
-    global contador_backtracks, contador_nodos
-    contador_nodos += 1   
-    if len(asignaciones) == len(pendientes):
-        return asignaciones
+def _recortar(cursos, j, dom, nuevo, asignaciones, dominio, rastro, cola, ctx, conflictos, causa):
+    # Poda por precedencia del curso j; False si su dominio queda vacío
+    vecino = cursos.codigos[j]
+    if not nuevo:
+        if ctx is not None:
+            ctx.podar("vacio_precedencia")
+        if conflictos is not None:
+            previo = 1 << j if vecino in asignaciones else conflictos.conf.get(vecino, 0)
+            conflictos.fallo = causa | previo
+        return False
+    podar(dominio, vecino, nuevo, rastro)
+    cola.append(vecino)
+    if ctx is not None:
+        ctx.podar("precedencia", len(dom) - len(nuevo))
+    if conflictos is not None:
+        conflictos.agregar(vecino, causa)
+    return True
 
-    sin_asignar = [c for c in pendientes if c not in asignaciones]
-    variable = min(sin_asignar, key=lambda v: len(dominio[v]))
+def elegir_cronologico(sin_asignar, dominio):
+    # El que puede empezar antes; a igualdad, MRV
+    return min(sin_asignar, key=lambda v: (dominio[v][0], len(dominio[v])))
 
-    for ciclo in dominio[variable]:
-        if sum(1 for v in asignaciones.values() if v == ciclo) >= max_cursos:
-            continue
+def valores_ascendentes(variable, dominio):
+    return dominio[variable]
 
-        curso = next(c for c in cursos if c["codigo"] == variable)
-        if requisitos_cumplidos(curso, asignaciones, ciclo):
-            contador_backtracks += 1
-            asignaciones[variable] = ciclo            
-            if forward_checking(variable, cursos, asignaciones, ciclo, max_cursos, total_ciclos):
-                resultado = backtracking(asignaciones, cursos, pendientes, dominio, ciclo_actual, max_cursos, total_ciclos)
-                if resultado:
-                    return resultado
-            del asignaciones[variable]
+def estrategia(nombre, cursos, aprobados_codigos, ciclo_actual, max_cursos, max_creditos=None):
+    """
+    Devuelve (elegir_variable, ordenar_valores) para una estrategia del
+    portafolio:
+      - "cronologico": el que puede empezar antes, luego MRV.
+      - "mrv_grado": MRV y, a igualdad, el de más descendientes.
+      - "heuristica": el que puede empezar antes, luego heuristica_completa.
+      - "greedy": cronológico, probando primero el semestre que le da la
+        planificación por listas (arranque en caliente; por defecto: el
+        horizonte suele salir de esa misma planificación, así que la primera
+        rama ya es una solución o queda muy cerca).
+      - "critica": el que puede empezar antes, luego el de mayor prioridad en
+        rango_critico; como valor, primero el semestre de la planificación
+        por listas con esa misma prioridad.
+      - "aleatorio:<semilla>": cronológico con desempates al azar.
+    """
+    cursos = indexar(cursos)
+    if nombre == "cronologico":
+        return elegir_cronologico, valores_ascendentes
+    if nombre == "mrv_grado":
+        def elegir(sin_asignar, dominio):
+            return min(sin_asignar, key=lambda v: (
+                len(dominio[v]), -cursos.descendientes[cursos.indice[v]], dominio[v][0]))
+        return elegir, valores_ascendentes
+    if nombre == "heuristica":
+        # El historial no cambia durante la búsqueda: la prioridad es fija
+        historial = cursos.mascara(aprobados_codigos)
+        prioridad = {cod: heuristica_completa(cod, cursos, historial)
+                     for cod in cursos.codigos if not historial >> cursos.indice[cod] & 1}
+        def elegir(sin_asignar, dominio):
+            return min(sin_asignar, key=lambda v: (dominio[v][0], prioridad[v]))
+        return elegir, valores_ascendentes
+    if nombre == "greedy":
+        sugerido = asignacion_por_listas(cursos, aprobados_codigos, ciclo_actual, max_cursos,
+                                         max_creditos=max_creditos) or {}
+        def valores(variable, dominio):
+            t = sugerido.get(variable)
+            if t in dominio[variable]:
+                return [t] + [v for v in dominio[variable] if v != t]
+            return dominio[variable]
+        return elegir_cronologico, valores
+    if nombre == "critica":
+        rangos = cursos.rango_critico
+        sugerido = asignacion_por_listas(cursos, aprobados_codigos, ciclo_actual, max_cursos,
+                                         max_creditos=max_creditos, prioridad="critica") or {}
+        def elegir(sin_asignar, dominio):
+            return min(sin_asignar, key=lambda v: (
+                dominio[v][0], len(dominio[v]), rangos[paridad(dominio[v][0], ciclo_actual)][cursos.indice[v]]))
+        def valores(variable, dominio):
+            t = sugerido.get(variable)
+            if t in dominio[variable]:
+                return [t] + [v for v in dominio[variable] if v != t]
+            return dominio[variable]
+        return elegir, valores
+    if nombre.startswith("aleatorio"):
+        rng = random.Random(int(nombre.partition(":")[2] or 0))
+        def elegir(sin_asignar, dominio):
+            return min(sin_asignar, key=lambda v: (dominio[v][0], len(dominio[v]), rng.random()))
+        return elegir, valores_ascendentes
+    raise ValueError(f"Estrategia desconocida: {nombre}")
+
+def backtracking(asignaciones, cursos, pendientes, dominio, ciclo_actual, max_cursos, total_ciclos,
+                 carga=None, elegir=elegir_cronologico, valores=valores_ascendentes, ctx=None,
+                 nogoods=None, max_creditos=None, min_creditos=None):
+    """
+    Búsqueda con forward checking y backjumping dirigido por conflictos: cuando
+    un fallo no depende de la última asignación, se salta directamente a la
+    más reciente de las que lo causaron. Cada variable que se queda sin
+    valores deja un nogood en `nogoods` (AlmacenNogoods, compartible entre
+    búsquedas del mismo problema). `elegir` y `valores` fijan el orden de
+    variables y valores. La capacidad por semestre (cursos, créditos máximos
+    y mínimos) va en `carga` (Carga), que se arma con los topes si no se da.
+    Los contadores y el presupuesto van en `ctx` (ContextoBusqueda); si se
+    agota o se cancela, nodo() corta la búsqueda con BusquedaCancelada.
+    """
+    if ctx is None:
+        ctx = ContextoBusqueda()
+    cursos = indexar(cursos)
+    if carga is None:
+        carga = Carga(cursos, total_ciclos, max_cursos, max_creditos, min_creditos, asignaciones)
+    conflictos = Conflictos(cursos, asignaciones, total_ciclos, nogoods)
+    resultado, _ = _backjumping(asignaciones, cursos, pendientes, dominio, max_cursos, total_ciclos,
+                                carga, elegir, valores, ctx, conflictos)
+    return resultado
+
+def _fallo_de_carga(asignaciones, cursos, dominio, carga, ctx, conflictos):
+    # Conflicto (bitset de asignaciones culpables) si la carga ya no tiene
+    # arreglo con lo asignado; None si todavía puede tenerlo
+    if not carga.minimo_alcanzable(cursos, dominio, asignaciones):
+        # Falla por el mínimo de créditos: se culpa a todas las asignaciones
+        ctx.podar("minimo_creditos")
+        return cursos.mascara(asignaciones)
+    ventana = carga.exceso_creditos(cursos, dominio, asignaciones)
+    if ventana is not None:
+        # Culpables: lo asignado en la ventana y lo que encerró ahí a los demás
+        lo, hi = ventana
+        ctx.podar("creditos")
+        culpa = 0
+        for t in range(lo, hi + 1):
+            culpa |= conflictos.en_semestre[t]
+        for cod, dom in dominio.items():
+            if cod not in asignaciones and lo <= dom[0] and dom[-1] <= hi:
+                culpa |= conflictos.conf.get(cod, 0)
+        return culpa
     return None
 
-def planificar_ciclo_unico(cursos, aprobados_codigos, ciclo_actual, max_cursos):
+def _backjumping(asignaciones, cursos, pendientes, dominio, max_cursos, total_ciclos, carga,
+                 elegir, valores, ctx, conflictos):
+    # Devuelve (solución, None) o (None, conflicto): bitset de las asignaciones
+    # que explican el fallo. Es iterativa para no depender del límite de
+    # recursión con miles de cursos pendientes: cada marco de la pila es
+    # [variable, valores que quedan, conflicto acumulado, valor en curso,
+    # rastro, marca], y `causa` es el conflicto del subárbol que se cerró
+    pila = []
+    entrar = True
+    causa = None
+    while True:
+        if entrar:
+            ctx.nodo(len(asignaciones))
+            causa = _fallo_de_carga(asignaciones, cursos, dominio, carga, ctx, conflictos)
+            if causa is not None:
+                entrar = False
+                continue
+            if len(asignaciones) == len(pendientes):
+                return asignaciones, None
+            variable = elegir([c for c in pendientes if c not in asignaciones], dominio)
+            # Los valores podados antes de llegar aquí fallan por quienes los podaron
+            pila.append([variable, iter(valores(variable, dominio)), conflictos.conf.get(variable, 0),
+                         None, None, None])
+        else:
+            if not pila:
+                return None, causa
+            # Volver del valor en curso del marco de arriba
+            marco = pila[-1]
+            variable, _, _, ciclo, rastro, marca = marco
+            v = cursos.indice[variable]
+            deshacer(dominio, rastro)
+            conflictos.deshacer(marca)
+            conflictos.en_semestre[ciclo] &= ~(1 << v)
+            conflictos.activos &= ~(1 << conflictos.literal(v, ciclo))
+            carga.quitar(ciclo, v)
+            del asignaciones[variable]
+            if not causa & (1 << v):
+                # Cambiar esta variable no arregla el fallo: saltar hacia atrás
+                ctx.podar("backjump")
+                pila.pop()
+                continue
+            marco[2] |= causa
+
+        # Siguiente valor del marco de arriba
+        marco = pila[-1]
+        variable = marco[0]
+        v = cursos.indice[variable]
+        propio = 1 << v
+        for ciclo in marco[1]:
+            if not carga.cabe(ciclo, v):
+                ctx.podar("semestre_lleno")
+                marco[2] |= conflictos.en_semestre[ciclo]
+                continue
+            literal = 1 << conflictos.literal(v, ciclo)
+            nogood = conflictos.nogoods.violado(conflictos.literal(v, ciclo), conflictos.activos | literal)
+            if nogood is not None:
+                ctx.podar("nogood")
+                marco[2] |= conflictos.causas(nogood, v)
+                continue
+
+            ctx.backtracks += 1
+            asignaciones[variable] = ciclo
+            carga.agregar(ciclo, v)
+            conflictos.en_semestre[ciclo] |= propio
+            conflictos.activos |= literal
+            rastro = []
+            marca = conflictos.marca()
+            marco[3:] = ciclo, rastro, marca
+            # Si el forward checking falla se vuelve enseguida con su conflicto
+            entrar = forward_checking(variable, cursos, asignaciones, ciclo, max_cursos, total_ciclos,
+                                      dominio, carga, rastro, ctx, conflictos)
+            if not entrar:
+                causa = conflictos.fallo
+            break
+        else:
+            conflicto = marco[2] & ~propio
+            pila.pop()
+            # Las asignaciones del conflicto no pueden darse juntas en ninguna solución
+            if conflicto and bin(conflicto).count("1") <= conflictos.nogoods.max_largo:
+                conflictos.nogoods.aprender([
+                    conflictos.literal(j, asignaciones[cursos.codigos[j]]) for j in cursos.posiciones(conflicto)
+                ])
+            causa = conflicto
+            entrar = False
+
+def planificar_ciclo_unico(cursos, aprobados_codigos, ciclo_actual, max_cursos, max_creditos=None):
     """
-    Planifica el próximo ciclo usando heurística de dependencias y semestres.
+    Planifica el próximo ciclo usando heurística de dependencias y semestres,
+    sin pasar de max_cursos cursos ni de max_creditos créditos.
     """
+    cursos = indexar(cursos)
     historial = set(aprobados_codigos)
     # Filtrar candidatos válidos para el semestre actual
-    candidatos = [
-        c for c in cursos
-        if c["codigo"] not in historial
-        and ciclo_actual in c["semestre"]
-        and all(pr in historial for pr in c["requisitos"])
-    ]
+    candidatos = cursos.cursos_de(cursos.elegibles(cursos.mascara(historial), ciclo_actual))
 
     # Ordenar por relevancia usando heuristica_completa a través de ordenar_por_prioridad
     codes_sorted = ordenar_por_prioridad(
         [c["codigo"] for c in candidatos], cursos, historial
     )
 
-    # Mapear códigos ordenados a objetos y devolver los primeros max_cursos
-    seleccion = [
-        next(course for course in cursos if course["codigo"] == code)
-        for code in codes_sorted[:max_cursos]
-    ]
+    # Mapear códigos ordenados a objetos y devolver los primeros que caben
+    seleccion = [cursos[i] for i in cursos.seleccionar(
+        [cursos.indice[code] for code in codes_sorted], max_cursos, max_creditos)]
 
     return seleccion
 
-def planificar_toda_la_carrera(cursos, aprobados_codigos, ciclo_actual, max_cursos, total_ciclos=12):
-    global contador_backtracks, contador_nodos
-    contador_backtracks = 0
-    contador_nodos      = 0
+def planificar_toda_la_carrera(cursos, aprobados_codigos, ciclo_actual, max_cursos, total_ciclos=12,
+                               estrategia_busqueda="greedy", ctx=None, motor="backtracking",
+                               max_creditos=None, min_creditos=None):
+    """
+    Asigna cada curso pendiente a un semestre absoluto 1..total_ciclos (el 1 es
+    `ciclo_actual`). Devuelve (plan, backtracks, nodos); cada etapa del plan
+    trae "semestre" (absoluto), "ciclo" (1 o 2) y "cursos". Cada semestre
+    lleva a lo sumo max_cursos cursos y max_creditos créditos, y los que
+    tienen cursos, salvo el último, al menos min_creditos. Con `ctx` se
+    acumulan ahí las métricas y se respeta su presupuesto (un presupuesto
+    agotado se propaga como PresupuestoAgotado).
+    `motor` elige el resolvedor: "backtracking" o el modelo 0/1 de
+    programacion_entera con "cpsat", "pulp" o "entero" (el primero instalado),
+    que además minimiza el último semestre. Si ese motor no está instalado o se
+    corta sin respuesta, se usa el backtracking; ctx.motor dice cuál resolvió.
+    """
+    if ctx is None:
+        ctx = ContextoBusqueda()
+    cursos = indexar(cursos)
+    aprobados_codigos = set(aprobados_codigos)
+
+    if motor != "backtracking":
+        # Import diferido: programacion_entera importa este módulo
+        from programacion_entera import MotorNoDisponible, resolver_entero
+        try:
+            with ctx.cronometro(motor):
+                asign, estado = resolver_entero(
+                    cursos, aprobados_codigos, ciclo_actual, max_cursos, total_ciclos,
+                    motor=None if motor == "entero" else motor, tiempo_limite=ctx.restante(),
+                    max_creditos=max_creditos, min_creditos=min_creditos,
+                )
+        except MotorNoDisponible:
+            estado = "desconocido"
+        if estado != "desconocido":
+            ctx.motor = motor
+            plan = _armar_plan(cursos, asign, ciclo_actual) if asign else []
+            return plan, ctx.backtracks, ctx.nodos
+    ctx.motor = "backtracking"
 
     pendientes = [c for c in cursos if c["codigo"] not in aprobados_codigos]
     cod_pend   = [c["codigo"] for c in pendientes]
-    dominio    = { c["codigo"]: c["semestre"] for c in pendientes }
+    with ctx.cronometro("dominios"):
+        dominio = construir_dominios(cursos, cod_pend, ciclo_actual, max_cursos, total_ciclos, max_creditos)
 
-    asign = backtracking({}, cursos, cod_pend, dominio, ciclo_actual, max_cursos, total_ciclos)
+    asign = _resolver(cursos, aprobados_codigos, cod_pend, dominio, ciclo_actual, max_cursos,
+                      total_ciclos, estrategia_busqueda, ctx, max_creditos, min_creditos)
     # SI FALLA, asign será None, devolvemos métricas igualmente
     if not asign:
-        return [], contador_backtracks, contador_nodos
+        return [], ctx.backtracks, ctx.nodos
+
+    return _armar_plan(cursos, asign, ciclo_actual), ctx.backtracks, ctx.nodos
+
+def _resolver(cursos, aprobados_codigos, cod_pend, dominio, ciclo_actual, max_cursos, total_ciclos,
+              estrategia_busqueda, ctx, max_creditos=None, min_creditos=None):
+    # Sin solución posible: algún dominio vacío o no caben en el horizonte
+    with ctx.cronometro("busqueda"):
+        if len(cod_pend) > max_cursos * total_ciclos or not all(dominio.values()):
+            return None
+        if max_creditos and cursos.creditos_de(cursos.mascara(cod_pend)) > max_creditos * total_ciclos:
+            return None
+        if estrategia_busqueda.startswith("aleatorio"):
+            return _reinicios_aleatorios(cursos, aprobados_codigos, cod_pend, dominio, ciclo_actual,
+                                         max_cursos, total_ciclos, estrategia_busqueda, ctx,
+                                         max_creditos, min_creditos)
+        if max_creditos and estrategia_busqueda == "cronologico":
+            # Con tope de créditos el problema es casi un empaquetamiento: el
+            # orden ascendente se pierde rellenando huecos, así que se prueba
+            # primero el semestre de la planificación por listas
+            estrategia_busqueda = "greedy"
+        elegir, valores = estrategia(estrategia_busqueda, cursos, aprobados_codigos, ciclo_actual, max_cursos,
+                                     max_creditos)
+        return backtracking({}, cursos, cod_pend, dominio, ciclo_actual, max_cursos, total_ciclos,
+                            elegir=elegir, valores=valores, ctx=ctx,
+                            max_creditos=max_creditos, min_creditos=min_creditos)
+
+def puntaje_plan(asign):
+    """
+    Puntaje de una asignación {codigo: semestre}: más cursos ubicados y, a
+    igualdad, menos semestres es mejor (mayor tupla).
+    """
+    return (len(asign), -max(asign.values(), default=0))
+
+def llega_al_minimo(cursos, asign, min_creditos):
+    """
+    True si en la asignación {codigo: semestre} cada semestre con cursos,
+    salvo el último, lleva al menos min_creditos créditos (None = sin mínimo).
+    """
+    if not min_creditos or not asign:
+        return True
+    creditos = defaultdict(int)
+    for cod, t in asign.items():
+        creditos[t] += cursos.creditos[cursos.indice[cod]]
+    ultimo = max(creditos)
+    return all(c >= min_creditos for t, c in creditos.items() if t != ultimo)
+
+def planificar_anytime(cursos, aprobados_codigos, ciclo_actual, max_cursos, max_segundos=None,
+                       max_nodos=None, estrategia_busqueda="greedy", progreso=None, ctx=None,
+                       max_creditos=None, min_creditos=None):
+    """
+    Versión anytime de planificar_toda_la_carrera: siempre tiene un plan para
+    devolver. Parte de la planificación por listas de los cursos alcanzables y
+    busca con el CSP planes con un semestre menos que la incumbente hasta
+    probar que no los hay o agotar el presupuesto (max_segundos / max_nodos o
+    el de `ctx`). Los cursos que nunca se pueden llevar quedan fuera y se
+    informan (también los que no caben en max_creditos). `progreso`, si se
+    da, recibe un dict con cada mejora.
+    Con min_creditos, si la planificación por listas no llega al mínimo en
+    algún semestre, la primera búsqueda es con su mismo horizonte y, si no
+    hay plan de ese largo, con el más largo que puede hacer falta (dos
+    semestres por curso: nunca conviene dejar dos vacíos seguidos); si
+    tampoco hay, queda la de listas con "respeta_minimo" en False.
+    Devuelve (plan, backtracks, nodos, info) con info = {"semestres",
+    "completo", "optimo", "agotado", "respeta_minimo", "sin_ubicar",
+    "mejoras"}; "optimo" indica que ningún plan de los cursos alcanzables usa
+    menos semestres y "agotado", que la búsqueda se cortó (presupuesto o
+    cancelación) antes de terminar.
+    """
+    if ctx is None:
+        ctx = ContextoBusqueda(max_nodos=max_nodos, max_segundos=max_segundos)
+    cursos = indexar(cursos)
+    aprobados_codigos = set(aprobados_codigos)
+    objetivo = alcanzables(cursos, aprobados_codigos, max_creditos)
+    cod_obj = [cursos.codigos[i] for i in cursos.posiciones(objetivo)]
+
+    with ctx.cronometro("listas"):
+        mejor = asignacion_por_listas(cursos, aprobados_codigos, ciclo_actual, max_cursos, objetivo,
+                                      max_creditos) or {}
+    info = {"optimo": False, "agotado": False, "mejoras": 0,
+            "respeta_minimo": llega_al_minimo(cursos, mejor, min_creditos)}
+
+    def publicar():
+        if progreso is not None:
+            progreso({
+                "semestres": -puntaje_plan(mejor)[1],
+                "ubicados":  len(mejor),
+                "nodos":     ctx.nodos,
+                "segundos":  ctx.transcurrido(),
+                "optimo":    info["optimo"],
+                "plan":      _armar_plan(cursos, mejor, ciclo_actual),
+            })
+
+    publicar()
+    try:
+        horizonte = -puntaje_plan(mejor)[1] - (1 if info["respeta_minimo"] else 0)
+        tope = 2 * len(cod_obj)
+        while horizonte >= 1:
+            with ctx.cronometro("dominios"):
+                dominio = construir_dominios(cursos, cod_obj, ciclo_actual, max_cursos, horizonte,
+                                             max_creditos)
+            asign = _resolver(cursos, aprobados_codigos, cod_obj, dominio, ciclo_actual, max_cursos,
+                              horizonte, estrategia_busqueda, ctx, max_creditos, min_creditos)
+            if not asign:
+                if info["respeta_minimo"] or horizonte >= tope:
+                    break
+                horizonte = tope
+                continue
+            if not info["respeta_minimo"] or puntaje_plan(asign) > puntaje_plan(mejor):
+                mejor = dict(asign)
+                info["respeta_minimo"] = True
+                info["mejoras"] += 1
+                publicar()
+            horizonte = -puntaje_plan(mejor)[1] - 1
+        # La búsqueda terminó sin cortarse: no hay plan más corto
+        info["optimo"] = info["respeta_minimo"]
+        publicar()
+    except BusquedaCancelada:
+        info["agotado"] = True
+
+    pendientes = [c["codigo"] for c in cursos if c["codigo"] not in aprobados_codigos]
+    info["semestres"] = -puntaje_plan(mejor)[1]
+    info["sin_ubicar"] = [cod for cod in pendientes if cod not in mejor]
+    info["completo"] = not info["sin_ubicar"]
+    return _armar_plan(cursos, mejor, ciclo_actual), ctx.backtracks, ctx.nodos, info
+
+class PlanificacionEnSegundoPlano(threading.Thread):
+    """
+    Corre planificar_anytime en un hilo aparte. Cada mejora se publica en la
+    cola `progreso` (al terminar se publica None). resultado(timeout) espera
+    como mucho `timeout` segundos; si la búsqueda sigue, la cancela y devuelve
+    la mejor solución encontrada hasta ese momento.
+    """
+
+    def __init__(self, cursos, aprobados_codigos, ciclo_actual, max_cursos, max_segundos=None,
+                 max_nodos=None, estrategia_busqueda="greedy", max_creditos=None, min_creditos=None):
+        super().__init__(daemon=True)
+        self._cancelada = threading.Event()
+        self.ctx = ContextoBusqueda(max_nodos=max_nodos, max_segundos=max_segundos,
+                                    detener=self._cancelada.is_set)
+        self.progreso = queue.Queue()
+        self._argumentos = (indexar(cursos), set(aprobados_codigos), ciclo_actual, max_cursos)
+        self._estrategia = estrategia_busqueda
+        self._max_creditos = max_creditos
+        self._min_creditos = min_creditos
+        self._resultado = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._resultado = planificar_anytime(
+                *self._argumentos, estrategia_busqueda=self._estrategia,
+                progreso=self.progreso.put, ctx=self.ctx, max_creditos=self._max_creditos,
+                min_creditos=self._min_creditos,
+            )
+        except Exception as e:
+            self._error = e
+        finally:
+            self.progreso.put(None)
+
+    def cancelar(self):
+        self._cancelada.set()
 
-    # Si funciona, construimos el plan como lista de dicts
-    from collections import defaultdict
+    def resultado(self, timeout=None):
+        self.join(timeout)
+        if self.is_alive():
+            # La búsqueda revisa la cancelación cada pocos nodos
+            self.cancelar()
+            self.join()
+        if self._error is not None:
+            raise self._error
+        return self._resultado
+
+def _armar_plan(cursos, asign, ciclo_actual):
+    # Construimos el plan como lista de dicts
     ciclos = defaultdict(list)
-    for cod, ciclo in asign.items():
-        curso = next(c for c in cursos if c["codigo"] == cod)
-        ciclos[ciclo].append(curso)
+    for cod, semestre in asign.items():
+        ciclos[semestre].append(cursos.curso(cod))
 
     resultado = []
-    for ciclo in sorted(ciclos):
+    for semestre in sorted(ciclos):
         resultado.append({
-            "ciclo": ciclo,
-            "cursos": sorted(ciclos[ciclo], key=lambda c: (c["anio"], c["ciclo"], c["nombre"]))
+            "ciclo": paridad(semestre, ciclo_actual),
+            "semestre": semestre,
+            "cursos": sorted(ciclos[semestre], key=lambda c: (c["anio"], c["ciclo"], c["nombre"]))
         })
+    return resultado
+
+def _reinicios_aleatorios(cursos, aprobados_codigos, cod_pend, dominio, ciclo_actual, max_cursos,
+                          total_ciclos, nombre, ctx, max_creditos=None, min_creditos=None):
+    """
+    Reinicios con desempates al azar: cada intento tiene un límite de nodos
+    que se duplica, y la semilla cambia en cada reinicio.
+    """
+    semilla = int(nombre.partition(":")[2] or 0)
+    limite = 1000
+    # Los nogoods valen para todo el problema: se comparten entre intentos
+    nogoods = AlmacenNogoods()
+    while True:
+        elegir, valores = estrategia(f"aleatorio:{semilla}", cursos, aprobados_codigos, ciclo_actual, max_cursos,
+                                     max_creditos)
+        ctx.tope_intento = ctx.nodos + limite
+        try:
+            return backtracking({}, cursos, cod_pend, dict(dominio), ciclo_actual, max_cursos,
+                                total_ciclos, elegir=elegir, valores=valores, ctx=ctx, nogoods=nogoods,
+                                max_creditos=max_creditos, min_creditos=min_creditos)
+        except LimiteIntento:
+            ctx.podar("reinicio")
+        finally:
+            ctx.tope_intento = None
+        semilla += 1000
+        limite *= 2
+
+ESTRATEGIAS_PORTAFOLIO = ["cronologico", "mrv_grado", "heuristica", "greedy", "aleatorio:1", "aleatorio:2"]
+
+# Pool del portafolio, reutilizado entre llamadas: crear los procesos cuesta
+# más que muchas búsquedas. Las llamadas se turnan (cada una ocupa todos los
+# procesos) y `_cancelada`, que los trabajadores reciben al crearse, guarda el
+# número de la última llamada terminada: las estrategias de esa llamada que
+# siguen corriendo se detienen en su próximo chequeo, sin que nadie las espere.
+_pool_portafolio = None
+_procesos_portafolio = 0
+_cancelada = None
+_llamadas = 0
+_lock_portafolio = threading.Lock()
+
+# Estado de cada proceso del portafolio (lo carga _iniciar_portafolio)
+_portafolio = {}
+
+def _iniciar_portafolio(cancelada):
+    _portafolio["cancelada"] = cancelada
+
+def _resolver_portafolio(llamada, cursos, version, nombre, aprobados_codigos, ciclo_actual, max_cursos,
+                         total_ciclos, max_creditos=None, min_creditos=None):
+    # El currículo viaja con cada tarea; cada proceso lo indexa una vez por versión
+    if _portafolio.get("version") != version:
+        _portafolio["cursos"] = indexar(cursos)
+        _portafolio["version"] = version
+    cancelada = _portafolio["cancelada"]
+    ctx = ContextoBusqueda(detener=lambda: cancelada.value >= llamada)
+    try:
+        plan, _, _ = planificar_toda_la_carrera(
+            _portafolio["cursos"], aprobados_codigos, ciclo_actual, max_cursos, total_ciclos,
+            estrategia_busqueda=nombre, ctx=ctx, max_creditos=max_creditos, min_creditos=min_creditos,
+        )
+    except BusquedaCancelada:
+        plan = None
+    return nombre, plan, ctx.backtracks, ctx.nodos
+
+def _pool_del_portafolio(procesos):
+    # Se rehace solo si cambia la cantidad de procesos o se rompió
+    global _pool_portafolio, _procesos_portafolio, _cancelada
+    if _pool_portafolio is None or _procesos_portafolio != procesos:
+        if _pool_portafolio is not None:
+            _pool_portafolio.shutdown(wait=False, cancel_futures=True)
+        contexto = multiprocessing.get_context()
+        _cancelada = contexto.Value("q", _llamadas, lock=False)
+        _pool_portafolio = ProcessPoolExecutor(procesos, mp_context=contexto, initializer=_iniciar_portafolio,
+                                               initargs=(_cancelada,))
+        _procesos_portafolio = procesos
+    return _pool_portafolio
+
+def planificar_portafolio(cursos, aprobados_codigos, ciclo_actual, max_cursos, total_ciclos=12,
+                          estrategias=None, procesos=None, tiempo_limite=None, max_creditos=None,
+                          min_creditos=None):
+    """
+    Corre varias estrategias de búsqueda en paralelo y devuelve la primera que
+    encuentra solución; las demás se cancelan sin esperarlas. Devuelve
+    (plan, backtracks, nodos, estrategia ganadora); si ninguna encuentra plan
+    (o vence `tiempo_limite`, en segundos), el plan es [] y la estrategia None.
+    Los procesos se reutilizan entre llamadas.
+    """
+    global _pool_portafolio, _llamadas
+    cursos = indexar(cursos)
+    estrategias = estrategias or ESTRATEGIAS_PORTAFOLIO
+    # Un proceso por estrategia: con menos, las que esperan en cola no compiten
+    procesos = min(len(estrategias), procesos or len(estrategias))
+    ganador = ([], 0, 0, None)
 
-    return resultado, contador_backtracks, contador_nodos
+    with _lock_portafolio:
+        pool = _pool_del_portafolio(procesos)
+        _llamadas += 1
+        datos = list(cursos)
+        futuros = [
+            pool.submit(_resolver_portafolio, _llamadas, datos, cursos.version, nombre, set(aprobados_codigos),
+                        ciclo_actual, max_cursos, total_ciclos, max_creditos, min_creditos)
+            for nombre in estrategias
+        ]
+        try:
+            for futuro in as_completed(futuros, timeout=tiempo_limite):
+                nombre, plan, backtracks, nodos = futuro.result()
+                # plan == [] sin cancelar: esa estrategia probó que no hay solución
+                if plan is not None:
+                    ganador = (plan, backtracks, nodos, nombre if plan else None)
+                    break
+        except TimeoutError:
+            pass
+        except BrokenProcessPool:
+            _pool_portafolio = None
+            raise
+        finally:
+            _cancelada.value = _llamadas
+            for futuro in futuros:
+                futuro.cancel()
+    return ganador
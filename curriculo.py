@@ -0,0 +1,411 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from functools import cached_property
+
+
+def _bitset(posiciones, n):
+    # Bitset de n bits armado byte a byte: sumar 1 << i es cuadrático en n
+    octetos = bytearray((n + 7) // 8)
+    for i in posiciones:
+        octetos[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(octetos, "little")
+
+
+class Curriculo(list):
+    """
+    Lista de cursos (los mismos dicts de cursos.json) con índices precalculados
+    una sola vez: código→posición, adyacencia de prerrequisitos, grado de salida,
+    descendientes transitivos y disponibilidad por semestre.
+    Se comporta como la lista original, así que el código que recorre `cursos`
+    sigue funcionando igual.
+    """
+
+    def __init__(self, cursos=()):
+        super().__init__(cursos)
+        self.codigos = [c["codigo"] for c in self]
+        self.indice = {cod: i for i, cod in enumerate(self.codigos)}
+        self.por_codigo = {c["codigo"]: c for c in self}
+        self.nombre_a_codigo = {c["nombre"]: c["codigo"] for c in self}
+        self.codigo_a_nombre = {c["codigo"]: c["nombre"] for c in self}
+
+        # Prerrequisitos (entrantes) y dependientes (salientes) por posición
+        self.requisitos = [
+            [self.indice[pr] for pr in dict.fromkeys(c["requisitos"]) if pr in self.indice]
+            for c in self
+        ]
+        self.dependientes = [[] for _ in self]
+        for i, reqs in enumerate(self.requisitos):
+            for r in reqs:
+                self.dependientes[r].append(i)
+        self.grado_salida = [len(d) for d in self.dependientes]
+        # Créditos por posición (0 si el curso no trae el campo)
+        self.creditos = [c.get("creditos", 0) for c in self]
+
+        # Cursos que se ofrecen en cada semestre (1 o 2)
+        self.por_semestre = {}
+        for i, c in enumerate(self):
+            for sem in c.get("semestre", []):
+                self.por_semestre.setdefault(sem, []).append(i)
+
+        # Bitsets: el curso i ocupa el bit i. Un prerrequisito que no existe en
+        # el currículo se marca con un bit fuera de rango que nunca se aprueba.
+        self.mascara_total = (1 << len(self)) - 1
+        bit_inexistente = 1 << len(self)
+        self.mascara_req = []
+        for c, reqs in zip(self, self.requisitos):
+            m = 0
+            for r in reqs:
+                m |= 1 << r
+            if len(reqs) < len(set(c["requisitos"])):
+                m |= bit_inexistente
+            self.mascara_req.append(m)
+        self.mascara_semestre = {
+            sem: _bitset(idxs, len(self))
+            for sem, idxs in self.por_semestre.items()
+        }
+
+    @cached_property
+    def orden_topologico(self):
+        """
+        Orden de Kahn sobre los prerrequisitos. Los cursos que forman un ciclo
+        quedan fuera de la lista.
+        """
+        pendientes = [len(r) for r in self.requisitos]
+        cola = [i for i, p in enumerate(pendientes) if p == 0]
+        for i in cola:
+            for d in self.dependientes[i]:
+                pendientes[d] -= 1
+                if pendientes[d] == 0:
+                    cola.append(d)
+        return cola
+
+    @cached_property
+    def descendientes(self):
+        """
+        Cantidad de cursos que dependen (directa o indirectamente) de cada curso.
+        """
+        mascaras = [0] * len(self)
+        for i in reversed(self.orden_topologico):
+            m = 0
+            for d in self.dependientes[i]:
+                m |= mascaras[d] | (1 << d)
+            mascaras[i] = m
+        return [bin(m).count("1") for m in mascaras]
+
+    @cached_property
+    def cadena(self):
+        """
+        {ciclo: largos}: largos[i] es la cadena de prerrequisitos más larga que
+        arranca en el curso i si se lleva en ese ciclo, en semestres, contando
+        los que se pierden esperando el ciclo en que se ofrece cada dependiente.
+        None si el curso está en un ciclo de prerrequisitos.
+        """
+        cadena = {1: [None] * len(self), 2: [None] * len(self)}
+        for i in reversed(self.orden_topologico):
+            for ciclo in (1, 2):
+                largo = 1
+                for d in self.dependientes[i]:
+                    # El dependiente va en el semestre siguiente o, si solo se
+                    # ofrece en este mismo ciclo, en el subsiguiente
+                    ofrecido = self[d].get("semestre", [])
+                    if 3 - ciclo in ofrecido:
+                        espera, ciclo_d = 1, 3 - ciclo
+                    elif ciclo in ofrecido:
+                        espera, ciclo_d = 2, ciclo
+                    else:
+                        continue
+                    if cadena[ciclo_d][d] is not None:
+                        largo = max(largo, espera + cadena[ciclo_d][d])
+                cadena[ciclo][i] = largo
+        return cadena
+
+    def semestres_tempranos(self, ciclo_inicial=1):
+        """
+        Primer semestre (el 1 es `ciclo_inicial`) en que se puede llevar cada
+        curso partiendo de cero; None si nunca se puede.
+        """
+        tempranos = [None] * len(self)
+        for i in self.orden_topologico:
+            ofrecido = self[i].get("semestre", [])
+            if not (1 in ofrecido or 2 in ofrecido):
+                continue
+            t = 1
+            for r in self.requisitos[i]:
+                if tempranos[r] is None:
+                    break
+                t = max(t, tempranos[r] + 1)
+            else:
+                if (ciclo_inicial if t % 2 else 3 - ciclo_inicial) not in ofrecido:
+                    t += 1
+                tempranos[i] = t
+        return tempranos
+
+    def semestres_tardios(self, final, ciclo_inicial=1):
+        """
+        Último semestre (el 1 es `ciclo_inicial`) en que se puede llevar cada
+        curso sin que sus dependientes terminen después de `final`; None si el
+        curso o algún dependiente no se ofrece o está en un ciclo.
+        """
+        tardios = [None] * len(self)
+        for i in reversed(self.orden_topologico):
+            ofrecido = self[i].get("semestre", [])
+            if not (1 in ofrecido or 2 in ofrecido):
+                continue
+            t = final
+            for d in self.dependientes[i]:
+                if tardios[d] is None:
+                    break
+                t = min(t, tardios[d] - 1)
+            else:
+                if (ciclo_inicial if t % 2 else 3 - ciclo_inicial) not in ofrecido:
+                    t -= 1
+                tardios[i] = t
+        return tardios
+
+    @cached_property
+    def holgura(self):
+        """
+        Holgura de cada curso en el camino crítico del currículo completo (el
+        semestre 1 en el ciclo 1, como en plan_ideal.json): cuántos semestres
+        se puede postergar respecto del primero posible sin alargar la
+        carrera. 0 = crítico; None si el curso no se puede llevar.
+        """
+        tempranos = self.semestres_tempranos(1)
+        final = max(
+            (t + self.cadena[1 if t % 2 else 2][i] - 1 for i, t in enumerate(tempranos) if t is not None),
+            default=0,
+        )
+        tardios = self.semestres_tardios(final, 1)
+        return [
+            None if t is None or tardios[i] is None else tardios[i] - t
+            for i, t in enumerate(tempranos)
+        ]
+
+    @cached_property
+    def rango_critico(self):
+        """
+        {ciclo: rangos}: posición de cada curso en la prioridad "critica" si se
+        lleva en ese ciclo (0 = primero): cadena más larga, luego menos
+        holgura, luego más descendientes. Comparar rangos es O(1).
+        """
+        rangos = {}
+        for ciclo in (1, 2):
+            largos = self.cadena[ciclo]
+            orden = sorted(range(len(self)), key=lambda i: (
+                -(largos[i] or 0),
+                self.holgura[i] if self.holgura[i] is not None else len(self),
+                -self.descendientes[i],
+                i,
+            ))
+            rango = [0] * len(self)
+            for r, i in enumerate(orden):
+                rango[i] = r
+            rangos[ciclo] = rango
+        return rangos
+
+    @cached_property
+    def version(self):
+        """
+        Hash del contenido del currículo: identifica resultados cacheados.
+        """
+        contenido = json.dumps(list(self), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def heuristica(self):
+        return CacheHeuristica(self)
+
+    def rangos(self, prioridad):
+        """
+        rango_critico para la prioridad "critica"; None para la prioridad por
+        defecto de cada planificador.
+        """
+        if prioridad is None:
+            return None
+        if prioridad == "critica":
+            return self.rango_critico
+        raise ValueError(f"Prioridad desconocida: {prioridad}")
+
+    def curso(self, codigo):
+        return self.por_codigo[codigo]
+
+    def dependencias(self, codigo):
+        return self.grado_salida[self.indice[codigo]]
+
+    def mascara(self, codigos):
+        """
+        Convierte códigos en bitset. Los códigos desconocidos se ignoran.
+        """
+        m = 0
+        for cod in codigos:
+            i = self.indice.get(cod)
+            if i is not None:
+                m |= 1 << i
+        return m
+
+    def posiciones(self, mascara):
+        """
+        Posiciones de los bits encendidos, en el orden del currículo.
+        """
+        posiciones = []
+        while mascara:
+            bajo = mascara & -mascara
+            posiciones.append(bajo.bit_length() - 1)
+            mascara ^= bajo
+        return posiciones
+
+    def cursos_de(self, mascara):
+        return [self[i] for i in self.posiciones(mascara)]
+
+    def creditos_de(self, mascara):
+        return sum(self.creditos[i] for i in self.posiciones(mascara))
+
+    def seleccionar(self, posiciones, max_cursos, max_creditos=None):
+        """
+        Toma, en el orden dado, las posiciones que caben en un semestre de
+        max_cursos cursos y max_creditos créditos (None = sin tope); las que no
+        caben se saltan.
+        """
+        if max_creditos is None:
+            return list(posiciones[:max_cursos])
+        elegidas, usados = [], 0
+        for i in posiciones:
+            if len(elegidas) == max_cursos:
+                break
+            if usados + self.creditos[i] <= max_creditos:
+                elegidas.append(i)
+                usados += self.creditos[i]
+        return elegidas
+
+    def cumple_requisitos(self, i, historial):
+        return (self.mascara_req[i] & ~historial) == 0
+
+    def elegibles(self, historial, ciclo=None):
+        """
+        Bitset de cursos no aprobados cuyos prerrequisitos están en `historial`
+        (también un bitset). Si se indica `ciclo`, solo los que se ofrecen en él.
+        """
+        candidatos = self.mascara_total & ~historial
+        if ciclo is not None:
+            candidatos &= self.mascara_semestre.get(ciclo, 0)
+        listos = 0
+        req = self.mascara_req
+        for i in self.posiciones(candidatos):
+            if (req[i] & ~historial) == 0:
+                listos |= 1 << i
+        return listos
+
+
+class CacheHeuristica:
+    """
+    Caché de la prioridad (penalización por año, semestre, -dependencias) de un
+    currículo. Los términos fijos de cada curso se calculan una sola vez; el año
+    mínimo pendiente se guarda junto con el historial (bitset) con que se
+    calculó y, si el nuevo historial solo agrega cursos, se actualiza
+    descontando los nuevos en lugar de recorrer todo el currículo. Los
+    contadores y el estado se actualizan bajo un lock, para compartir el caché
+    entre hilos.
+    """
+
+    def __init__(self, cursos):
+        self.cursos = cursos
+        self.estaticos = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.incrementales = 0
+        self._lock = threading.Lock()
+        self._historial = None
+        self._pendientes_por_anio = None
+        self._min_anio = None
+
+    def __getstate__(self):
+        estado = dict(self.__dict__)
+        del estado["_lock"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def estatico(self, codigo):
+        """
+        (año, semestre, -dependencias) del curso.
+        """
+        with self._lock:
+            clave = self.estaticos.get(codigo)
+            if clave is not None:
+                self.aciertos += 1
+                return clave
+            self.fallos += 1
+            curso = self.cursos.curso(codigo)
+            sem_val = curso["semestre"][0] if isinstance(curso.get("semestre"), list) else curso.get("semestre")
+            clave = (curso["anio"], sem_val, -self.cursos.dependencias(codigo))
+            self.estaticos[codigo] = clave
+            return clave
+
+    def min_anio_pendiente(self, historial):
+        """
+        Año mínimo entre los cursos fuera de `historial` (bitset o conjunto de
+        códigos), o None si no queda ninguno.
+        """
+        if not isinstance(historial, int):
+            historial = self.cursos.mascara(historial)
+        with self._lock:
+            anterior = self._historial
+            if anterior == historial:
+                self.aciertos += 1
+                return self._min_anio
+            if anterior is not None and anterior & ~historial == 0:
+                # Solo se agregaron cursos: descontarlos por año
+                self.incrementales += 1
+                conteo = self._pendientes_por_anio
+                for i in self.cursos.posiciones(historial & ~anterior):
+                    conteo[self.cursos[i]["anio"]] -= 1
+                    if conteo[self.cursos[i]["anio"]] == 0:
+                        del conteo[self.cursos[i]["anio"]]
+            else:
+                self.fallos += 1
+                conteo = Counter(
+                    self.cursos[i]["anio"]
+                    for i in self.cursos.posiciones(self.cursos.mascara_total & ~historial)
+                )
+            self._historial = historial
+            self._pendientes_por_anio = conteo
+            self._min_anio = min(conteo) if conteo else None
+            return self._min_anio
+
+    def prioridad(self, codigo, historial, min_anio=None):
+        """
+        Misma tupla que heuristica_completa / prioridad_compuesta.
+        """
+        anio, sem_val, deps = self.estatico(codigo)
+        if min_anio is None:
+            min_anio = self.min_anio_pendiente(historial)
+        if min_anio is None:
+            min_anio = anio
+        return ((anio - min_anio) * 10, sem_val, deps)
+
+    def ordenar(self, codigos, historial):
+        """
+        Ordena códigos por prioridad calculando el año mínimo una sola vez.
+        """
+        min_anio = self.min_anio_pendiente(historial)
+        return sorted(codigos, key=lambda cod: self.prioridad(cod, historial, min_anio))
+
+    def estadisticas(self):
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "incrementales": self.incrementales,
+        }
+
+
+def indexar(cursos):
+    """
+    Devuelve `cursos` como Curriculo. Si ya viene de cargar_cursos no hace nada.
+    """
+    if isinstance(cursos, Curriculo):
+        return cursos
+    return Curriculo(cursos)
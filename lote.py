@@ -0,0 +1,253 @@
+"""
+Planificación por lotes para cohortes completas.
+
+Lee estudiantes de un archivo JSONL o CSV, reparte bloques de registros entre
+procesos (cada proceso carga el currículo una sola vez al iniciar) y va
+escribiendo un JSONL con el plan, el tiempo y los nodos de cada estudiante.
+En modo greedy los resultados pasan por cache_planes (ver --cache-db); el
+modo entero usa el modelo 0/1 de programacion_entera si hay un motor instalado.
+
+    python lote.py estudiantes.jsonl planes.jsonl --modo greedy --max-cursos 5
+
+Cada registro JSONL tiene la forma
+    {"id": "...", "aprobados": [...], "ciclo": 1, "max_cursos": 5,
+     "max_creditos": 22, "min_creditos": 12, "por_aprobar": [...], "start_year": 2025,
+     "programa": ["computacion", "matematica"], "semestre_actual": 5,
+     "max_segundos": 30, "max_nodos": 1000000}
+donde "aprobados" y "por_aprobar" aceptan nombres o códigos de curso y los
+topes de créditos son opcionales (min_creditos solo lo respetan los modos
+csp y entero). "programa" (un nombre o varios, para doble titulación) elige
+la carrera cuando --cursos es un catálogo (ver catalogo.py). Con un plan ideal
+(--plan-ideal, o el del programa en el catálogo), los registros que traen
+"semestre_actual" (semestre de la carrera que cursa el estudiante) salen con
+"atraso": el resumen de atraso.PlanIdeal.evaluar. --prioridad critica ordena
+por ruta crítica (el greedy y, en modo csp, la estrategia "critica").
+En los modos csp y entero cada estudiante tiene un presupuesto de
+"max_segundos" y "max_nodos" (--max-segundos, 30 por defecto, y --max-nodos):
+el que lo agota sale con "error" y el lote sigue con los demás. En CSV
+las listas van separadas por ";". Los campos que falten toman los valores
+por defecto de la línea de comandos.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from atraso import cargar_plan_ideal, para
+from cache_planes import simular_avance_cacheado
+from catalogo import cargar_planificable, curriculo_de, plan_ideal_de
+from contexto import ContextoBusqueda, PresupuestoAgotado
+from simulador import simular_avance_csp
+
+MODOS = ("greedy", "csp", "entero")
+
+# Currículo o catálogo del proceso trabajador (lo carga _iniciar_trabajador)
+_cursos = None
+
+
+def leer_registros(path):
+    """
+    Generador de registros de estudiantes desde JSONL o CSV.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for fila in csv.DictReader(f):
+                registro = {k: v for k, v in fila.items() if v not in (None, "")}
+                for campo in ("aprobados", "por_aprobar", "programa"):
+                    if campo in registro:
+                        registro[campo] = [x.strip() for x in registro[campo].split(";") if x.strip()]
+                yield registro
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+
+
+def a_nombres(cursos, valores):
+    # Acepta nombres o códigos de curso
+    return [cursos.codigo_a_nombre.get(v, v) for v in valores or []]
+
+
+def _entero_o_none(valor):
+    return None if valor in (None, "") else int(valor)
+
+
+def planificar_estudiante(cursos, registro, modo="greedy", ciclo=1, max_cursos=5, start_year=None,
+                          max_creditos=None, min_creditos=None, programa=None, plan_ideal=None,
+                          prioridad=None, max_segundos=None, max_nodos=None):
+    """
+    Planifica un estudiante y devuelve un dict listo para serializar.
+    `cursos` puede ser un Catalogo; el programa sale del registro o de `programa`.
+    En los modos csp y entero, si se agota el presupuesto (max_segundos,
+    max_nodos) el dict trae "error" en lugar del plan.
+    """
+    programa = registro.get("programa", programa)
+    plan_ideal = plan_ideal or plan_ideal_de(cursos, programa)
+    cursos = curriculo_de(cursos, programa)
+    ciclo = int(registro.get("ciclo", ciclo))
+    max_cursos = int(registro.get("max_cursos", max_cursos))
+    max_creditos = _entero_o_none(registro.get("max_creditos", max_creditos))
+    min_creditos = _entero_o_none(registro.get("min_creditos", min_creditos))
+    start_year = int(registro.get("start_year", start_year or datetime.datetime.now().year))
+    aprobados = a_nombres(cursos, registro.get("aprobados"))
+    por_aprobar = a_nombres(cursos, registro.get("por_aprobar"))
+
+    t0 = time.perf_counter()
+    resultado = {"id": registro.get("id"), "modo": modo}
+    if modo == "greedy":
+        plan, iteraciones, nodos = simular_avance_cacheado(
+            cursos, aprobados, ciclo, max_cursos, start_year, por_aprobar=por_aprobar,
+            max_creditos=max_creditos, prioridad=prioridad,
+        )
+        resultado.update(iteraciones=iteraciones, nodos=nodos)
+    elif modo in ("csp", "entero"):
+        # "entero": modelo 0/1 (CP-SAT o PuLP) si está instalado, si no backtracking
+        max_segundos = registro.get("max_segundos", max_segundos)
+        ctx = ContextoBusqueda(max_nodos=_entero_o_none(registro.get("max_nodos", max_nodos)),
+                               max_segundos=None if max_segundos in (None, "") else float(max_segundos))
+        try:
+            plan, backtracks, nodos = simular_avance_csp(
+                cursos, aprobados + por_aprobar, ciclo, max_cursos, start_year,
+                ctx=ctx, motor="backtracking" if modo == "csp" else "entero",
+                max_creditos=max_creditos, min_creditos=min_creditos,
+                estrategia_busqueda="critica" if prioridad == "critica" else "greedy",
+            )
+        except PresupuestoAgotado:
+            resultado.update(error=f"Presupuesto agotado ({ctx.nodos} nodos, {ctx.transcurrido():.1f} s)",
+                             nodos=ctx.nodos, tiempo=time.perf_counter() - t0)
+            return resultado
+        resultado.update(backtracks=backtracks, nodos=nodos, motor=ctx.motor)
+    else:
+        raise ValueError(f"Modo desconocido: {modo}")
+    if plan_ideal and registro.get("semestre_actual") not in (None, ""):
+        resultado["atraso"] = para(cursos, plan_ideal).evaluar(
+            aprobados + por_aprobar, plan, int(registro["semestre_actual"]), ciclo, start_year, detalle=False
+        )
+    resultado["tiempo"] = time.perf_counter() - t0
+    resultado["semestres"] = len(plan)
+    resultado["plan"] = [
+        {"ciclo": etapa["ciclo"], "año": etapa["año"], "cursos": etapa["cursos"],
+         "creditos": etapa["creditos"]}
+        for etapa in plan
+    ]
+    return resultado
+
+
+def _iniciar_trabajador(path_cursos):
+    global _cursos
+    _cursos = cargar_planificable(path_cursos)
+
+
+def _planificar_bloque(registros, opciones):
+    resultados = []
+    for registro in registros:
+        try:
+            resultados.append(planificar_estudiante(_cursos, registro, **opciones))
+        except Exception as e:
+            resultados.append({"id": registro.get("id"), "error": str(e)})
+    return resultados
+
+
+def _bloques(registros, tam_bloque):
+    bloque = []
+    for registro in registros:
+        bloque.append(registro)
+        if len(bloque) == tam_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def planificar_lote(entrada, salida, path_cursos="cursos.json", modo="greedy",
+                    procesos=None, tam_bloque=64, ciclo=1, max_cursos=5, start_year=None,
+                    max_creditos=None, min_creditos=None, programa=None, plan_ideal=None,
+                    prioridad=None, max_segundos=30.0, max_nodos=None):
+    """
+    Planifica todos los registros de `entrada` y escribe un JSONL en `salida`
+    a medida que terminan los bloques (el orden de salida no es el de entrada).
+    Con procesos=1 todo corre en el proceso actual.
+    Devuelve un resumen con el total de estudiantes, errores y tiempo.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo}")
+    opciones = {"modo": modo, "ciclo": ciclo, "max_cursos": max_cursos, "start_year": start_year,
+                "max_creditos": max_creditos, "min_creditos": min_creditos, "programa": programa,
+                "plan_ideal": plan_ideal, "prioridad": prioridad, "max_segundos": max_segundos,
+                "max_nodos": max_nodos}
+    procesos = procesos or os.cpu_count() or 1
+    resumen = {"estudiantes": 0, "errores": 0}
+    t0 = time.perf_counter()
+
+    def escribir(f, resultados):
+        for r in resultados:
+            resumen["estudiantes"] += 1
+            resumen["errores"] += "error" in r
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        f.flush()
+
+    bloques = _bloques(leer_registros(entrada), tam_bloque)
+    with open(salida, "w", encoding="utf-8") as f:
+        if procesos == 1:
+            _iniciar_trabajador(path_cursos)
+            for bloque in bloques:
+                escribir(f, _planificar_bloque(bloque, opciones))
+        else:
+            with ProcessPoolExecutor(procesos, initializer=_iniciar_trabajador,
+                                     initargs=(path_cursos,)) as pool:
+                # Como mucho dos bloques en vuelo por proceso: la entrada se lee
+                # de a poco en lugar de cargarse entera en memoria
+                en_vuelo = set()
+                for bloque in bloques:
+                    en_vuelo.add(pool.submit(_planificar_bloque, bloque, opciones))
+                    if len(en_vuelo) >= 2 * procesos:
+                        listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                        for futuro in listos:
+                            escribir(f, futuro.result())
+                for futuro in wait(en_vuelo).done:
+                    escribir(f, futuro.result())
+
+    resumen["tiempo"] = time.perf_counter() - t0
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Planificación por lotes de estudiantes")
+    parser.add_argument("entrada", help="JSONL o CSV con un estudiante por registro")
+    parser.add_argument("salida", help="JSONL de resultados")
+    parser.add_argument("--cursos", default="cursos.json", help="Currículo o catálogo de carreras")
+    parser.add_argument("--programa", nargs="+", default=None,
+                        help="Programa (o programas, doble titulación) de los registros que no lo indican")
+    parser.add_argument("--modo", choices=MODOS, default="greedy")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--tam-bloque", type=int, default=64)
+    parser.add_argument("--ciclo", type=int, choices=[1, 2], default=1)
+    parser.add_argument("--max-cursos", type=int, default=5)
+    parser.add_argument("--max-creditos", type=int, default=None)
+    parser.add_argument("--min-creditos", type=int, default=None)
+    parser.add_argument("--start-year", type=int, default=None)
+    parser.add_argument("--plan-ideal", default=None, help="plan_ideal.json para medir el atraso")
+    parser.add_argument("--prioridad", choices=["critica"], default=None,
+                        help="Ordenar por ruta crítica en lugar de la heurística por año")
+    parser.add_argument("--max-segundos", type=float, default=30.0,
+                        help="Presupuesto de tiempo por estudiante en los modos csp y entero")
+    parser.add_argument("--max-nodos", type=int, default=None,
+                        help="Presupuesto de nodos por estudiante en los modos csp y entero")
+    parser.add_argument("--cache-db", default=None,
+                        help="SQLite de resultados compartido con la app (PLANES_CACHE_DB)")
+    args = parser.parse_args()
+    if args.cache_db:
+        # Los procesos hijos heredan el entorno
+        os.environ["PLANES_CACHE_DB"] = args.cache_db
+
+    resumen = planificar_lote(
+        args.entrada, args.salida, args.cursos, args.modo, args.procesos,
+        args.tam_bloque, args.ciclo, args.max_cursos, args.start_year,
+        args.max_creditos, args.min_creditos, args.programa,
+        cargar_plan_ideal(args.plan_ideal) if args.plan_ideal else None, args.prioridad,
+        args.max_segundos, args.max_nodos,
+    )
+    print(json.dumps(resumen, ensure_ascii=False))
@@ -1,19 +1,15 @@
 # main.py (versión reorganizada)
 
-import json
 import time
-import streamlit as st
-import pandas as pd
-from utils import cargar_cursos, cursos_validos, validar_manual
+_inicio = time.perf_counter()
 
-from utils import construir_grafo, mostrar_grafo_pyvis, alertas_riesgo, predecir_graduacion
 import datetime
-from csp_solver import (
-    planificar_toda_la_carrera,
-    contador_backtracks,
-    contador_nodos
-)
-from simulador import simular_avance, simular_avance_csp
+import streamlit as st
+from utils import cargar_cursos, html_grafo, alertas_riesgo
+from simulador import simular_avance_anytime
+# pandas, optimizador, cache_planes y prediccion se importan en las secciones
+# que los usan (como networkx y pyvis en utils): en el primer render sin
+# cursos aprobados no hacen falta
 
 
 # Configuración de la página
@@ -24,8 +20,18 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Estilos CSS personalizados (igual que antes)
-st.markdown("""
+
+@st.cache_resource(show_spinner=False)
+def tiempos_arranque():
+    # Uno por proceso: lo llena la primera ejecución del script
+    return {}
+
+tiempos = tiempos_arranque()
+tiempos.setdefault("importaciones", time.perf_counter() - _inicio)
+
+# Estilos CSS personalizados (igual que antes). Streamlit arma la página de
+# nuevo en cada ejecución, así que se inyectan siempre, pero en un solo bloque
+ESTILOS = """
     <style>
         :root {
             --primary: #2E86AB;
@@ -110,9 +116,6 @@ st.markdown("""
             box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
         }
     </style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
     <style>
         /* Contenedor del multiselect: fondo gris claro y borde para destacarlo */
         .stMultiSelect > div[data-baseweb="select"] {
@@ -135,26 +138,29 @@ st.markdown("""
             color: #1f1f1f !important;
         }
     </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(ESTILOS, unsafe_allow_html=True)
 
 
-# Cargar datos
-@st.cache_data
+# Cargar datos: cache_resource comparte el mismo currículo (con sus índices
+# ya calculados) entre ejecuciones y sesiones, en vez de copiarlo cada vez
+@st.cache_resource(show_spinner=False)
 def load_data():
+    t0 = time.perf_counter()
     cursos = cargar_cursos()
     nombres_por_codigo = {c["codigo"]: c["nombre"] for c in cursos}
-    
-    return cursos, nombres_por_codigo
 
-cursos, nombres_por_codigo = load_data()
+    # Agrupar cursos por año y por ciclo UI (entero)
+    cursos_por_anio_ciclo = {}
+    for c in cursos:
+        anio = c["anio"]
+        # Asegurarnos de que ciclo sea entero: si por error es lista, tomamos el primero
+        ciclo_ui = c["ciclo"][0] if isinstance(c["ciclo"], list) else c["ciclo"]
+        cursos_por_anio_ciclo.setdefault(anio, {}).setdefault(ciclo_ui, []).append(c)
+    tiempos["carga_datos"] = time.perf_counter() - t0
+    return cursos, nombres_por_codigo, cursos_por_anio_ciclo
 
-# Agrupar cursos por año y por ciclo UI (entero)
-cursos_por_anio_ciclo = {}
-for c in cursos:
-    anio = c["anio"]
-    # Asegurarnos de que ciclo sea entero: si por error es lista, tomamos el primero
-    ciclo_ui = c["ciclo"][0] if isinstance(c["ciclo"], list) else c["ciclo"]
-    cursos_por_anio_ciclo.setdefault(anio, {}).setdefault(ciclo_ui, []).append(c)
+cursos, nombres_por_codigo, cursos_por_anio_ciclo = load_data()
 
 
 
@@ -275,6 +281,8 @@ if pagina == "📋 Mi Progreso y Planificación":
                     "Estado": "⌛ Pendiente"
                 })
         
+        import pandas as pd
+
         df_progreso = pd.DataFrame(datos_aprobados)
         
         # Aplicar filtros
@@ -302,7 +310,7 @@ if pagina == "📋 Mi Progreso y Planificación":
     
     # === CONFIGURACIÓN ===
     st.markdown('<div class="subheader"><h2>⚙️ Configuración</h2></div>', unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         ciclo_actual = st.selectbox(
             "Ciclo académico próximo", 
@@ -318,6 +326,23 @@ if pagina == "📋 Mi Progreso y Planificación":
             step=1,
             help="Número máximo de cursos que planeas llevar por ciclo"
         )
+    with col3:
+        max_creditos = st.number_input(
+            "Máximo de créditos por ciclo",
+            min_value=0,
+            value=0,
+            step=1,
+            help="0 = sin límite de créditos"
+        ) or None
+    with col4:
+        min_creditos = st.number_input(
+            "Mínimo de créditos por ciclo",
+            min_value=0,
+            value=0,
+            step=1,
+            help="0 = sin mínimo (los planes óptimo y CSP lo respetan en todos los ciclos salvo el último; "
+                 "el greedy solo avisa)"
+        ) or None
     
     
     st.markdown('<div class="subheader"><h2>📅 </h2></div>', unsafe_allow_html=True)
@@ -330,9 +355,13 @@ if pagina == "📋 Mi Progreso y Planificación":
     
     modo_recomendacion = st.radio(
     "Modo de recomendación:",
-    ["Solo próximo ciclo", "🧠 Greedy completo"],
+    ["Solo próximo ciclo", "🧠 Greedy completo", "🏆 Óptimo (mínimo de semestres)", "⏱️ CSP con tiempo límite"],
     horizontal=True
 )
+    prioridad = "critica" if st.checkbox(
+        "Priorizar la ruta crítica",
+        help="Primero los cursos con la cadena de prerrequisitos más larga (solo próximo ciclo y greedy)"
+    ) else None
 
     
     if st.button("🎯 Generar Recomendación", use_container_width=True, key="btn_recomendar"):
@@ -341,7 +370,11 @@ if pagina == "📋 Mi Progreso y Planificación":
 
             # 1) Solo próximo ciclo
             if modo_recomendacion == "Solo próximo ciclo":
-                recomendados = cursos_validos(cursos, aprobados_nombres, ciclo_actual, max_cursos)
+                import pandas as pd
+                from cache_planes import cursos_validos_cacheado
+
+                recomendados = cursos_validos_cacheado(cursos, aprobados_nombres, ciclo_actual, max_cursos,
+                                                       max_creditos=max_creditos, prioridad=prioridad)
                 if recomendados:
                     st.success("📋 Cursos para el próximo ciclo:")
                     st.dataframe(
@@ -354,9 +387,12 @@ if pagina == "📋 Mi Progreso y Planificación":
 
             # 2) Greedy completo
             elif modo_recomendacion == "🧠 Greedy completo":
+                from cache_planes import simular_avance_cacheado
+
                 t0 = time.time()
-                plan_sim, iter_greedy, nodos_greedy = simular_avance(
-                    cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year
+                plan_sim, iter_greedy, nodos_greedy = simular_avance_cacheado(
+                    cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year,
+                    max_creditos=max_creditos, prioridad=prioridad
                 )
                 elapsed_greedy = time.time() - t0
 
@@ -365,27 +401,113 @@ if pagina == "📋 Mi Progreso y Planificación":
                 st.metric("🔄 Iteraciones",      iter_greedy)
                 st.metric("🔎 Nodos explorados", nodos_greedy)
 
+            # 3) Óptimo por ramificación y acotamiento
+            elif modo_recomendacion == "🏆 Óptimo (mínimo de semestres)":
+                from optimizador import planificar_optimo
+
+                t0 = time.time()
+                plan_sim, stats_opt = planificar_optimo(
+                    cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year,
+                    max_creditos=max_creditos, min_creditos=min_creditos
+                )
+                elapsed_opt = time.time() - t0
+
+                st.subheader("📊 Métricas Óptimo")
+                st.metric("⏱️ Tiempo (s)",      f"{elapsed_opt:.3f}")
+                st.metric("📆 Semestres",        stats_opt["semestres"])
+                st.metric("🔎 Nodos explorados", stats_opt["nodos"])
+                if not stats_opt["factible"]:
+                    st.error("❌ Hay cursos pendientes que no se pueden llegar a llevar.")
+                elif not stats_opt["respeta_minimo"]:
+                    st.error("❌ No se encontró un plan que llegue al mínimo de créditos; se muestra el de listas.")
+                elif stats_opt["optimo"]:
+                    st.success("✅ Plan demostrado óptimo: no existe uno con menos semestres.")
+                else:
+                    st.warning(f"⚠️ Se agotó el presupuesto de búsqueda; la cota inferior es {stats_opt['cota_inferior']} semestres.")
+
+            # 4) CSP anytime: responde en el tiempo fijado con el mejor plan hallado
+            elif modo_recomendacion == "⏱️ CSP con tiempo límite":
+                t0 = time.time()
+                plan_sim, back_csp, nodos_csp, info_csp = simular_avance_anytime(
+                    cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year, max_segundos=2.0,
+                    max_creditos=max_creditos, min_creditos=min_creditos
+                )
+                elapsed_csp = time.time() - t0
+
+                st.subheader("📊 Métricas CSP")
+                st.metric("⏱️ Tiempo (s)",      f"{elapsed_csp:.3f}")
+                st.metric("📆 Semestres",        info_csp["semestres"])
+                st.metric("🔎 Nodos explorados", nodos_csp)
+                if info_csp["sin_ubicar"]:
+                    st.error(f"❌ {len(info_csp['sin_ubicar'])} cursos pendientes no se pueden llegar a llevar.")
+                if not info_csp["respeta_minimo"]:
+                    st.error("❌ No se encontró un plan que llegue al mínimo de créditos; se muestra el de listas.")
+                if info_csp["optimo"]:
+                    st.success("✅ No existe un plan con menos semestres.")
+                elif info_csp["agotado"]:
+                    st.warning("⚠️ Se agotó el tiempo; se muestra el mejor plan encontrado.")
+
                 # — Mostrar plan SEMESTRE A SEMESTRE — 
-            if modo_recomendacion == "🧠 Greedy completo" and plan_sim:
+            if modo_recomendacion != "Solo próximo ciclo" and plan_sim:
+                import pandas as pd
+
                 st.subheader("🗓️ Plan semestre a semestre")
+                for alerta in alertas_riesgo(plan_sim, max_cursos, max_creditos, min_creditos):
+                    st.warning(f"⚠️ {alerta}")
                 for etapa in plan_sim:
-                    with st.expander(f"Ciclo {etapa['ciclo']} — Año {etapa['año']}", expanded=False):
+                    with st.expander(f"Ciclo {etapa['ciclo']} — Año {etapa['año']} — {etapa['creditos']} créditos",
+                                     expanded=False):
                         df = pd.DataFrame([{"Curso": n} for n in etapa["cursos"]])
                         st.dataframe(df, hide_index=True, use_container_width=True)
 
+    # === SENSIBILIDAD DE LA FECHA DE GRADUACIÓN ===
+    st.markdown('<div class="subheader"><h2>📈 ¿Cuándo me gradúo?</h2></div>', unsafe_allow_html=True)
+    reprobar_sens = st.multiselect(
+        "¿Y si repruebo...?",
+        [nombres_por_codigo[c] for c in aprobados_codigos],
+        help="Cada curso elegido agrega un escenario en que se vuelve a llevar"
+    )
+    if st.button("📈 Ver tabla de sensibilidad", use_container_width=True, key="btn_sensibilidad"):
+        from prediccion import tabla_sensibilidad
+
+        filas = tabla_sensibilidad(
+            cursos, [nombres_por_codigo[c] for c in aprobados_codigos], datetime.datetime.now().year,
+            reprobar=reprobar_sens, max_creditos=max_creditos
+        )
+        import pandas as pd
+
+        df_sens = pd.DataFrame([{
+            "Cursos por ciclo": f["max_cursos"],
+            "Ciclo inicial":    f["ciclo"],
+            "Escenario":        f"Repruebo {f['reprobado']}" if f["reprobado"] else "Base",
+            "Graduación":       f["fecha"] or "Más de 12 ciclos",
+        } for f in filas])
+        st.dataframe(
+            df_sens.pivot_table(index="Cursos por ciclo", columns=["Ciclo inicial", "Escenario"],
+                                values="Graduación", aggfunc="first", sort=False),
+            use_container_width=True
+        )
+
 
 
     # ——————————————————————————————————————
 # 🔗 Grafo de prerequisitos (en la misma página)
 if st.button("🖇️ Ver grafo de prerequisitos", use_container_width=True):
     with st.spinner("Generando grafo..."):
-        G = construir_grafo(cursos)
-        html_file = mostrar_grafo_pyvis(G, aprobados=aprobados_codigos)
-        # lo mostramos embebido
+        # HTML en memoria, cacheado por versión del currículo: solo cambian los colores
         st.components.v1.html(
-            open(html_file, 'r', encoding='utf-8').read(),
+            html_grafo(cursos, aprobados=aprobados_codigos),
             height=600,
             scrolling=True
         )
         st.markdown("**🔹 Azul = aprobado • 🟠 Naranja = pendiente**")
 # ——————————————————————————————————————
+
+# === TIEMPOS DE ARRANQUE ===
+# Importaciones y primer render son los del proceso (arranque en frío de la
+# réplica); la última ejecución se mide en cada rerun
+tiempos.setdefault("primer_render", time.perf_counter() - _inicio)
+tiempos["ultima_ejecucion"] = time.perf_counter() - _inicio
+with st.sidebar.expander("⏱️ Tiempos de arranque", expanded=False):
+    for fase, segundos in tiempos.items():
+        st.text(f"{fase}: {segundos * 1000:.0f} ms")
@@ -0,0 +1,277 @@
+from itertools import combinations
+
+from contexto import BusquedaCancelada, ContextoBusqueda
+from csp_solver import paridad
+from curriculo import indexar
+
+INF = float("inf")
+
+
+def colas_criticas(cursos, restantes):
+    """
+    Para cada curso restante y cada ciclo p (1 o 2), cuántos semestres hacen
+    falta, contando el propio, para terminar la cadena de dependientes restantes
+    si el curso se lleva en un semestre de ciclo p (INF si no se ofrece en p).
+    Se cuentan los huecos por paridad: un dependiente que solo se ofrece en el
+    mismo ciclo obliga a esperar dos semestres.
+    """
+    cursos = indexar(cursos)
+    colas = {}
+    for i in reversed(cursos.orden_topologico):
+        if not restantes >> i & 1:
+            continue
+        sem = cursos[i]["semestre"]
+        par = []
+        for p in (1, 2):
+            if p not in sem or cursos.mascara_req[i] >> len(cursos):
+                par.append(INF)
+                continue
+            largo = 1
+            for d in cursos.dependientes[i]:
+                if d in colas:
+                    largo = max(largo, min(1 + colas[d][2 - p], 2 + colas[d][p - 1]))
+            par.append(largo)
+        colas[i] = par
+    return colas
+
+
+def cota_inferior(cursos, restantes, ciclo, max_cursos, max_creditos=None):
+    """
+    Cota admisible de semestres que faltan desde un semestre de ciclo `ciclo`:
+    el máximo entre la ruta crítica (con paridad), ceil(restantes / max_cursos),
+    ceil(créditos restantes / max_creditos) y los semestres necesarios para los
+    cursos que solo se ofrecen en un ciclo. Devuelve (cota, colas).
+    """
+    cursos = indexar(cursos)
+    colas = colas_criticas(cursos, restantes)
+    n = bin(restantes).count("1")
+    if len(colas) < n:
+        # Hay cursos restantes dentro de un ciclo de prerrequisitos
+        return INF, colas
+
+    cota = -(-n // max_cursos)
+    if max_creditos:
+        cota = max(cota, -(-cursos.creditos_de(restantes) // max_creditos))
+    for i, par in colas.items():
+        if cursos.mascara_req[i] & restantes == 0:
+            cota = max(cota, min(par[ciclo - 1], 1 + par[2 - ciclo]))
+
+    for p in (1, 2):
+        solo_p = restantes & cursos.mascara_semestre.get(p, 0) & ~cursos.mascara_semestre.get(3 - p, 0)
+        k = -(-bin(solo_p).count("1") // max_cursos)
+        if k:
+            cota = max(cota, 2 * k - 1 if p == ciclo else 2 * k)
+    return cota, colas
+
+
+def plan_por_listas(cursos, historial, ciclo_inicial, max_cursos, max_creditos=None):
+    """
+    Solución inicial: cada semestre toma los cursos disponibles con la cola
+    crítica más larga. Devuelve la lista de bitsets por semestre o None.
+    """
+    cursos = indexar(cursos)
+    colas = colas_criticas(cursos, cursos.mascara_total & ~historial)
+    semestres, vacios = [], 0
+    while cursos.mascara_total & ~historial:
+        ciclo = paridad(len(semestres) + 1, ciclo_inicial)
+        elegibles = cursos.posiciones(cursos.elegibles(historial, ciclo))
+        if not elegibles:
+            vacios += 1
+            if vacios == 2:
+                return None
+            semestres.append(0)
+            continue
+        vacios = 0
+        elegibles.sort(key=lambda i: (-colas.get(i, (0, 0))[ciclo - 1], -cursos.descendientes[i]))
+        m = 0
+        for i in cursos.seleccionar(elegibles, max_cursos, max_creditos):
+            m |= 1 << i
+        if not m:
+            return None
+        semestres.append(m)
+        historial |= m
+    return semestres
+
+
+def subconjuntos_maximales(cursos, libres, k, max_creditos):
+    """
+    Subconjuntos de `libres` (en orden de combinations) de hasta k cursos y
+    max_creditos créditos a los que no se puede agregar ningún otro libre:
+    llevar un curso antes nunca empeora el plan, así que los demás sobran.
+    """
+    for tam in range(min(k, len(libres)), -1, -1):
+        for resto in combinations(libres, tam):
+            usados = sum(cursos.creditos[i] for i in resto)
+            if usados > max_creditos:
+                continue
+            if tam < k and any(
+                i not in resto and usados + cursos.creditos[i] <= max_creditos for i in libres
+            ):
+                continue
+            yield resto
+
+
+def planificar_optimo(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year,
+                      por_aprobar=None, max_nodos=200000, ctx=None, max_creditos=None, min_creditos=None):
+    """
+    Plan con el mínimo número de semestres para graduarse, con a lo sumo
+    max_cursos cursos y max_creditos créditos por semestre, por ramificación y
+    acotamiento sobre el conjunto de aprobados (bitset). Devuelve el plan con
+    el mismo formato que simular_avance y un dict de estadísticas; si
+    "optimo" es True, ningún plan usa menos de "semestres" semestres.
+    Con min_creditos, cada semestre con cursos salvo el último lleva al menos
+    esos créditos (o queda vacío): se prueban todos los subconjuntos que
+    llegan al mínimo, no solo los maximales. Si no hay plan que lo respete,
+    se devuelve el de la planificación por listas con "respeta_minimo" en
+    False.
+    El presupuesto es el de `ctx` o, si no se da, `max_nodos` nodos.
+    """
+    if ctx is None:
+        ctx = ContextoBusqueda(max_nodos=max_nodos)
+    nodos0 = ctx.nodos
+    cursos = indexar(cursos)
+    nombre_a_codigo = cursos.nombre_a_codigo
+    historial = cursos.mascara(nombre_a_codigo.get(n) for n in aprobados_nombres)
+    if por_aprobar:
+        historial |= cursos.mascara(nombre_a_codigo.get(n) for n in por_aprobar)
+
+    stats = {
+        "semestres": 0, "cota_inferior": 0, "optimo": True, "factible": True,
+        "nodos": 0, "podas_cota": 0, "podas_memo": 0, "mejoras": 0, "estados_memo": 0,
+        "respeta_minimo": True,
+    }
+    cota_raiz, _ = cota_inferior(cursos, cursos.mascara_total & ~historial, ciclo_actual, max_cursos,
+                                 max_creditos)
+    inicial = plan_por_listas(cursos, historial, ciclo_actual, max_cursos, max_creditos)
+    if cota_raiz == INF or inicial is None:
+        stats["factible"] = False
+        return [], stats
+
+    def llega_al_minimo(m, hist):
+        # Un semestre vacío o el que termina la carrera no necesitan el mínimo
+        return (not min_creditos or not m or (hist | m) == cursos.mascara_total
+                or cursos.creditos_de(m) >= min_creditos)
+
+    # mejor[0]: incumbente; techo[0]: sus semestres (INF si la de listas no
+    # llega al mínimo de créditos)
+    mejor = [inicial]
+    techo = [len(inicial)]
+    historial_listas = historial
+    for m in inicial:
+        if not llega_al_minimo(m, historial_listas):
+            techo[0] = INF
+            break
+        historial_listas |= m
+    camino = []
+    # (historial, ciclo) → menor cantidad de semestres con que se alcanzó
+    visitados = {}
+
+    def buscar(hist, g):
+        ctx.nodo(g)
+        restantes = cursos.mascara_total & ~hist
+        if not restantes:
+            if g < techo[0]:
+                mejor[0] = list(camino)
+                techo[0] = g
+                stats["mejoras"] += 1
+            return
+
+        ciclo = paridad(g + 1, ciclo_actual)
+        if visitados.get((hist, ciclo), INF) <= g:
+            ctx.podar("memo")
+            return
+        visitados[(hist, ciclo)] = g
+
+        cota, colas = cota_inferior(cursos, restantes, ciclo, max_cursos, max_creditos)
+        if g + cota >= techo[0]:
+            ctx.podar("cota")
+            return
+
+        elegibles = cursos.posiciones(cursos.elegibles(hist, ciclo))
+        if not elegibles:
+            camino.append(0)
+            buscar(hist, g + 1)
+            camino.pop()
+            return
+
+        if len(elegibles) <= max_cursos and not min_creditos and (
+                not max_creditos or sum(cursos.creditos[i] for i in elegibles) <= max_creditos):
+            # Llevar todo lo disponible nunca empeora el plan
+            opciones = [elegibles]
+        else:
+            # Cursos que, si se posponen, ya no permiten mejorar la incumbente
+            def pospuesto(i):
+                return g + min(1 + colas[i][2 - ciclo], 2 + colas[i][ciclo - 1])
+            forzados = [i for i in elegibles if pospuesto(i) >= techo[0]]
+            if len(forzados) > max_cursos:
+                ctx.podar("cota")
+                return
+            libres = sorted(
+                (i for i in elegibles if i not in forzados),
+                key=lambda i: (-colas[i][ciclo - 1], -cursos.descendientes[i]),
+            )
+            k = max_cursos - len(forzados)
+            disponibles = None
+            if max_creditos:
+                disponibles = max_creditos - sum(cursos.creditos[i] for i in forzados)
+                if disponibles < 0:
+                    ctx.podar("cota")
+                    return
+            if min_creditos:
+                # Con mínimo de créditos llevar más no siempre conviene: un
+                # curso guardado puede completar el mínimo de un semestre
+                # posterior. Se prueban todos, de los más grandes al vacío
+                restos = (
+                    resto for tam in range(min(k, len(libres)), -1, -1) for resto in combinations(libres, tam)
+                    if disponibles is None or sum(cursos.creditos[i] for i in resto) <= disponibles
+                )
+            elif max_creditos:
+                restos = subconjuntos_maximales(cursos, libres, k, disponibles)
+            else:
+                restos = combinations(libres, min(k, len(libres)))
+            opciones = (forzados + list(resto) for resto in restos)
+
+        for opcion in opciones:
+            m = 0
+            for i in opcion:
+                m |= 1 << i
+            if not llega_al_minimo(m, hist):
+                ctx.podar("minimo_creditos")
+                continue
+            camino.append(m)
+            buscar(hist | m, g + 1)
+            camino.pop()
+            if g + cota >= techo[0]:
+                break
+
+    podas_cota, podas_memo = ctx.podas["cota"], ctx.podas["memo"]
+    with ctx.cronometro("busqueda"):
+        try:
+            buscar(historial, 0)
+        except BusquedaCancelada:
+            # Presupuesto agotado: queda la mejor solución encontrada
+            stats["optimo"] = False
+
+    if techo[0] == INF:
+        stats["respeta_minimo"] = False
+        stats["optimo"] = False
+    stats["semestres"] = len(mejor[0])
+    stats["cota_inferior"] = cota_raiz
+    stats["nodos"] = ctx.nodos - nodos0
+    stats["podas_cota"] = ctx.podas["cota"] - podas_cota
+    stats["podas_memo"] = ctx.podas["memo"] - podas_memo
+    stats["estados_memo"] = len(visitados)
+
+    plan = []
+    for s, m in enumerate(mejor[0]):
+        if not m:
+            continue
+        seleccion = cursos.cursos_de(m)
+        plan.append({
+            "ciclo":    paridad(s + 1, ciclo_actual),
+            "año":      start_year + s // 2,
+            "cursos":   [c["nombre"] for c in seleccion],
+            "detalles": seleccion,
+            "creditos": sum(c.get("creditos", 0) for c in seleccion)
+        })
+    return plan, stats
@@ -0,0 +1,107 @@
+"""
+Predicción de la fecha de graduación para muchos escenarios a la vez.
+
+Cada escenario es un dict con "ciclo" (ciclo inicial, 1 o 2), "max_cursos" y,
+opcionalmente, "max_creditos" y "reprobar" (nombres o códigos de cursos
+aprobados que se suponen reprobados). Todos avanzan juntos semestre a
+semestre con la misma regla que predecir_graduacion: en cada semestre se
+llevan los cursos disponibles con más dependientes directos, sin pasar de los
+topes, y un semestre sin cursos disponibles también cuenta. El estado de cada
+escenario es un bitset de aprobados, así que los que llegan al mismo estado
+comparten el paso siguiente.
+"""
+from csp_solver import paridad
+from curriculo import indexar
+
+MAX_SEMESTRES = 12
+
+
+def _orden_importancia(cursos):
+    # Posición de cada curso en el orden de ordenar_por_importancia (estable:
+    # a igual cantidad de dependientes, el orden del currículo)
+    orden = sorted(range(len(cursos)), key=lambda i: -cursos.grado_salida[i])
+    rango = [0] * len(cursos)
+    for r, i in enumerate(orden):
+        rango[i] = r
+    return rango
+
+
+def predecir_escenarios(cursos, aprobados_nombres, escenarios, start_year, max_semestres=MAX_SEMESTRES):
+    """
+    Devuelve una fila por escenario (en el mismo orden) con el escenario y
+      - semestres: cuántos hacen falta (0 si ya está graduado, None si no
+        termina en max_semestres);
+      - año, ciclo: último semestre, con el semestre 1 en start_year;
+      - fecha: "Graduado", "Semestre <año>-<ciclo>" o None.
+    """
+    cursos = indexar(cursos)
+    rango = _orden_importancia(cursos)
+    nombre_a_codigo = cursos.nombre_a_codigo
+    base = cursos.mascara(nombre_a_codigo.get(n) for n in aprobados_nombres)
+    total = cursos.mascara_total
+
+    historial = []
+    for e in escenarios:
+        reprobados = cursos.mascara(nombre_a_codigo.get(x, x) for x in e.get("reprobar") or ())
+        historial.append(base & ~reprobados)
+    semestres = [0 if h & total == total else None for h in historial]
+    activos = [k for k, s in enumerate(semestres) if s is None]
+
+    # Memo del paso: (historial, ciclo) → elegibles en orden de importancia, y
+    # (historial, ciclo, max_cursos, max_creditos) → historial siguiente
+    elegibles = {}
+    pasos = {}
+    for s in range(1, max_semestres + 1):
+        siguientes = []
+        for k in activos:
+            e = escenarios[k]
+            h = historial[k]
+            ciclo = paridad(s, e["ciclo"])
+            clave = (h, ciclo, e["max_cursos"], e.get("max_creditos"))
+            nuevo = pasos.get(clave)
+            if nuevo is None:
+                lista = elegibles.get((h, ciclo))
+                if lista is None:
+                    lista = sorted(cursos.posiciones(cursos.elegibles(h, ciclo)), key=rango.__getitem__)
+                    elegibles[(h, ciclo)] = lista
+                nuevo = h
+                for i in cursos.seleccionar(lista, e["max_cursos"], e.get("max_creditos")):
+                    nuevo |= 1 << i
+                pasos[clave] = nuevo
+            historial[k] = nuevo
+            if nuevo & total == total:
+                semestres[k] = s
+            else:
+                siguientes.append(k)
+        activos = siguientes
+        if not activos:
+            break
+
+    filas = []
+    for e, s in zip(escenarios, semestres):
+        fila = dict(e, semestres=s, año=None, ciclo_final=None, fecha=None)
+        if s == 0:
+            fila["fecha"] = "Graduado"
+        elif s is not None:
+            fila["año"] = start_year + (s - 1) // 2
+            fila["ciclo_final"] = paridad(s, e["ciclo"])
+            fila["fecha"] = f"Semestre {fila['año']}-{fila['ciclo_final']}"
+        filas.append(fila)
+    return filas
+
+
+def tabla_sensibilidad(cursos, aprobados_nombres, start_year, max_cursos=range(1, 9), ciclos=(1, 2),
+                       reprobar=(), max_creditos=None, max_semestres=MAX_SEMESTRES):
+    """
+    Fecha de graduación para cada combinación de ciclo inicial, max_cursos y
+    "si repruebo X" (X en `reprobar`, más el escenario sin reprobar nada).
+    Devuelve las filas de predecir_escenarios, con "reprobado" (None o X).
+    """
+    escenarios = [
+        {"ciclo": ciclo, "max_cursos": mc, "max_creditos": max_creditos,
+         "reprobado": x, "reprobar": [x] if x else []}
+        for ciclo in ciclos
+        for mc in max_cursos
+        for x in [None, *reprobar]
+    ]
+    return predecir_escenarios(cursos, aprobados_nombres, escenarios, start_year, max_semestres)
@@ -0,0 +1,196 @@
+"""
+Modelo 0/1 de la planificación de toda la carrera.
+
+x[curso, t] = 1 si el curso pendiente se lleva en el semestre absoluto t. Cada
+curso va en exactamente un semestre de su dominio (que ya respeta la paridad
+de apertura y las cotas por cadenas de prerrequisitos), cada semestre lleva a
+lo sumo max_cursos cursos y max_creditos créditos, cada curso va después de
+sus prerrequisitos pendientes y se minimiza el último semestre usado. Con
+min_creditos, los semestres antes del último llevan al menos esos créditos o
+ninguno (usado[t] indica si el semestre t lleva cursos; ultimo_t[t], si es el
+último).
+
+Se resuelve con OR-Tools CP-SAT o con PuLP + CBC si están instalados; son
+dependencias opcionales y, si no hay ninguna, planificar_toda_la_carrera usa
+el backtracking.
+"""
+from csp_solver import construir_dominios
+from curriculo import indexar
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+try:
+    import pulp
+except ImportError:
+    pulp = None
+
+MOTORES = ("cpsat", "pulp")
+
+
+class MotorNoDisponible(Exception):
+    """
+    La biblioteca del motor pedido no está instalada.
+    """
+
+
+def motores_disponibles():
+    disponibles = []
+    if cp_model is not None:
+        disponibles.append("cpsat")
+    if pulp is not None:
+        disponibles.append("pulp")
+    return disponibles
+
+
+def _restricciones(cursos, dominio, max_cursos, total_ciclos):
+    # (candidatos por semestre, los que tienen más que max_cursos, pares (curso, prerrequisito))
+    por_semestre = {t: [] for t in range(1, total_ciclos + 1)}
+    for cod, dom in dominio.items():
+        for t in dom:
+            por_semestre[t].append(cod)
+    capacidad = {t: cods for t, cods in por_semestre.items() if len(cods) > max_cursos}
+    precedencias = [
+        (cod, cursos.codigos[r])
+        for cod in dominio
+        for r in cursos.requisitos[cursos.indice[cod]]
+        if cursos.codigos[r] in dominio
+    ]
+    return por_semestre, capacidad, precedencias
+
+def _credito(cursos, cod):
+    return cursos.creditos[cursos.indice[cod]]
+
+
+def _resolver_cpsat(cursos, dominio, max_cursos, total_ciclos, tiempo_limite, max_creditos, min_creditos):
+    modelo = cp_model.CpModel()
+    x = {}
+    for cod, dom in dominio.items():
+        i = cursos.indice[cod]
+        for t in dom:
+            x[cod, t] = modelo.NewBoolVar(f"x_{i}_{t}")
+        modelo.AddExactlyOne(x[cod, t] for t in dom)
+    semestre = {cod: sum(t * x[cod, t] for t in dom) for cod, dom in dominio.items()}
+
+    por_semestre, capacidad, precedencias = _restricciones(cursos, dominio, max_cursos, total_ciclos)
+    for t, cods in capacidad.items():
+        modelo.Add(sum(x[cod, t] for cod in cods) <= max_cursos)
+    for cod, req in precedencias:
+        modelo.Add(semestre[cod] >= semestre[req] + 1)
+    creditos = {t: sum(_credito(cursos, cod) * x[cod, t] for cod in cods) for t, cods in por_semestre.items()}
+    if max_creditos:
+        for t, cods in por_semestre.items():
+            if sum(_credito(cursos, cod) for cod in cods) > max_creditos:
+                modelo.Add(creditos[t] <= max_creditos)
+
+    ultimo = modelo.NewIntVar(0, total_ciclos, "ultimo")
+    for cod in dominio:
+        modelo.Add(ultimo >= semestre[cod])
+    if min_creditos:
+        ultimo_t = {t: modelo.NewBoolVar(f"ultimo_{t}") for t in por_semestre}
+        modelo.AddExactlyOne(ultimo_t.values())
+        modelo.Add(ultimo == sum(t * v for t, v in ultimo_t.items()))
+        for t, cods in por_semestre.items():
+            if not cods:
+                continue
+            usado = modelo.NewBoolVar(f"usado_{t}")
+            for cod in cods:
+                modelo.AddImplication(x[cod, t], usado)
+            modelo.Add(creditos[t] >= min_creditos).OnlyEnforceIf([usado, ultimo_t[t].Not()])
+    modelo.Minimize(ultimo)
+
+    solver = cp_model.CpSolver()
+    if tiempo_limite is not None:
+        solver.parameters.max_time_in_seconds = tiempo_limite
+    estado = solver.Solve(modelo)
+    if estado == cp_model.INFEASIBLE:
+        return None, "infactible"
+    if estado not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, "desconocido"
+    asign = {cod: t for (cod, t), var in x.items() if solver.Value(var)}
+    return asign, "optimo" if estado == cp_model.OPTIMAL else "factible"
+
+
+def _resolver_pulp(cursos, dominio, max_cursos, total_ciclos, tiempo_limite, max_creditos, min_creditos):
+    problema = pulp.LpProblem("plan_carrera", pulp.LpMinimize)
+    x = {}
+    for cod, dom in dominio.items():
+        i = cursos.indice[cod]
+        for t in dom:
+            x[cod, t] = pulp.LpVariable(f"x_{i}_{t}", cat="Binary")
+        problema += pulp.lpSum(x[cod, t] for t in dom) == 1
+    semestre = {cod: pulp.lpSum(t * x[cod, t] for t in dom) for cod, dom in dominio.items()}
+
+    ultimo = pulp.LpVariable("ultimo", lowBound=0, upBound=total_ciclos)
+    problema += ultimo
+    por_semestre, capacidad, precedencias = _restricciones(cursos, dominio, max_cursos, total_ciclos)
+    for t, cods in capacidad.items():
+        problema += pulp.lpSum(x[cod, t] for cod in cods) <= max_cursos
+    for cod, req in precedencias:
+        problema += semestre[cod] >= semestre[req] + 1
+    for cod in dominio:
+        problema += ultimo >= semestre[cod]
+    creditos = {
+        t: pulp.lpSum(_credito(cursos, cod) * x[cod, t] for cod in cods)
+        for t, cods in por_semestre.items()
+    }
+    if max_creditos:
+        for t, cods in por_semestre.items():
+            if sum(_credito(cursos, cod) for cod in cods) > max_creditos:
+                problema += creditos[t] <= max_creditos
+    if min_creditos:
+        ultimo_t = {t: pulp.LpVariable(f"ultimo_{t}", cat="Binary") for t in por_semestre}
+        problema += pulp.lpSum(ultimo_t.values()) == 1
+        problema += ultimo == pulp.lpSum(t * v for t, v in ultimo_t.items())
+        for t, cods in por_semestre.items():
+            if not cods:
+                continue
+            usado = pulp.LpVariable(f"usado_{t}", cat="Binary")
+            for cod in cods:
+                problema += usado >= x[cod, t]
+            # Big-M: la cota se apaga si el semestre está vacío o es el último
+            problema += creditos[t] >= min_creditos * (usado - ultimo_t[t])
+
+    problema.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=tiempo_limite))
+    estado = pulp.LpStatus[problema.status]
+    if estado == "Infeasible":
+        return None, "infactible"
+    asign = {cod: t for (cod, t), var in x.items() if (var.value() or 0) > 0.5}
+    if estado != "Optimal" or len(asign) < len(dominio):
+        # CBC cortado por tiempo sin solución entera
+        return None, "desconocido"
+    # Con límite de tiempo, CBC informa "Optimal" también para la mejor solución hallada
+    return asign, "optimo" if problema.sol_status == pulp.LpSolutionOptimal else "factible"
+
+
+def resolver_entero(cursos, aprobados_codigos, ciclo_actual, max_cursos, total_ciclos,
+                    motor=None, tiempo_limite=None, max_creditos=None, min_creditos=None):
+    """
+    Resuelve el modelo 0/1 con `motor` ("cpsat", "pulp" o None para el primero
+    instalado) y los topes de créditos por semestre, si se dan. Devuelve (asignacion {codigo: semestre absoluto} o None, estado)
+    con estado "optimo", "factible", "infactible" o "desconocido" (se cortó
+    por tiempo sin solución). Lanza MotorNoDisponible si falta la biblioteca.
+    """
+    if motor is None:
+        disponibles = motores_disponibles()
+        if not disponibles:
+            raise MotorNoDisponible("No hay OR-Tools ni PuLP instalados")
+        motor = disponibles[0]
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor}")
+    if motor not in motores_disponibles():
+        raise MotorNoDisponible(f"El motor {motor} no está instalado")
+
+    cursos = indexar(cursos)
+    aprobados_codigos = set(aprobados_codigos)
+    cod_pend = [c["codigo"] for c in cursos if c["codigo"] not in aprobados_codigos]
+    dominio = construir_dominios(cursos, cod_pend, ciclo_actual, max_cursos, total_ciclos, max_creditos)
+    if not cod_pend:
+        return {}, "optimo"
+    if len(cod_pend) > max_cursos * total_ciclos or not all(dominio.values()):
+        return None, "infactible"
+
+    resolver = _resolver_cpsat if motor == "cpsat" else _resolver_pulp
+    return resolver(cursos, dominio, max_cursos, total_ciclos, tiempo_limite, max_creditos, min_creditos)
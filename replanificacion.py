@@ -0,0 +1,190 @@
+"""
+Replanificación incremental: un plan ya hecho más un cambio en la situación
+del estudiante, sin recalcular todo.
+
+Cambios (un dict o una lista de dicts; los cursos por nombre o código):
+  - {"reprobado": curso}: el curso se reprobó, en la etapa del plan donde
+    estaba o, si ya figuraba como aprobado o por aprobar, antes del plan.
+    Sus descendientes (en el DAG de prerrequisitos) que el plan pone después
+    quedan invalidados. Si el curso cabe en una etapa anterior al primero de
+    ellos (mismo ciclo de apertura, con cupo y créditos), se reinserta ahí y
+    no se recalcula nada;
+  - {"por_aprobar": curso}: el curso se está llevando y se da por aprobado;
+    sale del plan;
+  - {"max_cursos": n}: nuevo tope de cursos por semestre.
+
+Cada cambio marca la primera etapa del plan que puede cambiar; las etapas
+anteriores a la primera de todas se conservan tal cual y el resto se vuelve a
+resolver (greedy con su memo de sufijos, o CSP) desde ese semestre, con lo
+anterior como aprobado. Si en el primer semestre a resolver no se ofrece
+ningún pendiente, se empieza en el siguiente (simular_avance, en cambio, corta
+el plan ahí). Con el greedy, un cambio de max_cursos o de por_aprobar da el
+mismo plan que recalcular desde cero cuando el plan original estaba completo.
+Los pendientes que el plan nuevo no alcanza a ubicar van en info["sin_plan"].
+"""
+from curriculo import indexar
+from simulador import simular_avance, simular_avance_csp
+
+MODOS = ("greedy", "csp")
+
+
+def _semestre(etapa, start_year, ciclo_inicial):
+    # Semestre absoluto de una etapa (el 1 es ciclo_inicial de start_year)
+    return 2 * (etapa["año"] - start_year) + (etapa["ciclo"] != ciclo_inicial) + 1
+
+
+def _etapa(cursos, posiciones, semestre, start_year, ciclo_inicial):
+    detalles = [cursos[i] for i in posiciones]
+    return {
+        "ciclo":    ciclo_inicial if semestre % 2 == 1 else 3 - ciclo_inicial,
+        "año":      start_year + (semestre - 1) // 2,
+        "cursos":   [c["nombre"] for c in detalles],
+        "detalles": detalles,
+        "creditos": sum(c.get("creditos", 0) for c in detalles),
+    }
+
+
+def _cierre_descendientes(cursos, i):
+    # Bitset de los descendientes transitivos de i
+    mascara, pila = 0, [i]
+    while pila:
+        for d in cursos.dependientes[pila.pop()]:
+            if not mascara >> d & 1:
+                mascara |= 1 << d
+                pila.append(d)
+    return mascara
+
+
+def replanificar(cursos, plan, aprobados_nombres, ciclo_actual, max_cursos, start_year, cambios,
+                 por_aprobar=None, modo="greedy", max_creditos=None, prioridad=None, ctx=None):
+    """
+    Aplica `cambios` a `plan` (etapas con "año", "ciclo" y "cursos", como las
+    de simular_avance con esos mismos parámetros) y devuelve (plan nuevo,
+    info) con info = {"desde": primera etapa recalculada, "reutilizadas",
+    "recalculadas", "invalidados": códigos, "reinsertados": {codigo: etapa},
+    "max_cursos": tope vigente, "sin_plan": códigos pendientes que el plan
+    nuevo no ubica}. `prioridad` es la de simular_avance; con
+    modo="csp" y prioridad="critica" se usa la estrategia "critica".
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo}")
+    cursos = indexar(cursos)
+    a_codigo = cursos.nombre_a_codigo
+
+    def posicion(curso):
+        i = cursos.indice.get(a_codigo.get(curso, curso))
+        if i is None:
+            raise ValueError(f"Curso desconocido: {curso}")
+        return i
+
+    historial = cursos.mascara(a_codigo.get(n, n) for n in list(aprobados_nombres) + list(por_aprobar or []))
+    semestres = [_semestre(e, start_year, ciclo_actual) for e in plan]
+    etapas = [[posicion(x) for x in e["cursos"]] for e in plan]
+    etapa_de = {i: k for k, pos in enumerate(etapas) for i in pos}
+    if isinstance(cambios, dict):
+        cambios = [cambios]
+
+    def antes_de(k):
+        # Aprobados más todo lo que el plan pone antes de la etapa k
+        m = historial
+        for pos in etapas[:k]:
+            for i in pos:
+                m |= 1 << i
+        return m
+
+    desde = len(etapas)
+    invalidados, reinsertados = 0, {}
+    for cambio in cambios:
+        if "max_cursos" in cambio:
+            nuevo = int(cambio["max_cursos"])
+            # Con menos cupo cambian las etapas que se pasan; con más, las que
+            # iban llenas (las demás ya llevaban todo lo disponible)
+            for k, pos in enumerate(etapas):
+                if len(pos) > nuevo or (nuevo > max_cursos and len(pos) == max_cursos):
+                    desde = min(desde, k)
+                    break
+            max_cursos = nuevo
+        elif "por_aprobar" in cambio:
+            i = posicion(cambio["por_aprobar"])
+            k = etapa_de.pop(i, None)
+            if k is not None:
+                etapas[k].remove(i)
+                desde = min(desde, k)
+            historial |= 1 << i
+            # Sus dependientes pueden adelantarse a la primera etapa de su
+            # ciclo en que ya tengan los demás prerrequisitos
+            for d in cursos.dependientes[i]:
+                if historial >> d & 1:
+                    continue
+                for j in range(min(desde, etapa_de.get(d, len(etapas)))):
+                    if (cursos.mascara_req[d] & ~antes_de(j)) == 0 and plan[j]["ciclo"] in cursos[d]["semestre"]:
+                        desde = min(desde, j)
+                        break
+        elif "reprobado" in cambio:
+            i = posicion(cambio["reprobado"])
+            k = etapa_de.pop(i, -1)
+            if k >= 0:
+                etapas[k].remove(i)
+            historial &= ~(1 << i)
+            desc = _cierre_descendientes(cursos, i)
+            afectadas = [etapa_de[d] for d in cursos.posiciones(desc) if etapa_de.get(d, -1) > k]
+            primera = min(afectadas, default=len(etapas))
+            # Reinsertar en la primera etapa posterior que lo admita, si está
+            # antes del primer descendiente
+            for j in range(k + 1, min(primera, desde)):
+                if (plan[j]["ciclo"] in cursos[i]["semestre"] and len(etapas[j]) < max_cursos
+                        and (max_creditos is None
+                             or sum(cursos.creditos[p] for p in etapas[j]) + cursos.creditos[i] <= max_creditos)
+                        and (cursos.mascara_req[i] & ~antes_de(j)) == 0):
+                    etapas[j].append(i)
+                    etapa_de[i] = j
+                    reinsertados[cursos.codigos[i]] = j
+                    break
+            else:
+                desde = min(desde, primera)
+                invalidados |= desc & ~historial
+        else:
+            raise ValueError(f"Cambio desconocido: {cambio}")
+
+    nuevo_plan = [
+        _etapa(cursos, pos, semestres[k], start_year, ciclo_actual)
+        for k, pos in enumerate(etapas[:desde])
+    ]
+    # Se reinsertó alguno después de `desde`: se vuelve a planificar igual
+    reinsertados = {cod: k for cod, k in reinsertados.items() if k < desde}
+    info = {"desde": desde, "reutilizadas": len(nuevo_plan), "recalculadas": 0,
+            "invalidados": [cursos.codigos[i] for i in cursos.posiciones(invalidados)],
+            "reinsertados": reinsertados, "max_cursos": max_cursos, "sin_plan": []}
+
+    previo = antes_de(desde)
+    if previo & cursos.mascara_total == cursos.mascara_total:
+        return nuevo_plan, info
+    # El resto se resuelve desde el semestre de la etapa `desde` (o el que
+    # sigue al plan) con años relativos, y se traslada
+    if desde < len(semestres):
+        inicio = semestres[desde]
+    else:
+        inicio = semestres[-1] + 1 if semestres else 1
+    ciclo_inicio = ciclo_actual if inicio % 2 == 1 else 3 - ciclo_actual
+    # Si en ese ciclo no se ofrece nada de lo pendiente (un curso reprobado
+    # que solo se abre en el otro, por ejemplo), se empieza en el siguiente
+    if not cursos.elegibles(previo, ciclo_inicio):
+        inicio += 1
+        ciclo_inicio = 3 - ciclo_inicio
+    nombres = [c["nombre"] for c in cursos.cursos_de(previo)]
+    if modo == "greedy":
+        resto, _, _ = simular_avance(cursos, nombres, ciclo_inicio, max_cursos, 0, ctx=ctx,
+                                     max_creditos=max_creditos, prioridad=prioridad)
+    else:
+        estrategia = "critica" if prioridad == "critica" else "greedy"
+        resto, _, _ = simular_avance_csp(cursos, nombres, ciclo_inicio, max_cursos, 0, ctx=ctx,
+                                         max_creditos=max_creditos, estrategia_busqueda=estrategia)
+    for etapa in resto:
+        semestre = inicio + _semestre(etapa, 0, ciclo_inicio) - 1
+        nuevo_plan.append(_etapa(cursos, [cursos.indice[c["codigo"]] for c in etapa["detalles"]],
+                                 semestre, start_year, ciclo_actual))
+    info["recalculadas"] = len(resto)
+    for etapa in resto:
+        previo |= cursos.mascara(c["codigo"] for c in etapa["detalles"])
+    info["sin_plan"] = [cursos.codigos[i] for i in cursos.posiciones(cursos.mascara_total & ~previo)]
+    return nuevo_plan, info
@@ -0,0 +1,395 @@
+"""
+Servicio HTTP de planificación (ASGI, sin framework).
+
+Rutas (JSON):
+    POST /cursos_validos               {"aprobados", "ciclo", "max_cursos", "por_aprobar", "max_creditos",
+                                        "prioridad"}
+    POST /simular_avance               ... + "start_year"
+    POST /planificar_toda_la_carrera   ... + "total_ciclos", "motor", "min_creditos", "max_segundos"
+    POST /predecir_graduacion          {"aprobados", "ciclo", "max_cursos", "max_creditos", "start_year"}
+    POST /replanificar                 /simular_avance + "plan" (el que se devolvió), "cambios", "modo"
+    GET  /salud
+
+El cuerpo es un pedido o una lista de pedidos; con una lista se responde una
+lista en el mismo orden, y un pedido que falla trae {"error": ..., "estado":
+...} sin afectar a los demás. Un pedido suelto que falla responde con ese
+estado: 400 si el pedido es inválido, 503 si se agotó el presupuesto de
+búsqueda y 500 ante cualquier otro error. La búsqueda CSP
+(/planificar_toda_la_carrera y /replanificar con "modo": "csp") usa
+"max_segundos" o MAX_SEGUNDOS_POR_DEFECTO, nunca más de MAX_SEGUNDOS_TOPE.
+"aprobados" y "por_aprobar" aceptan nombres o códigos.
+Con "prioridad": "critica" se prioriza la ruta crítica (Curriculo.rango_critico;
+en planificar_toda_la_carrera, la estrategia "critica" del CSP).
+/replanificar aplica "cambios" (ver replanificacion.py) a un plan ya hecho
+con esos mismos parámetros y solo recalcula desde el primer semestre afectado.
+Si el servicio se levanta con un catálogo de carreras (ver catalogo.py), cada
+pedido indica "programa": un nombre o una lista (doble titulación).
+Las resoluciones corren en un pool de procesos acotado (los lotes se reparten
+en bloques de `tam_bloque` pedidos) para que el event loop siga atendiendo.
+El currículo se carga una vez en el proceso principal y los trabajadores lo
+heredan al crearse; si el sistema no usa fork, cada trabajador lo carga una
+vez al iniciar.
+
+    uvicorn servicio:app --port 8000
+
+Para probar sin servidor, ver ClientePrueba.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cache_planes import cursos_validos_cacheado, predecir_graduacion_cacheado, simular_avance_cacheado
+from catalogo import Catalogo, cargar_planificable, curriculo_de
+from contexto import BusquedaCancelada, ContextoBusqueda
+from lote import a_nombres
+from replanificacion import replanificar
+from simulador import simular_avance_csp
+
+MAX_CUERPO = 1 << 20
+# Presupuesto de tiempo de cada búsqueda CSP, en segundos
+MAX_SEGUNDOS_POR_DEFECTO = 10.0
+MAX_SEGUNDOS_TOPE = 30.0
+
+# Currículo o catálogo del proceso (lo carga _iniciar_trabajador)
+_cursos = None
+_path_cursos = None
+
+
+def _iniciar_trabajador(path_cursos):
+    global _cursos, _path_cursos
+    if _cursos is None or _path_cursos != path_cursos:
+        _cursos = cargar_planificable(path_cursos)
+        _path_cursos = path_cursos
+
+
+def _entero(pedido, campo, defecto=None):
+    valor = pedido.get(campo, defecto)
+    return None if valor in (None, "") else int(valor)
+
+
+def _creditos(pedido, campo):
+    valor = _entero(pedido, campo)
+    if valor is not None and valor < 0:
+        raise ValueError(f"{campo} no puede ser negativo: {valor}")
+    return valor
+
+
+def _comunes(cursos, pedido):
+    # (aprobados, por_aprobar, ciclo, max_cursos, max_creditos); los valores
+    # fuera de rango son ValueError y el pedido responde 400
+    ciclo = _entero(pedido, "ciclo", 1)
+    if ciclo not in (1, 2):
+        raise ValueError(f"ciclo debe ser 1 o 2: {ciclo}")
+    max_cursos = _entero(pedido, "max_cursos", 5)
+    if max_cursos is None or max_cursos < 1:
+        raise ValueError(f"max_cursos debe ser al menos 1: {max_cursos}")
+    return (
+        a_nombres(cursos, pedido.get("aprobados")),
+        a_nombres(cursos, pedido.get("por_aprobar")),
+        ciclo,
+        max_cursos,
+        _creditos(pedido, "max_creditos"),
+    )
+
+
+def _resumir(plan):
+    return [
+        {"ciclo": etapa["ciclo"], "año": etapa["año"], "cursos": etapa["cursos"], "creditos": etapa["creditos"]}
+        for etapa in plan
+    ]
+
+
+def _anio(pedido):
+    return _entero(pedido, "start_year", datetime.date.today().year)
+
+
+def _contexto(pedido):
+    max_segundos = pedido.get("max_segundos")
+    max_segundos = MAX_SEGUNDOS_POR_DEFECTO if max_segundos in (None, "") else float(max_segundos)
+    return ContextoBusqueda(max_segundos=min(max_segundos, MAX_SEGUNDOS_TOPE))
+
+
+def _estrategia(cursos, pedido):
+    # La prioridad "critica" corresponde a la estrategia "critica" del CSP
+    return "greedy" if cursos.rangos(pedido.get("prioridad")) is None else "critica"
+
+
+def _cursos_validos(cursos, pedido):
+    aprobados, por_aprobar, ciclo, max_cursos, max_creditos = _comunes(cursos, pedido)
+    return {"cursos": cursos_validos_cacheado(cursos, aprobados, ciclo, max_cursos, por_aprobar,
+                                              max_creditos=max_creditos, prioridad=pedido.get("prioridad"))}
+
+
+def _simular_avance(cursos, pedido):
+    aprobados, por_aprobar, ciclo, max_cursos, max_creditos = _comunes(cursos, pedido)
+    plan, iteraciones, nodos = simular_avance_cacheado(
+        cursos, aprobados, ciclo, max_cursos, _anio(pedido), por_aprobar, max_creditos=max_creditos,
+        prioridad=pedido.get("prioridad"),
+    )
+    return {"plan": _resumir(plan), "semestres": len(plan), "iteraciones": iteraciones, "nodos": nodos}
+
+
+def _planificar_toda_la_carrera(cursos, pedido):
+    aprobados, por_aprobar, ciclo, max_cursos, max_creditos = _comunes(cursos, pedido)
+    ctx = _contexto(pedido)
+    plan, backtracks, nodos = simular_avance_csp(
+        cursos, aprobados + por_aprobar, ciclo, max_cursos, _anio(pedido),
+        total_ciclos=_entero(pedido, "total_ciclos"), ctx=ctx, motor=pedido.get("motor", "backtracking"),
+        max_creditos=max_creditos, min_creditos=_creditos(pedido, "min_creditos"),
+        estrategia_busqueda=_estrategia(cursos, pedido),
+    )
+    return {"plan": _resumir(plan), "semestres": len(plan), "backtracks": backtracks, "nodos": nodos,
+            "motor": ctx.motor}
+
+
+def _predecir_graduacion(cursos, pedido):
+    aprobados, _, ciclo, max_cursos, max_creditos = _comunes(cursos, pedido)
+    return {"fecha": predecir_graduacion_cacheado(cursos, aprobados, ciclo, max_cursos,
+                                                  max_creditos=max_creditos, start_year=_anio(pedido))}
+
+
+def _replanificar(cursos, pedido):
+    aprobados, por_aprobar, ciclo, max_cursos, max_creditos = _comunes(cursos, pedido)
+    modo = pedido.get("modo", "greedy")
+    plan, info = replanificar(
+        cursos, pedido.get("plan") or [], aprobados, ciclo, max_cursos, _anio(pedido), pedido.get("cambios") or [],
+        por_aprobar=por_aprobar, modo=modo, max_creditos=max_creditos, prioridad=pedido.get("prioridad"),
+        ctx=_contexto(pedido) if modo == "csp" else None,
+    )
+    return {"plan": _resumir(plan), "semestres": len(plan), **info}
+
+
+OPERACIONES = {
+    "cursos_validos":             _cursos_validos,
+    "simular_avance":             _simular_avance,
+    "planificar_toda_la_carrera": _planificar_toda_la_carrera,
+    "predecir_graduacion":        _predecir_graduacion,
+    "replanificar":               _replanificar,
+}
+
+
+def _atender_bloque(operacion, pedidos):
+    resultados = []
+    for pedido in pedidos:
+        try:
+            cursos = curriculo_de(_cursos, pedido.get("programa"))
+            resultados.append(OPERACIONES[operacion](cursos, pedido))
+        except BusquedaCancelada:
+            resultados.append({"error": "Se agotó el presupuesto de búsqueda", "estado": 503})
+        except (ValueError, KeyError, TypeError) as e:
+            resultados.append({"error": str(e), "estado": 400})
+        except Exception as e:
+            resultados.append({"error": str(e), "estado": 500})
+    return resultados
+
+
+class ErrorPedido(Exception):
+    """
+    Pedido HTTP inválido; lleva el código de estado a responder.
+    """
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class ServicioPlanificacion:
+    """
+    Aplicación ASGI. procesos=None usa un proceso por CPU; procesos=0
+    resuelve en hilos del proceso actual (útil para pruebas). Como mucho hay
+    2 * procesos bloques en vuelo; los demás esperan sin bloquear el loop.
+    """
+
+    def __init__(self, path_cursos="cursos.json", procesos=None, tam_bloque=16):
+        self.path_cursos = path_cursos
+        self.procesos = (os.cpu_count() or 1) if procesos is None else procesos
+        self.tam_bloque = tam_bloque
+        self._pool = None
+        self._cupos = None
+        self._inicio = None
+
+    async def iniciar(self):
+        # Cargar primero: con fork, los trabajadores heredan el currículo ya indexado
+        _iniciar_trabajador(self.path_cursos)
+        if self.procesos:
+            self._pool = ProcessPoolExecutor(self.procesos, initializer=_iniciar_trabajador,
+                                             initargs=(self.path_cursos,))
+        self._cupos = asyncio.Semaphore(2 * max(1, self.procesos))
+
+    async def detener(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._cupos = None
+
+    async def _ejecutar(self, operacion, pedidos):
+        async with self._cupos:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, _atender_bloque, operacion, pedidos)
+
+    async def atender(self, operacion, cuerpo):
+        """
+        Resuelve un pedido (dict) o un lote (lista de dicts) de `operacion`.
+        """
+        if operacion not in OPERACIONES:
+            raise ErrorPedido(404, f"Operación desconocida: {operacion}")
+        es_lote = isinstance(cuerpo, list)
+        pedidos = cuerpo if es_lote else [cuerpo]
+        if not all(isinstance(p, dict) for p in pedidos):
+            raise ErrorPedido(400, "Cada pedido debe ser un objeto JSON")
+        bloques = [pedidos[k:k + self.tam_bloque] for k in range(0, len(pedidos), self.tam_bloque)]
+        partes = await asyncio.gather(*(self._ejecutar(operacion, b) for b in bloques))
+        resultados = [r for parte in partes for r in parte]
+        if es_lote:
+            return resultados
+        if "error" in resultados[0]:
+            raise ErrorPedido(resultados[0]["estado"], resultados[0]["error"])
+        return resultados[0]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if self._inicio is None:
+            # Servidores sin lifespan: se inicia con el primer pedido
+            self._inicio = asyncio.ensure_future(self.iniciar())
+        await self._inicio
+
+        try:
+            ruta = scope["path"].strip("/")
+            if ruta == "salud":
+                if scope["method"] != "GET":
+                    raise ErrorPedido(405, "Usar GET")
+                estado, respuesta = 200, {"estado": "ok", "procesos": self.procesos}
+                if isinstance(_cursos, Catalogo):
+                    respuesta["programas"] = list(_cursos.programas)
+            else:
+                if scope["method"] != "POST":
+                    raise ErrorPedido(405, "Usar POST")
+                cuerpo = await self._leer_cuerpo(receive)
+                estado, respuesta = 200, await self.atender(ruta, cuerpo)
+        except ErrorPedido as e:
+            estado, respuesta = e.estado, {"error": str(e)}
+
+        datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": estado,
+            "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                        (b"content-length", str(len(datos)).encode())],
+        })
+        await send({"type": "http.response.body", "body": datos})
+
+    async def _leer_cuerpo(self, receive):
+        partes, largo = [], 0
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "http.disconnect":
+                raise ErrorPedido(400, "Conexión cerrada")
+            partes.append(mensaje.get("body", b""))
+            largo += len(partes[-1])
+            if largo > MAX_CUERPO:
+                raise ErrorPedido(413, "Cuerpo demasiado grande")
+            if not mensaje.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(partes) or b"null")
+        except ValueError:
+            raise ErrorPedido(400, "JSON inválido")
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "lifespan.startup":
+                self._inicio = asyncio.ensure_future(self.iniciar())
+                try:
+                    await self._inicio
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif mensaje["type"] == "lifespan.shutdown":
+                await self.detener()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+class ClientePrueba:
+    """
+    Cliente en proceso: habla ASGI directamente con la aplicación, sin red.
+
+        with ClientePrueba(ServicioPlanificacion(procesos=0)) as cliente:
+            estado, datos = cliente.post("/cursos_validos", {"aprobados": [], "ciclo": 1})
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._loop = asyncio.new_event_loop()
+        self._eventos = None
+        self._vida = None
+
+    def __enter__(self):
+        self._eventos = asyncio.Queue()
+        enviados = asyncio.Queue()
+        self._vida = self._loop.create_task(self.app({"type": "lifespan"}, self._eventos.get, enviados.put))
+        self._loop.run_until_complete(self._eventos.put({"type": "lifespan.startup"}))
+        self._loop.run_until_complete(enviados.get())
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.run_until_complete(self._eventos.put({"type": "lifespan.shutdown"}))
+        self._loop.run_until_complete(self._vida)
+        self._loop.close()
+
+    def get(self, path):
+        return self.pedir("GET", path)
+
+    def post(self, path, cuerpo):
+        return self.pedir("POST", path, cuerpo)
+
+    def pedir(self, metodo, path, cuerpo=None):
+        """
+        Devuelve (estado HTTP, respuesta JSON decodificada).
+        """
+        return self._loop.run_until_complete(self._pedir(metodo, path, cuerpo))
+
+    async def _pedir(self, metodo, path, cuerpo):
+        datos = b"" if cuerpo is None else json.dumps(cuerpo).encode("utf-8")
+        mensajes = [{"type": "http.request", "body": datos, "more_body": False}]
+        respuesta = {"estado": None, "cuerpo": b""}
+
+        async def recibir():
+            return mensajes.pop(0) if mensajes else {"type": "http.disconnect"}
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                respuesta["estado"] = mensaje["status"]
+            else:
+                respuesta["cuerpo"] += mensaje.get("body", b"")
+
+        scope = {"type": "http", "method": metodo, "path": path, "query_string": b"",
+                 "headers": [(b"content-type", b"application/json")]}
+        await self.app(scope, recibir, enviar)
+        return respuesta["estado"], json.loads(respuesta["cuerpo"])
+
+
+app = ServicioPlanificacion(os.environ.get("PLANES_CURSOS", "cursos.json"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP de planificación")
+    parser.add_argument("--cursos", default="cursos.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Falta un servidor ASGI: pip install uvicorn, o usar otro con servicio:app")
+    uvicorn.run(ServicioPlanificacion(args.cursos, args.procesos), host=args.host, port=args.port)
@@ -1,40 +1,110 @@
-from collections import defaultdict
-from csp_solver import planificar_toda_la_carrera
+import heapq
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from contexto import ContextoBusqueda
+from csp_solver import planificar_anytime, planificar_toda_la_carrera, horizonte_factible
+from curriculo import indexar
 
 def contar_dependencias(curso_codigo, cursos):
-    return sum(1 for c in cursos if curso_codigo in c["requisitos"])
+    return indexar(cursos).dependencias(curso_codigo)
 
 def prioridad_compuesta(curso, cursos, historial):
-    años_pendientes = [c["anio"] for c in cursos if c["codigo"] not in historial]
-    min_anio = min(años_pendientes) if años_pendientes else curso["anio"]
-    penalizacion = (curso["anio"] - min_anio) * 10
-    sem_val = curso["semestre"][0] if isinstance(curso.get("semestre"), list) else curso.get("semestre")
-    return (penalizacion, sem_val, -contar_dependencias(curso["codigo"], cursos))
+    return indexar(cursos).heuristica.prioridad(curso["codigo"], historial)
+
+def clave_heap(curso, cursos):
+    """
+    Misma prioridad que prioridad_compuesta sin la penalización por año: entre
+    candidatos del mismo momento, restar min_anio no cambia el orden, así que
+    basta con el año. Sirve de clave fija para el heap del simulador.
+    """
+    return indexar(cursos).heuristica.estatico(curso["codigo"])
 
 def ordenar_por_prioridad(candidatos, cursos, historial):
     # candidatos: lista de objetos curso
-    return sorted(candidatos, key=lambda c: prioridad_compuesta(c, cursos, historial))
+    cursos = indexar(cursos)
+    min_anio = cursos.heuristica.min_anio_pendiente(historial)
+    return sorted(candidatos, key=lambda c: cursos.heuristica.prioridad(c["codigo"], historial, min_anio))
 
 # simulador.py
 
-# Contadores globales
-contador_iteraciones = 0
-contador_nodos      = 0
+# Memo de sufijos: el greedy es determinista dado (historial, ciclo), así que
+# el resto del plan desde un estado se guarda y se reutiliza en otras corridas.
+# Clave (versión del currículo, max_cursos, max_creditos, prioridad, historial, ciclo) →
+# (etapas, inicio, cortado, bytes) con etapas = ((posiciones elegidas en orden, nodos), ...) de toda
+# la corrida, compartida por todos sus estados (el sufijo es etapas[inicio:], así cada corrida
+# guarda O(S) y no O(S²)), y cortado = si el bucle terminó porque no había candidatos (o
+# ninguno cabía en max_creditos) en el ciclo.
+# El memo es del proceso y lo comparten todos los currículos (la versión va en
+# la clave); se acota por tamaño aproximado y no por entradas, porque la clave
+# de un currículo grande pesa n/8 bytes.
+MAX_BYTES_SUFIJOS = 64 << 20
+_memo_sufijos = OrderedDict()
+_memo_lock = threading.Lock()
+estadisticas_sufijos = {"aciertos": 0, "fallos": 0, "bytes": 0}
+
+def _bytes_entrada(clave, etapas):
+    # Aproximado: entrada del dict y clave (el bitset del historial) y, si se
+    # da `etapas`, las de la corrida (se cargan a su primer estado)
+    total = 200 + sys.getsizeof(clave[-2])
+    if etapas is not None:
+        total += 56 + sum(104 + 8 * len(elegidos) for elegidos, _ in etapas)
+    return total
+
+def _obtener_sufijo(clave):
+    with _memo_lock:
+        sufijo = _memo_sufijos.get(clave)
+        if sufijo is None:
+            estadisticas_sufijos["fallos"] += 1
+        else:
+            estadisticas_sufijos["aciertos"] += 1
+            _memo_sufijos.move_to_end(clave)
+            etapas, inicio, cortado, _ = sufijo
+            sufijo = (etapas[inicio:], cortado)
+        return sufijo
+
+def _guardar_sufijos(claves, etapas, cortado):
+    with _memo_lock:
+        for k, clave in enumerate(claves):
+            anterior = _memo_sufijos.get(clave)
+            if anterior is not None:
+                estadisticas_sufijos["bytes"] -= anterior[3]
+            tamanio = _bytes_entrada(clave, etapas if k == 0 else None)
+            _memo_sufijos[clave] = (etapas, k, cortado, tamanio)
+            _memo_sufijos.move_to_end(clave)
+            estadisticas_sufijos["bytes"] += tamanio
+        while _memo_sufijos and estadisticas_sufijos["bytes"] > MAX_BYTES_SUFIJOS:
+            _, (_, _, _, tamanio) = _memo_sufijos.popitem(last=False)
+            estadisticas_sufijos["bytes"] -= tamanio
 
-def simular_avance(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year, por_aprobar=None):
+def limpiar_memo_sufijos():
+    with _memo_lock:
+        _memo_sufijos.clear()
+        estadisticas_sufijos.update(aciertos=0, fallos=0, bytes=0)
+
+def simular_avance(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_year, por_aprobar=None,
+                   memo=True, ctx=None, max_creditos=None, prioridad=None):
     """
-    Simula avance semestre a semestre hasta agotar todos los cursos,
-    y devuelve:
+    Simula avance semestre a semestre hasta agotar todos los cursos, con a lo
+    sumo max_cursos cursos y max_creditos créditos por semestre, y devuelve:
       - plan: lista de etapas {ciclo, año, cursos, detalles, creditos}
-      - contador_iteraciones: cuántas iteraciones del bucle principal
-      - contador_nodos:        cuántos "nodos" (cursos candidatos) se exploraron
+      - iteraciones: cuántas iteraciones del bucle principal
+      - nodos:       cuántos "nodos" (cursos candidatos) se exploraron
+    Con memo=True, si se llega a un estado ya simulado se empalma el resto del
+    plan guardado (los contadores incluyen lo que aportó ese resto).
+    Los contadores se acumulan en `ctx` (ContextoBusqueda), si se da.
+    Con prioridad="critica" se eligen primero los cursos con la cadena de
+    prerrequisitos más larga (ver Curriculo.rango_critico) en lugar de la
+    heurística por año.
     """
-    global contador_iteraciones, contador_nodos
-    contador_iteraciones = 0
-    contador_nodos      = 0
+    if ctx is None:
+        ctx = ContextoBusqueda()
+    iteraciones0, nodos0 = ctx.iteraciones, ctx.nodos
+    cursos = indexar(cursos)
+    rangos = cursos.rangos(prioridad)
 
     # --- Inicializar historial de aprobados ---
-    nombre_a_codigo = {c["nombre"]: c["codigo"] for c in cursos}
+    nombre_a_codigo = cursos.nombre_a_codigo
     historial = {nombre_a_codigo[n] for n in aprobados_nombres if n in nombre_a_codigo}
     if por_aprobar:
         historial.update(nombre_a_codigo[n] for n in por_aprobar if n in nombre_a_codigo)
@@ -42,41 +112,12 @@ def simular_avance(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_ye
     plan = []
     current_year  = start_year
     current_cycle = ciclo_actual
-    restantes     = [c for c in cursos if c["codigo"] not in historial]
-
-    # --- Bucle principal semestre a semestre ---
-    while restantes:
-        contador_iteraciones += 1
-
-        # 1) Filtrar candidatos válidos en este ciclo
-        cursos_ciclo = [
-            c for c in cursos
-            if current_cycle in c.get("semestre", [])
-               and c["codigo"] not in historial
-               and all(pr in historial for pr in c["requisitos"])
-        ]
-        # Contar nodos explorados
-        contador_nodos += len(cursos_ciclo)
+    # Historial también como bitset para el chequeo de prerrequisitos
+    hist_mask     = cursos.mascara(historial)
+    restantes     = bin(cursos.mascara_total & ~hist_mask).count("1")
 
-        if not cursos_ciclo:
-            break
-
-        # 2) Si caben menos de max_cursos, buscar alternativos en mismo ciclo
-        if len(cursos_ciclo) < max_cursos:
-            alternativos = [
-                c for c in cursos
-                if current_cycle in c.get("semestre", [])
-                   and c["codigo"] not in historial
-                   and all(pr in historial for pr in c["requisitos"])
-                   and c not in cursos_ciclo
-            ]
-            # ordena alternativos según tu heurística de prioridad
-            alternativos = ordenar_por_prioridad(alternativos, cursos, historial)
-            cursos_ciclo.extend(alternativos[: max_cursos - len(cursos_ciclo)])
-            contador_nodos += len(alternativos[: max_cursos - len(cursos_ciclo)])
-
-        # 3) Elegir los top-max_cursos y añadir etapa
-        seleccion = ordenar_por_prioridad(cursos_ciclo, cursos, historial)[:max_cursos]
+    def agregar_etapa(seleccion):
+        nonlocal current_cycle, current_year
         plan.append({
             "ciclo":    current_cycle,
             "año":      current_year,
@@ -84,49 +125,184 @@ def simular_avance(cursos, aprobados_nombres, ciclo_actual, max_cursos, start_ye
             "detalles": seleccion,
             "creditos": sum(c.get("creditos", 0) for c in seleccion)
         })
-
-        # 4) Actualizar historial y alternar ciclo/año
-        historial.update(c["codigo"] for c in seleccion)
         current_cycle = 2 if current_cycle == 1 else 1
         if current_cycle == ciclo_actual:
             current_year += 1
 
-        restantes = [c for c in cursos if c["codigo"] not in historial]
+    # --- Frontera incremental (Kahn) ---
+    # faltan[i]: prerrequisitos de i sin aprobar; listos[ciclo]: heap con los
+    # cursos sin prerrequisitos pendientes que se ofrecen en ese ciclo. Un curso
+    # ofrecido en ambos ciclos está en los dos heaps y se descarta al sacarlo
+    # si ya se aprobó. disponibles[ciclo] lleva cuántos siguen vigentes.
+    # Se arma recién cuando el memo no alcanza.
+    faltan = listos = disponibles = None
+
+    def activar(i):
+        if rangos is None:
+            clave = clave_heap(cursos[i], cursos) + (i,)
+        for sem in cursos[i]["semestre"]:
+            if rangos is not None:
+                # El rango depende del ciclo en que se lleva; los semestres
+                # que no son 1 ni 2 nunca se sacan del heap
+                clave = (rangos.get(sem, rangos[1])[i], i)
+            heapq.heappush(listos[sem], clave)
+            disponibles[sem] += 1
+
+    prefijo_memo = (cursos.version, max_cursos, max_creditos, prioridad)
+    claves  = []    # estados visitados en esta corrida
+    etapas  = []    # (posiciones elegidas, nodos) por etapa
+    cortado = False
+
+    # --- Bucle principal semestre a semestre ---
+    while restantes:
+        clave = prefijo_memo + (hist_mask, current_cycle)
+        sufijo = _obtener_sufijo(clave) if memo else None
+        if sufijo is not None:
+            # Empalmar el resto del plan ya conocido desde este estado
+            for elegidos, nodos in sufijo[0]:
+                ctx.iteraciones += 1
+                ctx.nodos += nodos
+                agregar_etapa([cursos[i] for i in elegidos])
+            ctx.iteraciones += sufijo[1]
+            ctx.podar("memo_sufijo")
+            etapas.extend(sufijo[0])
+            cortado = sufijo[1]
+            break
+        claves.append(clave)
+
+        if faltan is None:
+            faltan      = [bin(m & ~hist_mask).count("1") for m in cursos.mascara_req]
+            listos      = {sem: [] for sem in cursos.por_semestre}
+            disponibles = {sem: 0 for sem in cursos.por_semestre}
+            for i in cursos.posiciones(cursos.mascara_total & ~hist_mask):
+                if faltan[i] == 0:
+                    activar(i)
+
+        ctx.iteraciones += 1
+        ctx.profundidades[len(plan)] += 1
 
-    # 5) Devolver siempre los tres valores
-    return plan, contador_iteraciones, contador_nodos
+        # 1) Candidatos válidos en este ciclo: los vigentes del heap
+        n_ciclo = disponibles.get(current_cycle, 0)
+        # Contar nodos explorados
+        ctx.nodos += n_ciclo
+
+        if not n_ciclo:
+            cortado = True
+            break
+
+        # 2) Elegir los top-max_cursos que caben en max_creditos y añadir etapa
+        heap = listos[current_cycle]
+        seleccion = []
+        elegidos = []
+        apartados = []  # vigentes que no cupieron: vuelven al heap
+        libres = max_creditos
+        while heap and len(seleccion) < max_cursos:
+            clave_i = heapq.heappop(heap)
+            i = clave_i[-1]
+            if hist_mask >> i & 1:
+                continue
+            if max_creditos is not None and cursos.creditos[i] > libres:
+                apartados.append(clave_i)
+                continue
+            if max_creditos is not None:
+                libres -= cursos.creditos[i]
+            seleccion.append(cursos[i])
+            elegidos.append(i)
+            hist_mask |= 1 << i
+        for clave_i in apartados:
+            heapq.heappush(heap, clave_i)
+        if not seleccion:
+            cortado = True
+            break
+        etapas.append((tuple(elegidos), n_ciclo))
+        agregar_etapa(seleccion)
+
+        # 3) Actualizar solo los dependientes de lo aprobado
+        for c in seleccion:
+            i = cursos.indice[c["codigo"]]
+            restantes -= 1
+            for sem in c["semestre"]:
+                disponibles[sem] -= 1
+            for d in cursos.dependientes[i]:
+                faltan[d] -= 1
+                if faltan[d] == 0 and not hist_mask >> d & 1:
+                    activar(d)
 
+    # 4) Guardar el resto del plan desde cada estado visitado
+    if memo and claves:
+        _guardar_sufijos(claves, tuple(etapas), cortado)
 
-def simular_avance_csp(cursos, aprobados_nombres, ciclo_inicial, max_cursos, start_year):
+    # 5) Devolver siempre los tres valores (los de esta corrida)
+    return plan, ctx.iteraciones - iteraciones0, ctx.nodos - nodos0
+
+
+def simular_avance_csp(cursos, aprobados_nombres, ciclo_inicial, max_cursos, start_year, total_ciclos=None,
+                       ctx=None, motor="backtracking", max_creditos=None, min_creditos=None,
+                       estrategia_busqueda="greedy"):
+    """
+    Plan completo con el solver CSP, en el mismo formato que simular_avance.
+    Si no se indica `total_ciclos`, el horizonte es el de una planificación
+    factible por listas (ver horizonte_factible; con la estrategia "critica",
+    la de prioridad "critica", que suele ser más corta), o 12 si no la hay.
+    `motor`, los topes de créditos y `estrategia_busqueda` se pasan a
+    planificar_toda_la_carrera.
+    """
     # 1) Convierte nombres aprobados a códigos
-    nombre_a_codigo   = { c["nombre"]: c["codigo"] for c in cursos }
+    cursos            = indexar(cursos)
+    nombre_a_codigo   = cursos.nombre_a_codigo
     aprobados_codigos = {
         nombre_a_codigo[n]
         for n in aprobados_nombres
         if n in nombre_a_codigo
     }
 
+    if total_ciclos is None:
+        prioridad = "critica" if estrategia_busqueda == "critica" else None
+        total_ciclos = horizonte_factible(cursos, aprobados_codigos, ciclo_inicial, max_cursos, max_creditos,
+                                          prioridad) or 12
+
     # 2) Llama al solver CSP que ya devuelve (plan, backtracks, nodos)
     plan_csp, backtracks, nodos = planificar_toda_la_carrera(
-        cursos, aprobados_codigos, ciclo_inicial, max_cursos
+        cursos, aprobados_codigos, ciclo_inicial, max_cursos, total_ciclos, estrategia_busqueda, ctx=ctx,
+        motor=motor, max_creditos=max_creditos, min_creditos=min_creditos,
     )
 
     # 3) Reconstruye el formato con años y ciclos
+    plan = _con_anios(plan_csp, start_year)
+
+    # 4) Devuelve siempre tres valores
+    return plan, backtracks, nodos
+
+
+def _con_anios(plan_csp, start_year):
+    # El semestre absoluto 1 es ciclo_inicial de start_year, y el año cambia
+    # cada dos semestres
     plan = []
-    year  = start_year
-    cycle = ciclo_inicial
     for etapa in plan_csp:
         detalles = etapa["cursos"]
         plan.append({
             "ciclo":    etapa["ciclo"],
-            "año":      year,
+            "año":      start_year + (etapa["semestre"] - 1) // 2,
             "cursos":   [c["nombre"] for c in detalles],
             "detalles": detalles,
             "creditos": sum(c.get("creditos",0) for c in detalles)
         })
-        cycle = 2 if cycle == 1 else 1
-        if cycle == ciclo_inicial:
-            year += 1
+    return plan
 
-    # 4) Devuelve siempre tres valores
-    return plan, backtracks, nodos
+
+def simular_avance_anytime(cursos, aprobados_nombres, ciclo_inicial, max_cursos, start_year,
+                           max_segundos=1.0, max_nodos=None, ctx=None, max_creditos=None, min_creditos=None):
+    """
+    Plan con el CSP anytime (ver planificar_anytime): responde dentro de
+    `max_segundos` con la mejor solución encontrada. Devuelve
+    (plan, backtracks, nodos, info) con el plan en el formato de simular_avance.
+    """
+    cursos = indexar(cursos)
+    nombre_a_codigo = cursos.nombre_a_codigo
+    aprobados_codigos = {nombre_a_codigo[n] for n in aprobados_nombres if n in nombre_a_codigo}
+    plan_csp, backtracks, nodos, info = planificar_anytime(
+        cursos, aprobados_codigos, ciclo_inicial, max_cursos,
+        max_segundos=max_segundos, max_nodos=max_nodos, ctx=ctx, max_creditos=max_creditos,
+        min_creditos=min_creditos,
+    )
+    return _con_anios(plan_csp, start_year), backtracks, nodos, info
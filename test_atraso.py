@@ -0,0 +1,71 @@
+import pytest
+
+import atraso
+from atraso import para
+
+# A → B → C en cadena, con ciclos de apertura fijos, y D suelto
+CURSOS = [
+    {"codigo": "A", "nombre": "Curso A", "anio": 1, "ciclo": 1, "requisitos": [], "semestre": [1]},
+    {"codigo": "B", "nombre": "Curso B", "anio": 1, "ciclo": 2, "requisitos": ["A"], "semestre": [2]},
+    {"codigo": "C", "nombre": "Curso C", "anio": 2, "ciclo": 1, "requisitos": ["B"], "semestre": [1]},
+    {"codigo": "D", "nombre": "Curso D", "anio": 1, "ciclo": 1, "requisitos": [], "semestre": [1, 2]},
+]
+PLAN_IDEAL = [
+    {"anio": 1, "semestre": 1, "cursos": ["A", "D"]},
+    {"anio": 1, "semestre": 2, "cursos": ["B"]},
+    {"anio": 2, "semestre": 1, "cursos": ["C"]},
+]
+
+
+def _etapa(anio, ciclo, *cursos):
+    return {"año": anio, "ciclo": ciclo, "cursos": list(cursos)}
+
+
+def test_retraso_y_holgura():
+    # A se lleva un año tarde y arrastra a B y C; D va al día
+    plan = [_etapa(2025, 1, "Curso D"), _etapa(2026, 1, "Curso A"), _etapa(2026, 2, "Curso B"),
+            _etapa(2027, 1, "Curso C")]
+    r = para(CURSOS, PLAN_IDEAL).evaluar([], plan, 1, 1, 2025)
+
+    assert {cod: (c["planificado"], c["retraso"], c["holgura"]) for cod, c in r["cursos"].items()} == {
+        "A": (3, 2, -2), "B": (4, 2, -2), "C": (5, 2, -2), "D": (1, 0, 2),
+    }
+    assert (r["semestre_final"], r["semestre_final_ideal"], r["semestres_extra"]) == (5, 3, 2)
+    assert r["retraso_total"] == 6 and r["holgura_minima"] == -2
+    # Pesos 1 + descendientes: A 3, B 2, C 1, D 1
+    assert r["retraso_ponderado"] == pytest.approx(12 / 7)
+    assert r["criticos"] == ["A", "B", "C"] and r["sin_plan"] == []
+    assert r["puntaje"] == pytest.approx(2 + 12 / 7)
+
+
+def test_aprobados_y_cursos_sin_plan():
+    # Segundo semestre (ciclo 2) con A aprobado; el plan solo ubica B
+    r = para(CURSOS, PLAN_IDEAL).evaluar(["A"], [_etapa(2025, 2, "B")], 2, 2, 2025)
+
+    assert r["cursos"]["A"] == {"ideal": 1, "planificado": None, "retraso": 0, "holgura": None}
+    assert (r["cursos"]["B"]["retraso"], r["cursos"]["B"]["holgura"]) == (0, 0)
+    # C y D cuentan como llevados un semestre después del plan (el 3)
+    assert r["sin_plan"] == ["C", "D"] and r["semestre_final"] == 3 and r["semestres_extra"] == 0
+    assert r["retraso_total"] == 2 and r["retraso_ponderado"] == pytest.approx(2 / 7)
+    assert r["holgura_minima"] == 0 and r["criticos"] == []
+
+
+def test_cohorte_ordenada_por_puntaje():
+    # Como en simular_avance, el año cambia al volver al ciclo de inicio
+    filas = para(CURSOS, PLAN_IDEAL).evaluar_cohorte([
+        {"id": "al_dia", "aprobados": ["A", "D"], "semestre_actual": 2, "ciclo": 2,
+         "plan": [_etapa(2025, 2, "Curso B"), _etapa(2025, 1, "Curso C")]},
+        {"id": "atrasado", "aprobados": [], "semestre_actual": 3, "ciclo": 1},
+    ], start_year=2025)
+    assert [f["id"] for f in filas] == ["atrasado", "al_dia"]
+    assert filas[1]["puntaje"] == 0 and filas[0]["semestres_extra"] > 0
+
+
+def test_cache_acotado(monkeypatch):
+    monkeypatch.setattr(atraso, "MAX_PLANES", 2)
+    monkeypatch.setattr(atraso, "_cache", atraso.OrderedDict())
+    ideal = para(CURSOS, PLAN_IDEAL)
+    assert para(CURSOS, PLAN_IDEAL) is ideal
+    for k in range(3):
+        para(CURSOS, PLAN_IDEAL + [{"anio": 3 + k, "semestre": 1, "cursos": []}])
+    assert len(atraso._cache) == 2 and para(CURSOS, PLAN_IDEAL) is not ideal
@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+import cache_planes
+from cache_planes import CachePlanes, clave_estado, simular_avance_cacheado
+from simulador import simular_avance
+from utils import cargar_cursos
+
+
+@pytest.fixture(scope="module")
+def cursos():
+    return cargar_cursos("cursos.json")
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    # Hora fija que el test adelanta a mano
+    ahora = [1000.0]
+    monkeypatch.setattr(cache_planes.time, "time", lambda: ahora[0])
+    return ahora
+
+
+def test_clave_canonica(cursos):
+    a, b, c = (x["nombre"] for x in cursos[:3])
+    clave = clave_estado(cursos, "simular_avance", [a, b], [c], ciclo=1, max_cursos=5)
+    assert clave == clave_estado(cursos, "simular_avance", [b, a, b, a], [c, c], max_cursos=5, ciclo=1)
+    # Da lo mismo si un curso está aprobado o por aprobar
+    assert clave == clave_estado(cursos, "simular_avance", [c, b], [a], ciclo=1, max_cursos=5)
+    assert clave != clave_estado(cursos, "simular_avance", [a, b], [c], ciclo=2, max_cursos=5)
+    assert clave != clave_estado(cursos, "simular_avance", [a], [c], ciclo=1, max_cursos=5)
+    assert clave != clave_estado(cursos, "cursos_validos", [a, b], [c], ciclo=1, max_cursos=5)
+
+
+def test_vencimiento(reloj, tmp_path):
+    cache = CachePlanes(ttl=10, path=tmp_path / "planes.db")
+    cache.guardar("k", [1, 2])
+    reloj[0] += 9
+    assert cache.obtener("k") == [1, 2]
+    reloj[0] += 2
+    assert cache.obtener("k") is None
+    # Tampoco se lee la fila vencida de SQLite con un caché nuevo
+    assert CachePlanes(ttl=10, path=tmp_path / "planes.db").obtener("k") is None
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_lru():
+    cache = CachePlanes(max_entradas=2, ttl=None)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == 1
+    cache.guardar("c", 3)
+    assert cache.obtener("b") is None
+    assert (cache.obtener("a"), cache.obtener("c")) == (1, 3)
+    assert cache.estadisticas()["entradas"] == 2
+
+
+def test_poda_de_sqlite(reloj, tmp_path):
+    path = tmp_path / "planes.db"
+    cache = CachePlanes(max_entradas=1000, ttl=100, path=path, max_filas=10)
+    cache.guardar("vieja", 0)
+    reloj[0] += 200
+    for i in range(1, CachePlanes.PODAR_CADA - 1):
+        reloj[0] += 1
+        cache.guardar(f"k{i}", i)
+
+    def claves():
+        with sqlite3.connect(path) as db:
+            return {fila[0] for fila in db.execute("SELECT clave FROM planes")}
+
+    assert len(claves()) == CachePlanes.PODAR_CADA - 1
+    reloj[0] += 1
+    cache.guardar("ultima", -1)
+    # Se van la vencida y las más viejas que pasan de max_filas
+    ultimas = {f"k{i}" for i in range(CachePlanes.PODAR_CADA - 10, CachePlanes.PODAR_CADA - 1)}
+    assert claves() == ultimas | {"ultima"}
+
+
+def test_simular_avance_cacheado(cursos):
+    cache = CachePlanes()
+    aprobados = [c["nombre"] for c in cursos if c["anio"] == 1]
+    esperado, iteraciones, nodos = simular_avance(cursos, aprobados, 1, 5, 2025)
+
+    plan, *trabajo = simular_avance_cacheado(cursos, aprobados, 1, 5, 2025, cache=cache)
+    assert trabajo == [iteraciones, nodos] and nodos > 0
+    assert [(e["año"], e["cursos"]) for e in plan] == [(e["año"], e["cursos"]) for e in esperado]
+
+    # Un acierto no repite el trabajo y corre los años al start_year pedido
+    plan, *trabajo = simular_avance_cacheado(cursos, list(reversed(aprobados)), 1, 5, 2030, cache=cache)
+    assert trabajo == [0, 0] and cache.aciertos == 1
+    assert [(e["año"], e["cursos"]) for e in plan] == [(e["año"] + 5, e["cursos"]) for e in esperado]
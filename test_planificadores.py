@@ -0,0 +1,150 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from csp_solver import paridad, planificar_anytime, planificar_toda_la_carrera
+from curriculo import indexar
+from optimizador import cota_inferior, planificar_optimo
+from programacion_entera import motores_disponibles, resolver_entero
+
+SEMILLAS = range(120)
+ESTRATEGIAS = ["cronologico", "mrv_grado", "heuristica", "greedy", "critica", "aleatorio:1"]
+
+
+def curriculo(semilla, n=7):
+    r = random.Random(semilla)
+    cursos = []
+    for i in range(n):
+        requisitos = r.sample([c["codigo"] for c in cursos], min(len(cursos), r.choice([0, 0, 1, 1, 2])))
+        cursos.append({"codigo": f"C{i}", "nombre": f"Curso {i}", "anio": 1 + i // 3, "ciclo": 1,
+                       "requisitos": requisitos, "semestre": r.choice([[1], [2], [1, 2]]),
+                       "creditos": r.randint(1, 4)})
+    return indexar(cursos)
+
+
+def escenario(semilla):
+    # (ciclo, max_cursos, max_creditos, min_creditos)
+    r = random.Random(semilla)
+    max_creditos = r.choice([None, 4, 6])
+    return (r.choice([1, 2]), r.choice([1, 2, 3]), max_creditos,
+            r.choice([None, None, 3]) if max_creditos else None)
+
+
+def fuerza_bruta(cursos, ciclo, max_cursos, max_creditos=None, min_creditos=None, tope=40):
+    # Menor cantidad de semestres, recorriendo todos los subconjuntos por capas
+    frontera = {0}
+    for g in range(tope):
+        if cursos.mascara_total in frontera:
+            return g
+        nueva = set()
+        for hist in frontera:
+            elegibles = cursos.posiciones(cursos.elegibles(hist, paridad(g + 1, ciclo)))
+            for k in range(min(max_cursos, len(elegibles)) + 1):
+                for opcion in combinations(elegibles, k):
+                    m = cursos.mascara(cursos.codigos[i] for i in opcion)
+                    creditos = cursos.creditos_de(m)
+                    if max_creditos and creditos > max_creditos:
+                        continue
+                    if min_creditos and m and hist | m != cursos.mascara_total and creditos < min_creditos:
+                        continue
+                    nueva.add(hist | m)
+        frontera = nueva
+    return None
+
+
+def validar(cursos, semestres, ciclo, max_cursos, max_creditos=None, min_creditos=None):
+    # semestres: {semestre absoluto: [códigos]}, con todos los cursos
+    ubicados = [cod for cods in semestres.values() for cod in cods]
+    assert sorted(ubicados) == sorted(cursos.codigos)
+    semestre_de = {cod: t for t, cods in semestres.items() for cod in cods}
+    ultimo = max(semestres)
+    for t, cods in semestres.items():
+        creditos = sum(cursos.curso(cod)["creditos"] for cod in cods)
+        assert len(cods) <= max_cursos
+        assert not max_creditos or creditos <= max_creditos
+        assert not min_creditos or t == ultimo or creditos >= min_creditos
+        for cod in cods:
+            assert paridad(t, ciclo) in cursos.curso(cod)["semestre"]
+            assert all(semestre_de[r] < t for r in cursos.curso(cod)["requisitos"])
+
+
+def _de_csp(plan):
+    return {etapa["semestre"]: [c["codigo"] for c in etapa["cursos"]] for etapa in plan}
+
+
+def _de_simulador(plan, ciclo, start_year=2025):
+    return {2 * (e["año"] - start_year) + (e["ciclo"] != ciclo) + 1: [c["codigo"] for c in e["detalles"]]
+            for e in plan}
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_optimo_igual_a_fuerza_bruta(semilla):
+    cursos, (ciclo, max_cursos, max_creditos, min_creditos) = curriculo(semilla), escenario(semilla)
+    esperado = fuerza_bruta(cursos, ciclo, max_cursos, max_creditos, min_creditos)
+    plan, stats = planificar_optimo(cursos, [], ciclo, max_cursos, 2025,
+                                    max_creditos=max_creditos, min_creditos=min_creditos)
+    if esperado is None:
+        assert not stats["respeta_minimo"] and not stats["optimo"]
+        return
+    assert stats["optimo"] and stats["semestres"] == esperado
+    validar(cursos, _de_simulador(plan, ciclo), ciclo, max_cursos, max_creditos, min_creditos)
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_csp_anytime_no_baja_de_la_cota(semilla):
+    cursos, (ciclo, max_cursos, max_creditos, min_creditos) = curriculo(semilla), escenario(semilla)
+    cota, _ = cota_inferior(cursos, cursos.mascara_total, ciclo, max_cursos, max_creditos)
+    esperado = fuerza_bruta(cursos, ciclo, max_cursos, max_creditos, min_creditos)
+    plan, _, _, info = planificar_anytime(cursos, set(), ciclo, max_cursos,
+                                          max_creditos=max_creditos, min_creditos=min_creditos)
+    assert info["completo"] and info["semestres"] >= cota and not info["agotado"]
+    if esperado is None:
+        assert not info["respeta_minimo"] and not info["optimo"]
+        return
+    assert cota <= esperado
+    assert info["optimo"] and info["semestres"] == esperado
+    validar(cursos, _de_csp(plan), ciclo, max_cursos, max_creditos, min_creditos)
+
+
+def test_csp_anytime_con_presupuesto_agotado():
+    # Con 20 cursos y la semilla 6, la planificación por listas no es óptima
+    cursos = curriculo(6, n=20)
+    _, _, _, completo = planificar_anytime(cursos, set(), 1, 2)
+    plan, _, _, info = planificar_anytime(cursos, set(), 1, 2, max_nodos=1)
+    assert completo["optimo"] and not completo["agotado"]
+    assert info["agotado"] and not info["optimo"] and info["semestres"] > completo["semestres"]
+    validar(cursos, _de_csp(plan), 1, 2)
+
+
+@pytest.mark.parametrize("estrategia", ESTRATEGIAS)
+def test_backtracking_respeta_las_restricciones(estrategia):
+    for semilla in SEMILLAS[:40]:
+        cursos, (ciclo, max_cursos, max_creditos, min_creditos) = curriculo(semilla), escenario(semilla)
+        esperado = fuerza_bruta(cursos, ciclo, max_cursos, max_creditos, min_creditos)
+        if esperado is None:
+            continue
+        plan, _, _ = planificar_toda_la_carrera(cursos, set(), ciclo, max_cursos, esperado, estrategia,
+                                                max_creditos=max_creditos, min_creditos=min_creditos)
+        validar(cursos, _de_csp(plan), ciclo, max_cursos, max_creditos, min_creditos)
+        # Con un semestre menos no hay plan
+        plan, _, _ = planificar_toda_la_carrera(cursos, set(), ciclo, max_cursos, esperado - 1, estrategia,
+                                                max_creditos=max_creditos, min_creditos=min_creditos)
+        assert plan == []
+
+
+@pytest.mark.parametrize("motor", motores_disponibles() or [pytest.param(None, marks=pytest.mark.skip(
+    reason="no hay OR-Tools ni PuLP instalados"))])
+def test_modelo_entero_igual_a_fuerza_bruta(motor):
+    for semilla in SEMILLAS[:40]:
+        cursos, (ciclo, max_cursos, max_creditos, min_creditos) = curriculo(semilla), escenario(semilla)
+        esperado = fuerza_bruta(cursos, ciclo, max_cursos, max_creditos, min_creditos)
+        if esperado is None:
+            continue
+        asign, estado = resolver_entero(cursos, set(), ciclo, max_cursos, 2 * len(cursos), motor=motor,
+                                        max_creditos=max_creditos, min_creditos=min_creditos)
+        assert estado == "optimo" and max(asign.values()) == esperado
+        semestres = {}
+        for cod, t in asign.items():
+            semestres.setdefault(t, []).append(cod)
+        validar(cursos, semestres, ciclo, max_cursos, max_creditos, min_creditos)
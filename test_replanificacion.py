@@ -0,0 +1,20 @@
+from simulador import simular_avance
+from replanificacion import replanificar
+from utils import cargar_cursos
+
+
+def test_reprobado_que_solo_se_abre_en_el_otro_ciclo():
+    # El curso está en la última etapa (ciclo 2) y solo se ofrece en el 2: el
+    # semestre que sigue al plan es ciclo 1 y no tiene nada que ofrecer
+    cursos = cargar_cursos("cursos.json")
+    aprobados = [c["nombre"] for c in cursos if c["anio"] <= 4]
+    plan, _, _ = simular_avance(cursos, aprobados, 1, 3, 2025)
+    curso = next(c for c in cursos if c["nombre"].startswith("Gestion y administración de talento"))
+    assert curso["semestre"] == [2] and curso["nombre"] in plan[-1]["cursos"]
+
+    nuevo, info = replanificar(cursos, plan, aprobados, 1, 3, 2025, {"reprobado": curso["nombre"]})
+
+    assert info["recalculadas"] == 1 and info["sin_plan"] == []
+    assert (nuevo[-1]["año"], nuevo[-1]["ciclo"], nuevo[-1]["cursos"]) == (2027, 2, [curso["nombre"]])
+    planificados = [n for etapa in nuevo for n in etapa["cursos"]]
+    assert sorted(planificados) == sorted(n for etapa in plan for n in etapa["cursos"])
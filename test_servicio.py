@@ -0,0 +1,74 @@
+import pytest
+
+import servicio
+from contexto import ContextoBusqueda
+from servicio import ClientePrueba, ServicioPlanificacion
+
+BASE = {"aprobados": [], "ciclo": 1, "max_cursos": 5, "start_year": 2025}
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with ClientePrueba(ServicioPlanificacion("cursos.json", procesos=0)) as cliente:
+        yield cliente
+
+
+def test_salud(cliente):
+    assert cliente.get("/salud") == (200, {"estado": "ok", "procesos": 0})
+
+
+def test_cursos_validos(cliente):
+    estado, datos = cliente.post("/cursos_validos", BASE)
+    assert estado == 200 and 0 < len(datos["cursos"]) <= 5
+
+
+@pytest.mark.parametrize("ruta", ["/simular_avance", "/planificar_toda_la_carrera"])
+def test_planes(cliente, ruta):
+    estado, datos = cliente.post(ruta, BASE)
+    assert estado == 200 and datos["semestres"] == len(datos["plan"]) > 0
+    assert all(len(etapa["cursos"]) <= 5 for etapa in datos["plan"])
+    assert (datos["plan"][0]["año"], datos["plan"][0]["ciclo"]) == (2025, 1)
+
+
+def test_predecir_graduacion(cliente):
+    estado, datos = cliente.post("/predecir_graduacion", {**BASE, "max_cursos": 6})
+    assert estado == 200 and datos["fecha"].startswith("Semestre ")
+
+
+def test_replanificar_reutiliza_el_plan(cliente):
+    _, original = cliente.post("/simular_avance", BASE)
+    ultimo = original["plan"][-1]["cursos"][0]
+    estado, datos = cliente.post("/replanificar", {**BASE, "plan": original["plan"],
+                                                   "cambios": {"por_aprobar": ultimo}})
+    assert estado == 200 and datos["reutilizadas"] == datos["desde"] == len(original["plan"]) - 1
+    assert ultimo not in [n for etapa in datos["plan"] for n in etapa["cursos"]]
+
+
+def test_lote_en_orden_con_errores_por_pedido(cliente):
+    estado, datos = cliente.post("/cursos_validos", [BASE, {**BASE, "ciclo": 3}, {**BASE, "max_cursos": 2}])
+    assert estado == 200 and len(datos) == 3
+    assert datos[1]["estado"] == 400 and "ciclo" in datos[1]["error"]
+    assert len(datos[0]["cursos"]) == 5 and len(datos[2]["cursos"]) == 2
+
+
+@pytest.mark.parametrize("cambio", [
+    {"ciclo": 3},
+    {"max_cursos": 0},
+    {"max_creditos": -1},
+    {"max_cursos": "muchos"},
+])
+def test_pedido_invalido(cliente, cambio):
+    estado, datos = cliente.post("/simular_avance", {**BASE, **cambio})
+    assert estado == 400 and datos["error"]
+
+
+def test_errores_de_protocolo(cliente):
+    assert cliente.post("/no_existe", BASE)[0] == 404
+    assert cliente.get("/simular_avance")[0] == 405
+    assert cliente.post("/simular_avance", [1, 2])[0] == 400
+
+
+def test_presupuesto_agotado(cliente, monkeypatch):
+    monkeypatch.setattr(servicio, "_contexto", lambda pedido: ContextoBusqueda(max_nodos=1))
+    estado, datos = cliente.post("/planificar_toda_la_carrera", BASE)
+    assert estado == 503 and "presupuesto" in datos["error"]
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import simulador
+from simulador import estadisticas_sufijos, limpiar_memo_sufijos, simular_avance
+from utils import cargar_cursos
+
+
+@pytest.fixture
+def cursos():
+    limpiar_memo_sufijos()
+    yield cargar_cursos("cursos.json")
+    limpiar_memo_sufijos()
+
+
+def _resumen(plan):
+    return [(e["ciclo"], e["año"], e["cursos"]) for e in plan]
+
+
+@pytest.mark.parametrize("prioridad", [None, "critica"])
+def test_sufijo_empalmado_igual_a_corrida_nueva(cursos, prioridad):
+    r = random.Random(0)
+    for max_cursos in (2, 3, 5):
+        # Una corrida desde cero deja en el memo el resto del plan desde
+        # cada estado; las que pasan por esos estados empalman ese resto
+        completo, _, _ = simular_avance(cursos, [], 1, max_cursos, 2025, prioridad=prioridad)
+        for k, etapa in enumerate(completo):
+            aprobados = [n for e in completo[:k] for n in e["cursos"]] + r.sample(etapa["cursos"], 1)
+            for ciclo in (1, 2):
+                aciertos = estadisticas_sufijos["aciertos"]
+                con_memo = simular_avance(cursos, aprobados, ciclo, max_cursos, 2025, prioridad=prioridad)
+                sin_memo = simular_avance(cursos, aprobados, ciclo, max_cursos, 2025, memo=False,
+                                          prioridad=prioridad)
+                assert _resumen(con_memo[0]) == _resumen(sin_memo[0])
+                assert con_memo[1:] == sin_memo[1:]
+            # Con el mismo historial (y algo pendiente) la segunda pasada sale
+            # entera del memo
+            plan, _, _ = simular_avance(cursos, aprobados, 1, max_cursos, 2025, prioridad=prioridad)
+            assert not plan or estadisticas_sufijos["aciertos"] > aciertos
+
+
+def test_memo_acotado_por_tamanio(cursos, monkeypatch):
+    monkeypatch.setattr(simulador, "MAX_BYTES_SUFIJOS", 20000)
+    r = random.Random(1)
+    for _ in range(50):
+        aprobados = [c["nombre"] for c in cursos if r.random() < 0.3]
+        simular_avance(cursos, aprobados, r.choice([1, 2]), r.choice([3, 4, 5]), 2025)
+        assert 0 < estadisticas_sufijos["bytes"] <= 20000
+    limpiar_memo_sufijos()
+    assert estadisticas_sufijos["bytes"] == 0 and not simulador._memo_sufijos
@@ -1,9 +1,14 @@
 
 import json
-import networkx as nx
-from pyvis.network import Network
-
-def cargar_cursos(path="cursos.json"):
+import re
+import threading
+from compilado import cargar_compilado, es_compilado
+from curriculo import indexar
+
+def leer_cursos(path="cursos.json"):
+    # Lista de dicts de cursos, sin indexar
+    if es_compilado(path):
+        return list(cargar_compilado(path))
     with open(path, "r") as f:
         cursos = json.load(f)
         for c in cursos:
@@ -13,58 +18,73 @@ def cargar_cursos(path="cursos.json"):
         return cursos
 
 
-def cursos_validos(cursos, aprobados_nombres, ciclo_actual, max_cursos, por_aprobar=None):
-    nombre_a_codigo = {c["nombre"]: c["codigo"] for c in cursos}
-    codigo_a_nombre = {c["codigo"]: c["nombre"] for c in cursos}
-
-    aprobados = [nombre_a_codigo[n] for n in aprobados_nombres if n in nombre_a_codigo]
+def cargar_cursos(path="cursos.json"):
+    # Currículo compilado (python compilado.py cursos.json cursos.bin)
+    if es_compilado(path):
+        return cargar_compilado(path)
+    # Índices precalculados que comparten todos los planificadores
+    return indexar(leer_cursos(path))
+
+
+def cursos_validos(cursos, aprobados_nombres, ciclo_actual, max_cursos, por_aprobar=None, max_creditos=None,
+                   prioridad=None):
+    cursos = indexar(cursos)
+    # Prioridad "critica": rango precalculado en el ciclo actual; si no, dependientes directos
+    rangos = cursos.rangos(prioridad)
+    if rangos is None:
+        ordenar = ordenar_por_importancia
+    else:
+        rango = rangos.get(ciclo_actual, rangos[1])
+        def ordenar(codigos, cursos):
+            return sorted(codigos, key=lambda cod: rango[cursos.indice[cod]])
+
+    nombre_a_codigo = cursos.nombre_a_codigo
+    codigo_a_nombre = cursos.codigo_a_nombre
+
+    # Aprobados como bitset: el chequeo de prerrequisitos es un solo AND
+    aprobados = cursos.mascara(nombre_a_codigo.get(n) for n in aprobados_nombres)
     if por_aprobar:
-        por_aprobar_codes = [nombre_a_codigo[n] for n in por_aprobar if n in nombre_a_codigo]
-        aprobados += por_aprobar_codes
+        aprobados |= cursos.mascara(nombre_a_codigo.get(n) for n in por_aprobar)
 
     semestre_actual = ciclo_actual # o mejor (usar anio actual si lo tienes)
 
-    cursos_prox_ciclo = [
-        c for c in cursos 
-        if semestre_actual in c["semestre"]
-        and c["codigo"] not in aprobados
-        and all(pr in aprobados for pr in c["requisitos"])
-    ]
+    elegibles_ciclo = cursos.elegibles(aprobados, semestre_actual)
+    cursos_prox_ciclo = cursos.cursos_de(elegibles_ciclo)
 
 
     if len(cursos_prox_ciclo) < max_cursos:
-        cursos_alternativos = [
-            c for c in cursos
-            if c["codigo"] not in aprobados
-            and semestre_actual not in c["semestre"]
-            and all(pr in aprobados for pr in c["requisitos"])
-            and c not in cursos_prox_ciclo
-        ]
-        cursos_alternativos = ordenar_por_importancia(
+        cursos_alternativos = cursos.cursos_de(
+            cursos.elegibles(aprobados) & ~cursos.mascara_semestre.get(semestre_actual, 0)
+        )
+        cursos_alternativos = ordenar(
             [c["codigo"] for c in cursos_alternativos], cursos)
-        cursos_alternativos = [next(c for c in cursos if c["codigo"] == cod) 
-                             for cod in cursos_alternativos]
+        cursos_alternativos = [cursos.curso(cod) for cod in cursos_alternativos]
 
         cursos_prox_ciclo.extend(cursos_alternativos[:max_cursos - len(cursos_prox_ciclo)])
 
-    cursos_ordenados = ordenar_por_importancia(
+    cursos_ordenados = ordenar(
         [c["codigo"] for c in cursos_prox_ciclo], cursos)
-    return [codigo_a_nombre[c] for c in cursos_ordenados[:max_cursos]]
+    seleccion = cursos.seleccionar([cursos.indice[c] for c in cursos_ordenados], max_cursos, max_creditos)
+    return [codigo_a_nombre[cursos.codigos[i]] for i in seleccion]
 
 def validar_manual(cursos, seleccion_manual):
+    cursos = indexar(cursos)
     validos = []
     for code in seleccion_manual:
-        curso = next(c for c in cursos if c["codigo"] == code)
+        curso = cursos.curso(code)
         if all(pr in seleccion_manual for pr in curso["requisitos"]):
             validos.append(curso["nombre"])
     return validos
 
 def ordenar_por_importancia(codigos, cursos):
-    def contar_dependencias(curso_codigo):
-        return sum(1 for c in cursos if curso_codigo in c["requisitos"])
-    return sorted(codigos, key=contar_dependencias, reverse=True)
+    return sorted(codigos, key=indexar(cursos).dependencias, reverse=True)
+
+# networkx y pyvis se importan recién al dibujar el grafo: cargarlos al
+# arrancar la app cuesta más que todo lo demás y casi nunca se usan
 
 def construir_grafo(cursos):
+    import networkx as nx
+
     G = nx.DiGraph()
     for curso in cursos:
         G.add_node(curso["codigo"], label=curso["nombre"])
@@ -73,6 +93,8 @@ def construir_grafo(cursos):
     return G
 
 def mostrar_grafo_pyvis(G, aprobados=[]):
+    from pyvis.network import Network
+
     net = Network(height="750px", width="100%", directed=True)
     for node in G.nodes(data=True):
         color = "#2E86AB" if node[0] in aprobados else "#F18F01"
@@ -109,38 +131,98 @@ def mostrar_grafo_pyvis(G, aprobados=[]):
     net.save_graph(path)
     return path
 
-def alertas_riesgo(plan, max_cursos):
+COLOR_APROBADO = "#2E86AB"
+COLOR_PENDIENTE = "#F18F01"
+
+# Plantillas HTML del grafo por versión del currículo: trozos de texto
+# alternados con la posición del curso cuyo color va en ese lugar
+_plantillas_grafo = {}
+_plantillas_lock = threading.Lock()
+
+def posiciones_grafo(cursos, ancho=260, alto=90):
+    """
+    Posición fija de cada curso: una columna por semestre del plan de
+    estudios (año y ciclo) y los cursos de la columna uno debajo del otro.
+    """
+    cursos = indexar(cursos)
+    filas = {}
+    posiciones = []
+    for c in cursos:
+        ciclo = c["ciclo"][0] if isinstance(c["ciclo"], list) else c["ciclo"]
+        columna = (c["anio"] - 1) * 2 + ciclo
+        fila = filas.get(columna, 0)
+        filas[columna] = fila + 1
+        posiciones.append((columna * ancho, fila * alto))
+    return posiciones
+
+def _plantilla_grafo(cursos):
+    from pyvis.network import Network
+
+    net = Network(height="750px", width="100%", directed=True, cdn_resources="remote")
+    for i, (c, (x, y)) in enumerate(zip(cursos, posiciones_grafo(cursos))):
+        # Marcador único por nodo: se reemplaza por el color al mostrar
+        net.add_node(c["codigo"], label=c["nombre"], color=f"@@color{i}@@", x=x, y=y)
+    # Las aristas salen de los índices del currículo, sin pasar por networkx
+    for i, reqs in enumerate(cursos.requisitos):
+        for r in reqs:
+            net.add_edge(cursos.codigos[r], cursos.codigos[i])
+    net.set_options("""
+    var options = {
+      "nodes": {"font": {"size": 16}},
+      "edges": {"arrows": {"to": {"enabled": true}}, "smooth": false},
+      "physics": {"enabled": false}
+    }
+    """)
+    return re.split(r"@@color(\d+)@@", net.generate_html())
+
+def html_grafo(cursos, aprobados=()):
+    """
+    HTML del grafo de prerrequisitos con los `aprobados` (códigos) en azul y
+    el resto en naranja. El grafo y el HTML se arman una vez por versión del
+    currículo (posiciones fijas, sin simulación física) y se guardan en
+    memoria; cada llamada solo cambia los colores, sin tocar el disco.
+    """
+    cursos = indexar(cursos)
+    with _plantillas_lock:
+        trozos = _plantillas_grafo.get(cursos.version)
+        if trozos is None:
+            trozos = _plantillas_grafo[cursos.version] = _plantilla_grafo(cursos)
+    aprobados = cursos.mascara(aprobados)
+    partes = list(trozos)
+    for k in range(1, len(partes), 2):
+        partes[k] = COLOR_APROBADO if aprobados >> int(partes[k]) & 1 else COLOR_PENDIENTE
+    return "".join(partes)
+
+def alertas_riesgo(plan, max_cursos, max_creditos=None, min_creditos=None):
+    """
+    Etapas que exceden el máximo de cursos o de créditos, o que no llegan al
+    mínimo de créditos (salvo la última, con la que se termina la carrera).
+    """
     alertas = []
-    for etapa in plan:
+    for k, etapa in enumerate(plan):
+        creditos = etapa.get("creditos")
+        if creditos is None:
+            creditos = sum(c.get("creditos", 0) for c in etapa.get("detalles", []))
         if len(etapa["cursos"]) > max_cursos:
             alertas.append(f"El ciclo {etapa['ciclo']} excede el máximo de {max_cursos} cursos.")
+        if max_creditos is not None and creditos > max_creditos:
+            alertas.append(f"El ciclo {etapa['ciclo']} excede el máximo de {max_creditos} créditos ({creditos}).")
+        if min_creditos is not None and etapa["cursos"] and k < len(plan) - 1 and creditos < min_creditos:
+            alertas.append(f"El ciclo {etapa['ciclo']} no llega al mínimo de {min_creditos} créditos ({creditos}).")
     return alertas
 
-def predecir_graduacion(cursos, aprobados_nombres, ciclo_actual, max_cursos):
-    restantes = [c for c in cursos if c["nombre"] not in aprobados_nombres]
-    if not restantes:
-        return "Graduado"
-
-    historial = set(c["nombre"] for c in cursos if c["nombre"] in aprobados_nombres)
-    ciclo = ciclo_actual
-    ciclos_usados = 0
-
-    while restantes and ciclos_usados < 12:
-        posibles = [
-            c for c in restantes
-            if all(pr in [cur["codigo"] for cur in cursos if cur["nombre"] in historial] for pr in c["requisitos"])
-            and ciclo in c["semestre"]
-        ]
-        seleccion = ordenar_por_importancia([c["codigo"] for c in posibles], cursos)[:max_cursos]
-        if not seleccion:
-            ciclo = 2 if ciclo == 1 else 1
-            ciclos_usados += 1
-            continue
-        historial.update(c["nombre"] for c in cursos if c["codigo"] in seleccion)
-        restantes = [c for c in restantes if c["nombre"] not in historial]
-        ciclo = 2 if ciclo == 1 else 1
-        ciclos_usados += 1
-
-    if restantes:
-        return None
-    return f"Semestre {2023 + (ciclos_usados // 2)}-{(ciclos_usados % 2) + 1}"
+def predecir_graduacion(cursos, aprobados_nombres, ciclo_actual, max_cursos, max_creditos=None, start_year=2023):
+    """
+    "Graduado", "Semestre <start_year + s // 2>-<s % 2 + 1>" con s los
+    semestres que faltan (el formato de siempre, que no depende de
+    ciclo_actual) o None si no se termina en 12 semestres. Para el año y el
+    ciclo del último semestre, ver prediccion.predecir_escenarios y
+    tabla_sensibilidad.
+    """
+    from prediccion import predecir_escenarios
+
+    escenario = {"ciclo": ciclo_actual, "max_cursos": max_cursos, "max_creditos": max_creditos}
+    fila = predecir_escenarios(cursos, aprobados_nombres, [escenario], start_year)[0]
+    if fila["semestres"] in (None, 0):
+        return fila["fecha"]
+    return f"Semestre {start_year + fila['semestres'] // 2}-{fila['semestres'] % 2 + 1}"